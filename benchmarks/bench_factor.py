@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+from quantechia.factor import create_factor
+from quantechia.factor.fredmd import FredMD
+from .common import make_prices
+
+
+class RollingFactor:
+    """create_factor.rolling_factor（各窓でPCA）"""
+    params = [[250, 1000], [10, 100]]
+    param_names = ['n_rows', 'n_assets']
+
+    def setup(self, n_rows, n_assets):
+        self.rtn = make_prices(n_rows + 1, n_assets).pct_change().iloc[1:]
+
+    def time_rolling_pca(self, n_rows, n_assets):
+        create_factor.rolling_factor(self.rtn, method='pca', window=60, num_components=3)
+
+
+class FredMDFactors:
+    """FredMD.factors_em（FRED-MDと同程度の大きさの欠損を含む合成パネル）"""
+    params = [[8]]
+    param_names = ['num_factors']
+
+    def setup(self, num_factors):
+        rng = np.random.default_rng(0)
+        n_rows, n_series = 780, 127
+        loadings = rng.normal(size=(num_factors, n_series))
+        data = rng.normal(size=(n_rows, num_factors)) @ loadings + rng.normal(size=(n_rows, n_series))
+        data[rng.random(data.shape) < 0.02] = np.nan
+        data[:120, :10] = np.nan  # 開始の遅いシリーズ
+        index = pd.date_range('1959-01-31', periods=n_rows, freq='ME')
+
+        # データをダウンロードせずに作成する
+        self.model = FredMD.__new__(FredMD)
+        self.model.series = pd.DataFrame(data, index=index, columns=[f'S{i}' for i in range(n_series)])
+        self.model.standardize_method = 2
+        self.model.num_factors = num_factors
+
+    def time_factors_em(self, num_factors):
+        self.model.factors_em()
@@ -0,0 +1,44 @@
+from quantechia import utils
+from .common import N_ROWS, N_ASSETS, make_prices, make_weights, too_large
+
+
+class Returns:
+    """リバランス日のウェイトからのリターン計算"""
+    params = [N_ROWS, N_ASSETS]
+    param_names = ['n_rows', 'n_assets']
+
+    def setup(self, n_rows, n_assets):
+        self.prices = make_prices(n_rows, n_assets)
+        self.weights = make_weights(self.prices)
+
+    def time_calc_rtn(self, n_rows, n_assets):
+        utils.calc_rtn(self.prices, self.weights)
+
+    def time_calc_rtn_np(self, n_rows, n_assets):
+        utils.calc_rtn_np(self.prices, self.weights)
+
+    def time_calc_daily_rtn(self, n_rows, n_assets):
+        utils.calc_daily_rtn(self.prices, self.weights)
+
+    def time_calc_daily_rtn_np(self, n_rows, n_assets):
+        utils.calc_daily_rtn_np(self.prices, self.weights)
+
+    def time_calculate_daily_weight(self, n_rows, n_assets):
+        utils.calculate_daily_weight(self.prices, self.weights)
+
+
+class DailyWeightReturns:
+    """毎日リバランスするウェイトからのリターン計算"""
+    params = [N_ROWS, N_ASSETS]
+    param_names = ['n_rows', 'n_assets']
+
+    def setup(self, n_rows, n_assets):
+        too_large(n_rows, n_assets, 5e6)
+        self.prices = make_prices(n_rows, n_assets)
+        self.weights = make_weights(self.prices, freq='D')
+
+    def time_calc_rtn(self, n_rows, n_assets):
+        utils.calc_rtn(self.prices, self.weights)
+
+    def time_calc_rtn_np(self, n_rows, n_assets):
+        utils.calc_rtn_np(self.prices, self.weights)
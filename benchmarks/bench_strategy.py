@@ -0,0 +1,74 @@
+from quantechia.analysis import RiskContribution
+from quantechia.strategy.basestrategy import RebalanceStrategy
+from quantechia.strategy.risk import cal_risk_parity
+from quantechia.strategy.trend import MomentumStrategy, MomentumStrategyRR
+from .common import N_ROWS, N_ASSETS, make_prices, make_weights, too_large
+
+
+class Rebalance:
+    """RebalanceStrategy.calculate_weight（月次リバランス、lookback=252）"""
+    params = [N_ROWS, N_ASSETS]
+    param_names = ['n_rows', 'n_assets']
+
+    def setup(self, n_rows, n_assets):
+        # 銘柄数がlookback以上だと共分散行列が正則にならない
+        if n_assets >= 252:
+            raise NotImplementedError("n_assets >= lookback")
+        self.prices = make_prices(n_rows, n_assets)
+
+    def time_calculate_weight(self, n_rows, n_assets):
+        RebalanceStrategy(self.prices, rebalance_freq='ME', lookback=252).calculate_weight()
+
+    def time_calculate_weight_rolling_cov(self, n_rows, n_assets):
+        RebalanceStrategy(self.prices, rebalance_freq='ME', lookback=252, cov_method='rolling').calculate_weight()
+
+
+class RiskParity:
+    """cal_risk_parity（1つの共分散行列）"""
+    params = [N_ASSETS, ['newton', 'slsqp']]
+    param_names = ['n_assets', 'solver']
+
+    def setup(self, n_assets, solver):
+        if solver == 'slsqp' and n_assets > 100:
+            raise NotImplementedError("slsqp is too slow for 1000 assets")
+        rtn = make_prices(2 * n_assets + 10, n_assets).pct_change().iloc[1:]
+        self.Sigma = rtn.cov().values
+
+    def time_cal_risk_parity(self, n_assets, solver):
+        cal_risk_parity(self.Sigma, solver=solver)
+
+
+class Momentum:
+    """モメンタムスコアの計算"""
+    params = [N_ROWS, N_ASSETS]
+    param_names = ['n_rows', 'n_assets']
+
+    def setup(self, n_rows, n_assets):
+        prices = make_prices(n_rows, n_assets)
+        self.momentum = MomentumStrategy(prices, window=12)
+        self.rr = MomentumStrategyRR(prices, window=12)
+
+    def time_momentum_score(self, n_rows, n_assets):
+        self.momentum.calculate_momentum_score()
+
+    def time_rr_score(self, n_rows, n_assets):
+        # 移動平均と標準偏差の保持を無効にして毎回計算する
+        self.rr._rolling_stats = None
+        self.rr.calculate_momentum_score()
+
+
+class RiskContributionDaily:
+    """RiskContribution.calculate（毎日のウェイト、lookback=60）"""
+    params = [N_ROWS, N_ASSETS, [None, 'rolling']]
+    param_names = ['n_rows', 'n_assets', 'cov_method']
+
+    def setup(self, n_rows, n_assets, cov_method):
+        if n_assets > 100:
+            raise NotImplementedError("n_assets > 100")
+        too_large(n_rows, n_assets, 1e5 if cov_method is None else 2e6)
+        prices = make_prices(n_rows + 1, n_assets)
+        self.rtn = prices.pct_change().iloc[1:]
+        self.weight = make_weights(self.rtn, freq='D')
+
+    def time_calculate(self, n_rows, n_assets, cov_method):
+        RiskContribution(self.weight, self.rtn, lookback=60, cov_method=cov_method).calculate()
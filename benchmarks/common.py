@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+# 合成パネルの大きさ（行数 × 銘柄数）
+N_ROWS = [1000, 5000, 20000]
+N_ASSETS = [10, 100, 1000]
+
+
+def make_prices(n_rows: int, n_assets: int, seed: int = 0) -> pd.DataFrame:
+    """
+    営業日インデックスの合成価格（幾何ブラウン運動）を作成します。
+
+    Args:
+        n_rows (int): 行数（日数）。
+        n_assets (int): 銘柄数。
+        seed (int, optional): 乱数のシード。
+
+    Returns:
+        pd.DataFrame: (n_rows × n_assets)の価格。
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range('2000-01-03', periods=n_rows)
+    columns = [f'A{i:04d}' for i in range(n_assets)]
+    rtn = rng.normal(0.0003, 0.01, (n_rows, n_assets))
+    return pd.DataFrame(100 * np.exp(np.cumsum(rtn, axis=0)), index=index, columns=columns)
+
+
+def make_weights(prices: pd.DataFrame, freq: str = 'ME', seed: int = 0) -> pd.DataFrame:
+    """
+    freqごとのリバランス日に、合計1のランダムなウェイトを持つDataFrameを作成します。
+    """
+    rng = np.random.default_rng(seed)
+    index = prices.index
+    rebalance = index[index.is_month_end] if freq == 'ME' else index
+    weights = rng.random((len(rebalance), prices.shape[1]))
+    return pd.DataFrame(weights / weights.sum(axis=1, keepdims=True), index=rebalance, columns=prices.columns)
+
+
+def too_large(n_rows: int, n_assets: int, max_cells: float) -> None:
+    """
+    行数 × 銘柄数がmax_cellsを超える組み合わせをスキップします
+    （asvと同じく、setupでNotImplementedErrorを送出するとスキップ扱い）。
+    """
+    if n_rows * n_assets > max_cells:
+        raise NotImplementedError(f"{n_rows} x {n_assets} is skipped")
@@ -0,0 +1,123 @@
+"""
+モジュールごとのimport時間を `python -X importtime` で計測するベンチマーク。
+
+使い方:
+    python benchmarks/import_time.py                 # 計測して表示
+    python benchmarks/import_time.py --save          # 結果をベースラインとして保存
+    python benchmarks/import_time.py --compare       # ベースラインより遅くなったモジュールを報告
+
+各モジュールは新しいプロセスでimportし、--repeat回の計測の最小値（累積時間）を使います。
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'import_time_baseline.json')
+
+MODULES = [
+    'quantechia.utils',
+    'quantechia.metrics',
+    'quantechia.cache',
+    'quantechia.covariance',
+    'quantechia.sparse',
+    'quantechia.analysis',
+    'quantechia.strategy.basestrategy',
+    'quantechia.strategy.risk',
+    'quantechia.strategy.trend',
+    'quantechia.strategy.selection',
+    'quantechia.strategy.sweep',
+    'quantechia.data.data_fetcher',
+    'quantechia.data.edinet',
+    'quantechia.factor.create_factor',
+    'quantechia.factor.fredmd',
+]
+
+
+def parse_importtime(stderr: str) -> list:
+    """
+    -X importtimeの出力を(階層, モジュール名, 累積時間[マイクロ秒])のリストに変換する。
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((level, name.strip(), int(cumulative)))
+    return entries
+
+
+def measure(module: str, repeat: int = 3, top: int = 3) -> dict:
+    """
+    新しいプロセスでmoduleをimportし、累積時間と時間のかかった直接の依存モジュールを返す。
+
+    Args:
+        module (str): モジュール名。
+        repeat (int, optional): 計測回数。最小値を使う。
+        top (int, optional): 表示する依存モジュールの数。
+
+    Returns:
+        dict: {'ms': 累積時間（ミリ秒）, 'heaviest': [(モジュール名, ミリ秒), ...]}
+    """
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    best = None
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                              capture_output=True, text=True, env=env, cwd=ROOT)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{module} のimportに失敗しました:\n{proc.stderr.splitlines()[-1]}")
+        entries = parse_importtime(proc.stderr)
+        position = next(i for i, (level, name, _) in enumerate(entries) if level == 0 and name == module)
+        if best is None or entries[position][2] < best[1][best[0]][2]:
+            best = (position, entries)
+
+    # 出力は読み込みが終わった順なので、moduleの行より前で1つ下の階層にあるものが直接の依存
+    position, entries = best
+    children = []
+    for level, name, cumulative in reversed(entries[:position]):
+        if level == 0:
+            break
+        if level == 1:
+            children.append((name, cumulative))
+    heaviest = sorted(children, key=lambda item: -item[1])[:top]
+    return {'ms': entries[position][2] / 1000, 'heaviest': [(name, us / 1000) for name, us in heaviest]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('modules', nargs='*', default=MODULES, help='計測するモジュール（省略時はすべて）')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--save', action='store_true', help='結果をベースラインとして保存する')
+    parser.add_argument('--compare', action='store_true', help='ベースラインと比較する')
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='--compareで遅くなったと判定する割合（0.5はベースラインの1.5倍）')
+    args = parser.parse_args(argv)
+
+    results = {}
+    for module in args.modules:
+        results[module] = measure(module, repeat=args.repeat)
+        heaviest = ', '.join(f'{name} {ms:.0f}ms' for name, ms in results[module]['heaviest'])
+        print(f"{module:40s} {results[module]['ms']:9.1f} ms   ({heaviest})")
+
+    if args.save:
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump({module: round(result['ms'], 1) for module, result in results.items()}, f, indent=2)
+            f.write('\n')
+        print(f"ベースラインを保存しました: {BASELINE_PATH}")
+
+    if args.compare:
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+        slower = [(module, baseline[module], result['ms']) for module, result in results.items()
+                  if module in baseline and result['ms'] > baseline[module] * (1 + args.tolerance)]
+        for module, before, after in slower:
+            print(f"遅くなりました: {module} {before:.1f} ms -> {after:.1f} ms")
+        return 1 if slower else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+benchmarks/bench_*.py のベンチマークを実行し、保存したベースラインと比較します。
+
+ベンチマークはasvと同じ書き方（クラスのparams、param_names、setup、time_*メソッド）なので、
+asvがあれば `asv run` でもそのまま実行できます。
+
+使い方:
+    python -m benchmarks.run                      # すべて実行して表示
+    python -m benchmarks.run --quick              # 小さいサイズ（行数 × 銘柄数 <= 1e5）のみ
+    python -m benchmarks.run -k Returns           # 名前が正規表現に一致するものだけ
+    python -m benchmarks.run --save               # 結果をベースラインに保存（既存の結果とマージ）
+    python -m benchmarks.run --compare            # ベースラインより遅くなったものがあれば終了コード1
+
+ベースラインは実行したマシンの値なので、比較は同じマシンで保存したものと行ってください。
+"""
+import argparse
+import importlib
+import inspect
+import itertools
+import json
+import os
+import pkgutil
+import re
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baseline.json')
+QUICK_MAX_CELLS = 1e5
+
+
+def discover():
+    """
+    (名前, クラス, メソッド名, パラメータ)を列挙します。
+    名前は `モジュール.クラス.メソッド(パラメータ, ...)` の形式です。
+    """
+    for info in sorted(pkgutil.iter_modules([BENCH_DIR]), key=lambda info: info.name):
+        if not info.name.startswith('bench_'):
+            continue
+        module = importlib.import_module(f'{__package__}.{info.name}')
+        for cls_name, cls in inspect.getmembers(module, inspect.isclass):
+            if cls.__module__ != module.__name__:
+                continue
+            params = getattr(cls, 'params', [[]])
+            names = getattr(cls, 'param_names', [])
+            for method in sorted(m for m in dir(cls) if m.startswith('time_')):
+                for values in itertools.product(*params) if names else [()]:
+                    label = ', '.join(map(repr, values))
+                    yield f'{info.name}.{cls_name}.{method}({label})', cls, method, dict(zip(names, values))
+
+
+def run_one(cls, method, params, repeat):
+    """
+    setupを1回呼び、methodの実行時間（秒、repeat回の最小値）を返します。
+    1回目が1秒を超える場合は繰り返しません。setupがNotImplementedErrorを送出した場合はNone。
+    """
+    bench = cls()
+    args = list(params.values())
+    try:
+        if hasattr(bench, 'setup'):
+            bench.setup(*args)
+    except NotImplementedError:
+        return None
+    func = getattr(bench, method)
+    best = float('inf')
+    for k in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+        if k == 0 and best > 1.0:
+            break
+    if hasattr(bench, 'teardown'):
+        bench.teardown(*args)
+    return best
+
+
+def _cells(params):
+    return params.get('n_rows', 1) * params.get('n_assets', 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-k', '--filter', default=None, help='実行するベンチマーク名の正規表現')
+    parser.add_argument('--quick', action='store_true', help=f'行数 × 銘柄数が{QUICK_MAX_CELLS:g}以下のみ実行する')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='ベースラインのJSONファイル')
+    parser.add_argument('--save', action='store_true', help='結果をベースラインに保存する')
+    parser.add_argument('--compare', action='store_true', help='ベースラインと比較する')
+    parser.add_argument('--tolerance', type=float, default=0.3,
+                        help='--compareで遅くなったと判定する割合（0.3はベースラインの1.3倍）')
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = {}
+    regressions = []
+    for name, cls, method, params in discover():
+        if args.filter and not re.search(args.filter, name):
+            continue
+        if args.quick and _cells(params) > QUICK_MAX_CELLS:
+            continue
+        seconds = run_one(cls, method, params, args.repeat)
+        if seconds is None:
+            continue
+        results[name] = seconds
+
+        line = f'{name:75s} {seconds * 1000:11.2f} ms'
+        if name in baseline:
+            ratio = seconds / baseline[name]
+            line += f'   x{ratio:5.2f}'
+            if ratio > 1 + args.tolerance:
+                regressions.append(name)
+                line += '  遅くなりました'
+        print(line, flush=True)
+
+    if args.save:
+        baseline.update({name: round(seconds, 6) for name, seconds in results.items()})
+        with open(args.baseline, 'w') as f:
+            json.dump(dict(sorted(baseline.items())), f, indent=2)
+            f.write('\n')
+        print(f'ベースラインを保存しました: {args.baseline}')
+
+    if args.compare:
+        print(f'{len(regressions)} / {len(results)} 件がベースラインの{1 + args.tolerance:g}倍より遅くなりました')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
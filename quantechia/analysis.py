@@ -1,40 +1,56 @@
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
-import japanize_matplotlib
+from .covariance import RollingCovariance
+from .sparse import SparseWeight
+from . import metrics
 
-def compare_strategies(strategies: list):
+
+def _pyplot():
+    """matplotlibはimportに時間がかかるため、描画する時点で読み込む（日本語フォントも設定する）"""
+    import matplotlib.pyplot as plt
+    import japanize_matplotlib  # noqa: F401
+    return plt
+
+def compare_strategies(strategies: list, metric_engine: str = 'native', freq: str = 'ME'):
     """
     複数の戦略を比較分析する。
 
     Args:
         strategies (list): Backteststrategy のインスタンスのリスト。
+        metric_engine (str, optional): 'native'の場合はquantechia.metricsで全戦略の指標をまとめて計算し、
+            'quantstats'の場合は戦略ごとにevaluateをquantstatsで実行する。
+        freq (str, optional): 回転率の集計頻度。
 
     Returns:
         pd.DataFrame: 各戦略の評価結果、リターン、ポートフォリオをまとめた DataFrame。
     """
-    results = []
     returns = []
     portfolios = []
     strategy_names = []
 
     for strategy in strategies:
         strategy_names.append(strategy.strategy_name)
-    
-        results.append(strategy.evaluate())
+        if strategy.rtn is None:
+            strategy.calculate_returns()
         returns.append(strategy.rtn)
         portfolios.append(strategy.port)
 
-    # 評価結果を DataFrame にまとめる
-    results_df = pd.DataFrame(results, index=strategy_names)
-
     # リターンを DataFrame にまとめる
     returns_df = pd.concat(returns, axis=1, keys=strategy_names)
 
+    # 評価結果を DataFrame にまとめる
+    if metric_engine == 'native':
+        results_df = metrics.summary(returns_df, weights=[s.weight for s in strategies], freq=freq)
+        results_df.index = strategy_names
+    else:
+        results = [strategy.evaluate(freq=freq, metric_engine=metric_engine) for strategy in strategies]
+        results_df = pd.DataFrame(results, index=strategy_names)
+
     # ポートフォリオを DataFrame にまとめる
     portfolios_df = pd.concat(portfolios, axis=1, keys=strategy_names)
 
     # ポートフォリオの可視化
+    plt = _pyplot()
     plt.figure(figsize=(12, 6))
     for strategy_name, portfolio in portfolios_df.items():
         plt.plot(portfolio, label=strategy_name)
@@ -48,15 +64,33 @@ def compare_strategies(strategies: list):
     return results_df, returns_df, portfolios_df
 
 class RiskContribution:
-    def __init__(self, weight_df: pd.DataFrame, rtn_df: pd.DataFrame, lookback: int = 60):
+    def __init__(self, weight_df: pd.DataFrame, rtn_df: pd.DataFrame, lookback: int = 60,
+                 cov_method: str = None, cov_params: dict = None):
+        """
+        Args:
+            weight_df (pd.DataFrame or SparseWeight): ウェイト。SparseWeightの場合は各日付に
+                その日以前の直近のリバランス日のウェイトを使い、保有銘柄だけで共分散を計算する。
+                結果は保有したことのある銘柄の列のみ。
+            cov_method (str, optional): Noneの場合は窓ごとに`cov()`で再計算、
+                'rolling'または'ewma'の場合はRollingCovarianceで逐次更新する。
+            cov_params (dict, optional): RollingCovarianceに渡す追加の引数。
+        """
         self.weight_df = weight_df
         self.rtn_df = rtn_df
         self.lookback = lookback
+        self.cov_method = cov_method
+        self.cov_params = cov_params if cov_params is not None else {}
         self.rc_df = None
         self.rc_ratio_df = None
 
     def calculate(self):
+        if isinstance(self.weight_df, SparseWeight):
+            return self._calculate_sparse()
+
         rc_list = []
+        cov_engine = None
+        if self.cov_method is not None:
+            cov_engine = RollingCovariance(self.rtn_df, self.lookback, self.cov_method, **self.cov_params)
         for i in range(self.lookback, len(self.rtn_df)):
             date = self.rtn_df.index[i]
             rtn_window = self.rtn_df.iloc[i - self.lookback:i]
@@ -66,7 +100,7 @@ class RiskContribution:
                 rc_list.append(pd.Series([np.nan] * len(w), index=self.rtn_df.columns, name=date))
                 continue
 
-            cov = rtn_window.cov().values
+            cov = rtn_window.cov().values if cov_engine is None else cov_engine.covariance(i)
             mrc = cov @ w
             rc = w * mrc
 
@@ -78,6 +112,37 @@ class RiskContribution:
         # 比率（各日の合計を1に）に変換
         self.rc_ratio_df = self.rc_df.div(self.rc_df.sum(axis=1), axis=0)
 
+    def _calculate_sparse(self):
+        """
+        SparseWeightのウェイトについて、保有銘柄の共分散だけでリスク寄与度を計算する。
+        """
+        weight = self.weight_df
+        columns = weight.active_columns()
+        out_pos = columns.get_indexer(weight.columns)
+        rtn_pos = self.rtn_df.columns.get_indexer(weight.columns)
+        cov_engine = None
+        if self.cov_method is not None:
+            cov_engine = RollingCovariance(self.rtn_df, self.lookback, self.cov_method, **self.cov_params)
+
+        dates = self.rtn_df.index[self.lookback:]
+        rc = np.zeros((len(dates), len(columns)))
+        # 各日付に適用されるリバランス行（その日以前の直近）
+        rows = weight.index.searchsorted(dates, side='right') - 1
+        for k, (i, row) in enumerate(zip(range(self.lookback, len(self.rtn_df)), rows)):
+            if row < 0 or weight.missing[row]:
+                rc[k] = np.nan
+                continue
+            cols, w = weight.row(row)
+            assets = rtn_pos[cols]
+            if cov_engine is None:
+                cov = self.rtn_df.iloc[i - self.lookback:i, assets].cov().values
+            else:
+                cov = cov_engine.covariance(i)[np.ix_(assets, assets)]
+            rc[k, out_pos[cols]] = w * (cov @ w)
+
+        self.rc_df = pd.DataFrame(rc, index=dates, columns=columns)
+        self.rc_ratio_df = self.rc_df.div(self.rc_df.sum(axis=1), axis=0)
+
     def get_rc_dataframe(self) -> pd.DataFrame:
         return self.rc_df
 
@@ -96,6 +161,7 @@ class RiskContribution:
             df = self.rc_df
             ylabel = "リスク寄与度（絶対値）"
 
+        plt = _pyplot()
         df.plot(kind='area', stacked=True, figsize=(12, 6))
         plt.ylabel(ylabel)
         plt.title("Rolling Risk Contributions")
@@ -0,0 +1,178 @@
+import hashlib
+import os
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CACHE_PATH = os.path.join('~', '.cache', 'quantechia', 'optimization.sqlite')
+
+
+def _update_hash(h, obj):
+    """オブジェクトの内容をハッシュに加える（辞書はキー順、配列はバイト列）"""
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        h.update(type(obj).__name__.encode())
+        _update_hash(h, obj.index.to_numpy())
+        if isinstance(obj, pd.DataFrame):
+            _update_hash(h, obj.columns.to_numpy())
+        _update_hash(h, obj.to_numpy())
+    elif isinstance(obj, np.ndarray):
+        if obj.dtype.hasobject:
+            _update_hash(h, obj.tolist())
+            return
+        values = np.ascontiguousarray(obj)
+        h.update(f"ndarray{values.dtype.str}{values.shape}".encode())
+        h.update(values.tobytes())
+    elif isinstance(obj, dict):
+        h.update(b'{')
+        for key in sorted(obj, key=repr):
+            _update_hash(h, key)
+            _update_hash(h, obj[key])
+        h.update(b'}')
+    elif isinstance(obj, (list, tuple)):
+        h.update(b'[')
+        for item in obj:
+            _update_hash(h, item)
+        h.update(b']')
+    else:
+        h.update(f"{type(obj).__name__}:{obj!r};".encode())
+
+
+def make_cache_key(name: str, data, params=None) -> str:
+    """
+    最適化結果のキャッシュキーを作成する。
+
+    Args:
+        name (str): 最適化手法の名前（クラス名やソルバー名）。
+        data: 最適化の入力（リターンの窓や共分散行列）。配列はバイト列でハッシュされる。
+        params (dict, optional): 最適化のパラメータ。
+
+    Returns:
+        str: SHA-256の16進文字列。
+    """
+    h = hashlib.sha256()
+    _update_hash(h, name)
+    _update_hash(h, data)
+    _update_hash(h, params if params is not None else {})
+    return h.hexdigest()
+
+
+class OptimizationCache:
+    """
+    窓ごとの最適化結果（重みベクトル）をローカルディスクに保存するキャッシュ。
+
+    結果はSQLiteの1ファイルに保存し、合計サイズがmax_bytesを超えると
+    最後に使われたのが古いものから削除します（LRU）。
+    hits / misses はこのオブジェクトでの参照回数です（n_jobsやexecutorで並列に最適化する戦略は、
+    ワーカーでの参照回数をこのオブジェクトに加えます）。
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = 256 * 1024 ** 2):
+        """
+        初期化メソッド。
+
+        Args:
+            path (str, optional): キャッシュファイルのパス。
+            max_bytes (int, optional): 保存する結果の合計サイズの上限（バイト）。
+        """
+        self.path = os.path.expanduser(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+
+    def __getstate__(self):
+        # SQLiteの接続はプロセス間で共有できないため、各プロセスで開き直す
+        state = self.__dict__.copy()
+        state['_conn'] = None
+        return state
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, last_access INTEGER NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS cache_last_access ON cache (last_access)")
+        return self._conn
+
+    def get(self, key: str):
+        """
+        キーに対応する結果を返す。ない場合はNone。
+        """
+        row = self.conn.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.conn.execute("UPDATE cache SET last_access = ? WHERE key = ?", (time.time_ns(), key))
+        return np.frombuffer(row[0], dtype=float).copy()
+
+    def set(self, key: str, value):
+        """
+        結果を保存し、上限を超えた分を古いものから削除する。
+        """
+        blob = np.asarray(value, dtype=float).ravel().tobytes()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+            (key, blob, len(blob), time.time_ns()),
+        )
+        self._evict()
+
+    def _evict(self):
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        self.conn.execute(
+            "DELETE FROM cache WHERE key IN ("
+            "SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY last_access DESC, rowid DESC) AS used FROM cache) "
+            "WHERE used > ?)",
+            (self.max_bytes,),
+        )
+
+    def get_or_compute(self, name: str, data, params, func):
+        """
+        キャッシュにあれば保存された結果を、なければfunc()を計算して保存した結果を返す。
+        func()が例外を送出した場合は保存しない。
+
+        Args:
+            name (str): 最適化手法の名前。
+            data: 最適化の入力。
+            params (dict): 最適化のパラメータ。
+            func (callable): 引数なしで重みを返す関数。
+
+        Returns:
+            np.ndarray: 重みベクトル。
+        """
+        key = make_cache_key(name, data, params)
+        value = self.get(key)
+        if value is None:
+            value = np.asarray(func(), dtype=float).ravel()
+            self.set(key, value)
+        return value
+
+    def stats(self) -> dict:
+        """
+        ヒット数、ミス数、保存件数、合計サイズを返す。
+        """
+        entries, size = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+        return {'hits': self.hits, 'misses': self.misses, 'entries': entries, 'bytes': size}
+
+    def clear(self):
+        """
+        保存された結果をすべて削除する。
+        """
+        self.conn.execute("DELETE FROM cache")
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
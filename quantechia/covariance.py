@@ -0,0 +1,219 @@
+import numpy as np
+import pandas as pd
+
+
+class RollingCovariance:
+    """
+    ローリング共分散を逐次更新で計算するクラス。
+
+    位置iの共分散は、iloc[i - lookback:i] の行（'ewma'の場合はi行目より前の全行）から計算します。
+    前回計算した位置から進める場合は、窓に入る行と出る行の和と積和だけを更新するため、
+    1ステップあたりO(N^2)で計算できます。
+    append()で追加した行は、計算済みの状態を保ったまま続けて使えます。
+    """
+
+    # 誤差の蓄積を防ぐため、この回数（lookbackの倍数）の逐次更新ごとに全体を再計算する
+    REFRESH_FACTOR = 10
+
+    def __init__(self, rtn_data, lookback: int = 60, method: str = 'rolling',
+                 halflife: float = None, adjust: bool = True, scale: float = 1.0):
+        """
+        初期化メソッド。
+
+        Args:
+            rtn_data (pd.DataFrame or np.ndarray): リターンデータ。
+            lookback (int, optional): 'rolling'の窓の長さ。デフォルトは60。
+            method (str, optional): 'rolling'（窓内の標本共分散）または'ewma'（指数加重）。
+            halflife (float, optional): 'ewma'の半減期。Noneの場合はlookback。
+            adjust (bool, optional): 'ewma'の重みの調整（pandasのewmと同じ意味）。
+            scale (float, optional): リターンに掛ける倍率。共分散はscaleの2乗倍になる。
+        """
+        if method not in ('rolling', 'ewma'):
+            raise ValueError(f"Unsupported covariance method: {method}")
+
+        self.index = rtn_data.index if isinstance(rtn_data, pd.DataFrame) else None
+        self.values = np.ascontiguousarray(np.asarray(rtn_data, dtype=float))
+        self.lookback = lookback
+        self.method = method
+        self.halflife = halflife if halflife is not None else lookback
+        self.adjust = adjust
+        self.scale = scale
+
+        self._missing = np.isnan(self.values)
+        self._has_nan = self._missing.any()
+        if method == 'rolling':
+            # 平均を引いてから和を取ると、積和からの共分散計算で桁落ちしにくい
+            self._center = (np.nan_to_num(np.nanmean(self.values, axis=0)) if len(self.values)
+                            else np.zeros(self.values.shape[1]))
+            self._centered = np.where(self._missing, 0.0, self.values - self._center)
+            self._valid = (~self._missing).astype(float)
+        self._buffers = {}
+        self._pos = None
+        self._updates = 0
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def append(self, rtn_data):
+        """
+        リターンの行を末尾に追加します。
+
+        計算済みの状態（窓の和・積和や指数加重の状態）はそのまま使うため、
+        次のcovariance()は追加した行の分だけ更新します。配列は倍々に確保するため、
+        追加のコストは行数に比例します。
+
+        Args:
+            rtn_data (pd.DataFrame or np.ndarray): 追加するリターンデータ（列は初期化時と同じ順）。
+        """
+        values = np.asarray(rtn_data, dtype=float).reshape(-1, self.values.shape[1])
+        if len(values) == 0:
+            return
+        if self.index is not None:
+            self.index = self.index.append(rtn_data.index) if isinstance(rtn_data, pd.DataFrame) else None
+        missing = np.isnan(values)
+        self._extend('values', values)
+        self._extend('_missing', missing)
+        if self.method == 'rolling':
+            self._extend('_centered', np.where(missing, 0.0, values - self._center))
+            self._extend('_valid', (~missing).astype(float))
+            if missing.any() and not self._has_nan:
+                # 欠損値を含む場合は和・積和をペアワイズで持つため、次の計算で全体を計算し直す
+                self._has_nan = True
+                self._pos = None
+
+    def _extend(self, name, rows):
+        current = getattr(self, name)
+        n = len(current)
+        buffer = self._buffers.get(name)
+        if buffer is None or len(buffer) < n + len(rows):
+            buffer = np.empty((max(2 * n, n + len(rows)),) + current.shape[1:], dtype=current.dtype)
+            buffer[:n] = current
+            self._buffers[name] = buffer
+        buffer[n:n + len(rows)] = rows
+        setattr(self, name, buffer[:n + len(rows)])
+
+    def covariance(self, i: int) -> np.ndarray:
+        """
+        位置iの共分散行列（i行目より前のデータを使用）を返します。
+
+        Args:
+            i (int): rtn_data内の行位置。
+
+        Returns:
+            np.ndarray: (N, N)の共分散行列。
+        """
+        if self.method == 'ewma':
+            self._advance_ewma(i)
+            cov = self._ewma_output()
+        else:
+            self._advance_rolling(i)
+            cov = self._rolling_output()
+        return cov * self.scale ** 2
+
+    def covariances(self, dates):
+        """
+        指定された日付ごとに（日付, 共分散行列）を返すジェネレータ。
+
+        Args:
+            dates (iterable): rtn_dataのインデックスに含まれる日付。
+
+        Yields:
+            tuple: 日付と(N, N)の共分散行列。
+        """
+        for date in dates:
+            yield date, self.covariance(self.index.get_loc(date))
+
+    def _add_rows(self, start, stop, sign):
+        if start >= stop:
+            return
+        x = self._centered[start:stop]
+        self._cross += sign * (x.T @ x)
+        if self._has_nan:
+            m = self._valid[start:stop]
+            self._sum += sign * (x.T @ m)
+            self._count += sign * (m.T @ m)
+        else:
+            self._sum += sign * x.sum(axis=0)
+            self._count += sign * (stop - start)
+
+    def _advance_rolling(self, i):
+        step = i - self._pos if self._pos is not None else -1
+        if 0 <= step < self.lookback and self._updates < self.REFRESH_FACTOR * self.lookback:
+            # 窓に入る行を足し、窓から出る行を引く
+            self._add_rows(self._pos, i, 1)
+            self._add_rows(max(self._pos - self.lookback, 0), max(i - self.lookback, 0), -1)
+            self._updates += step
+        else:
+            n = self.values.shape[1]
+            self._cross = np.zeros((n, n))
+            self._sum = np.zeros((n, n)) if self._has_nan else np.zeros(n)
+            self._count = np.zeros((n, n)) if self._has_nan else 0
+            self._add_rows(max(i - self.lookback, 0), i, 1)
+            self._updates = 0
+        self._pos = i
+
+    def _rolling_output(self):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if self._has_nan:
+                count = self._count
+                cov = (self._cross - self._sum * self._sum.T / count) / (count - 1)
+                cov[count < 2] = np.nan
+            else:
+                count = self._count
+                if count < 2:
+                    return np.full(self._cross.shape, np.nan)
+                cov = (self._cross - np.outer(self._sum, self._sum) / count) / (count - 1)
+        return cov
+
+    def _reset_ewma(self):
+        n = self.values.shape[1]
+        self._mean = None
+        self._cov = np.zeros((n, n))
+        self._old_wt = 1.0
+        self._sum_wt = 1.0
+        self._sum_wt2 = 1.0
+        self._nobs = 0
+        self._pos = 0
+
+    def _advance_ewma(self, i):
+        if self._pos is None or i < self._pos:
+            self._reset_ewma()
+
+        # pandasのewm().cov()と同じ漸化式（欠損を含む行は全資産で観測なしとして扱う）
+        alpha = 1 - np.exp(np.log(0.5) / self.halflife)
+        old_wt_factor = 1 - alpha
+        new_wt = 1.0 if self.adjust else alpha
+        for t in range(self._pos, i):
+            x = self.values[t]
+            observed = not self._missing[t].any()
+            if self._mean is None:
+                if observed:
+                    self._mean = x.copy()
+                    self._nobs = 1
+                continue
+            self._sum_wt *= old_wt_factor
+            self._sum_wt2 *= old_wt_factor * old_wt_factor
+            self._old_wt *= old_wt_factor
+            if observed:
+                self._nobs += 1
+                old_mean = self._mean
+                total_wt = self._old_wt + new_wt
+                self._mean = (self._old_wt * old_mean + new_wt * x) / total_wt
+                d_old = old_mean - self._mean
+                d_new = x - self._mean
+                self._cov = (self._old_wt * (self._cov + np.outer(d_old, d_old)) + new_wt * np.outer(d_new, d_new)) / total_wt
+                self._sum_wt += new_wt
+                self._sum_wt2 += new_wt * new_wt
+                self._old_wt += new_wt
+                if not self.adjust:
+                    self._sum_wt /= self._old_wt
+                    self._sum_wt2 /= self._old_wt * self._old_wt
+                    self._old_wt = 1.0
+        self._pos = i
+
+    def _ewma_output(self):
+        numerator = self._sum_wt * self._sum_wt
+        denominator = numerator - self._sum_wt2
+        if self._nobs < 2 or denominator <= 0:
+            return np.full(self._cov.shape, np.nan)
+        return numerator / denominator * self._cov
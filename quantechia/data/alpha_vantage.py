@@ -1,6 +1,6 @@
-import requests
 import pandas as pd
 from io import StringIO
+from .transport import get_client
 
 # from quantechia.strategies import basestrategy  # Remove this line
 
@@ -26,15 +26,14 @@ def get_data(function, api_key, is_df=True, df_name=None, csv=False, **params):
     url += f'&apikey={api_key}'
 
     if csv:
-        with requests.Session() as s:
-            download = s.get(url)
-            decoded_content = download.content.decode('utf-8')
-        
-            # StringIOを使ってPandasのデータフレームに変換
-            df = pd.read_csv(StringIO(decoded_content))
+        download = get_client().get(url)
+        decoded_content = download.content.decode('utf-8')
+
+        # StringIOを使ってPandasのデータフレームに変換
+        df = pd.read_csv(StringIO(decoded_content))
         return df
 
-    r = requests.get(url)
+    r = get_client().get(url)
     data = r.json()
     
     if is_df:
@@ -1,27 +1,49 @@
-
 # データ取得を統一的に扱うモジュール
-import importlib
+# yfinance、pandas_datareader、arelle（edinet）、httpx（investing）はimportに時間がかかるため、
+# それぞれのデータソースを使う時点で読み込む
 import os
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
 from .alpha_vantage import get_data
-from . import alpha_vantage, edinet, edinet_lifetechia, edgar, fred, investing, tiingo
+from . import alpha_vantage, edinet, edinet_lifetechia, edgar, fred, tiingo
+from .ratelimit import TokenBucket, call_with_retry
+from .store import MarketDataStore
+from .transport import get_client
 
-import yfinance as yf
-import pandas_datareader as web
 from datetime import date
 from dateutil.relativedelta import relativedelta
 import pandas as pd
-import requests
-import time
 import numpy as np
 
-import importlib
+# ローカルストアを使うデータソース: (ティッカーの引数, 開始日の引数, 終了日の引数, 日付の書式, 終了日を含まないか)
+_STORE_SOURCES = {
+    'yahoo': ('tickers', 'start', 'end', '%Y-%m-%d', True),
+    'data_reader': ('name', 'start', 'end', None, False),
+    'investing': ('symbol', 'from_date', 'to_date', '%d/%m/%Y', False),
+    'alpha_vantage': ('symbol', None, None, None, False),
+}
+# 保存先の区別に使わない引数（取得するデータに影響しないもの、alpha_vantageのoutputsizeはストアが決める）
+_STORE_IGNORED = ('progress', 'threads', 'timeout', 'session', 'outputsize')
 
-importlib.reload(alpha_vantage)
-load_dotenv()
 
 class FinancialDataFetcher:
-    def __init__(self):
+    def __init__(self, store=None, offline=False):
+        """
+        初期化メソッド。
+
+        Args:
+            store (MarketDataStore, str or bool, optional): ヒストリカルデータのローカルストア。
+                パスを指定した場合はそのディレクトリ、Trueの場合は既定のディレクトリを使う。
+                指定すると get_historical_data は取得済みの期間を保存したデータから返し、足りない期間だけを取得する。
+            offline (bool, optional): Trueの場合はストアに保存されたデータのみを返し、ネットワークにアクセスしない。
+        """
+        if store is True:
+            store = MarketDataStore()
+        elif isinstance(store, str):
+            store = MarketDataStore(store)
+        self.store = store or None
+        self.offline = offline
+        from dotenv import load_dotenv
+        load_dotenv()
         self.alpha_vantage_key = os.getenv('ALPHAVANTAGE_API_KEY')
         self.edinet_key = os.getenv('EDINET_API')
         self.lifetechia_key = os.getenv('lifetechia_API')
@@ -33,18 +55,37 @@ class FinancialDataFetcher:
         
 
     def get_historical_data(self, source, **kwargs):
-        """ヒストリカルデータ取得"""
+        """
+        ヒストリカルデータ取得
+
+        storeを指定している場合、yahoo・data_reader・investing・alpha_vantageはティッカーごとに
+        ローカルストアを経由する（複数のティッカーの場合は列が (項目, ティッカー) のDataFrame）。
+        """
+        if self.store is not None and source in _STORE_SOURCES and _STORE_SOURCES[source][0] in kwargs:
+            return self._get_stored(source, **kwargs)
+        if self.offline:
+            raise ValueError(f"{source} はオフラインでは取得できません。")
+        return self._fetch_historical_data(source, **kwargs)
+
+    def _fetch_historical_data(self, source, **kwargs):
+        """データソースからヒストリカルデータを取得する"""
         if source == "alpha_vantage":
             function = kwargs.pop('function', 'TIME_SERIES_DAILY')
             res = get_data(function, self.alpha_vantage_key,is_df=False, **kwargs)
+            if len(res) < 2:
+                # 呼び出し回数の上限やエラーの場合は {'Note': ...} や {'Information': ...} だけが返る
+                raise RuntimeError(f"Alpha Vantage: {res}")
             stock_data = pd.DataFrame.from_dict(res[list(res.keys())[1]], orient="index", dtype=float)
             return stock_data
         elif source == "yahoo":
+            import yfinance as yf
             return yf.download(**kwargs)
         elif source == "data_reader":
+            import pandas_datareader as web
             #name =['AAPL'], data_source='stooq')
             return web.DataReader(**kwargs).sort_index()
         elif source == "investing":
+            from . import investing
             fetcher = investing.InvestingDataFetcher(email=self.email)
             return fetcher.get_data(**kwargs)
         elif source == "tiingo":
@@ -53,22 +94,58 @@ class FinancialDataFetcher:
         else:
             raise ValueError("Invalid source for historical data")
 
+    def _get_stored(self, source, **kwargs):
+        """ティッカーごとにローカルストアから取得済みの期間を読み、足りない期間だけを取得する"""
+        ticker_arg, start_arg, end_arg, date_format, end_exclusive = _STORE_SOURCES[source]
+        tickers = kwargs.pop(ticker_arg)
+        start = kwargs.pop(start_arg, None) if start_arg else None
+        end = kwargs.pop(end_arg, None) if end_arg else None
+        if date_format is not None:
+            start, end = (pd.to_datetime(value, format=date_format) if isinstance(value, str) else value
+                          for value in (start, end))
+        # 取得する内容が変わる引数ごとに保存先を分ける（例：data_reader,data_source=stooq）
+        partition = ','.join([source] + [f'{key}={value}' for key, value in sorted(kwargs.items())
+                                         if key not in _STORE_IGNORED])
+
+        def fetch(ticker, fetch_start, fetch_end):
+            params = dict(kwargs)
+            params[ticker_arg] = ticker
+            if start_arg is None:
+                # alpha_vantageは期間を指定できないため、最近の分だけであればcompact（直近100日）で取得する
+                recent = fetch_start is not None and pd.Timestamp.today() - fetch_start < pd.Timedelta(days=140)
+                params['outputsize'] = 'compact' if recent else 'full'
+                data = self._fetch_historical_data(source, **params)
+                data.index = pd.to_datetime(data.index)
+                return data
+            if fetch_end is not None and end_exclusive:
+                fetch_end = fetch_end + pd.Timedelta(days=1)
+            for arg, value in ((start_arg, fetch_start), (end_arg, fetch_end)):
+                if value is not None:
+                    params[arg] = value.strftime(date_format) if date_format else value
+            data = self._fetch_historical_data(source, **params)
+            if isinstance(data.columns, pd.MultiIndex):
+                data = data.droplevel(-1, axis=1)
+            return data
+
+        frames = {ticker: self.store.get(partition, ticker, lambda s, e, t=ticker: fetch(t, s, e),
+                                         start=start, end=end, offline=self.offline)
+                  for ticker in ([tickers] if isinstance(tickers, str) else tickers)}
+        if isinstance(tickers, str):
+            return frames[tickers]
+        return pd.concat(frames, axis=1).swaplevel(axis=1).sort_index(axis=1, level=0, sort_remaining=False)
+
     def get_financial_data(self, source, **kwargs):
         """財務データ取得"""
         if source == "edinet":
             api_client = edinet.EdinetAPIClient(self.edinet_key)
             doc_id = kwargs["doc_id"]
-            # ZIPファイルのダウンロード
-            zip_file_downloader = edinet.ZipFileDownloader(api_client)
-            zip_file_downloader.download_zip_file(doc_id)
-
-            # Initialize the DataParser with the extraction directory
-            data_parser = edinet.DataParser(extract_dir=doc_id+'/XBRL/PublicDoc/')
-            data_parser.get_xbrl_files()
-            xbrl_p = edinet.XBRLParser(data_parser.get_xbrl_files()[0])
-            df_std = xbrl_p.get_standard_data()
-            edinet.del_files(doc_id)
-            return df_std
+            # ZIPファイルはメモリ上で扱い、XBRL/PublicDoc/ 以下だけを一時ディレクトリに展開する
+            with edinet.public_xbrl_files(api_client, doc_id) as xbrl_files:
+                xbrl_p = edinet.XBRLParser(xbrl_files[0])
+                try:
+                    return xbrl_p.get_standard_data()
+                finally:
+                    xbrl_p.close()
 
         elif source == "lifetechia":
             return edinet_lifetechia.get_financial_data(self.lifetechia_key, **kwargs)
@@ -121,7 +198,7 @@ def get_topix_list(list_type='TPX'):
     url = "https://www.jpx.co.jp/automation/markets/indices/topix/files/topixweight_j.csv"
 
     # HTTPリクエストを送信してファイルをダウンロード
-    response = requests.get(url)
+    response = get_client().get(url)
 
     
     # カレントディレクトリを取得
@@ -170,6 +247,7 @@ def get_sp_data():
 
 
 def get_yf_rtn(ticker_list, log_rtn=False,raw=False, **args):
+    import yfinance as yf
     price_df = yf.download(ticker_list, **args)
     if raw:
         return price_df
@@ -180,7 +258,8 @@ def get_yf_rtn(ticker_list, log_rtn=False,raw=False, **args):
     return rtn.iloc[1:,:]
 
 def get_stooq_rtn(ticker_list,log_rtn=False,raw=False, **args):
-    
+    import pandas_datareader as web
+
     price_sq =  web.DataReader(ticker_list,data_source='stooq', **args).sort_index()
     if raw:
         return price_sq
@@ -190,8 +269,8 @@ def get_stooq_rtn(ticker_list,log_rtn=False,raw=False, **args):
         rtn = price_sq['Close'].pct_change()
     return rtn.iloc[1:,:]
 
-def get_av_rtn_(ticker, log_rtn=False,raw=False, **args):
-    fetcher = FinancialDataFetcher()
+def get_av_rtn_(ticker, log_rtn=False,raw=False, fetcher=None, **args):
+    fetcher = fetcher if fetcher is not None else FinancialDataFetcher()
     price_df = fetcher.get_historical_data("alpha_vantage", symbol=ticker,**args)
 
     if raw:
@@ -201,13 +280,41 @@ def get_av_rtn_(ticker, log_rtn=False,raw=False, **args):
     else:
         rtn = price_df[['4. close']].pct_change()
     return rtn.iloc[1:,:]
-def get_av_rtn(ticker_list, log_rtn=False,raw=False, **args):
-    rtn = pd.DataFrame()
-    for ticker in ticker_list:
-        rtn_ = get_av_rtn_(ticker, log_rtn, raw, **args)
-        rtn = pd.concat([rtn, rtn_],axis=1)
-        time.sleep(0.5)
-    return rtn
+def get_av_rtn(ticker_list, log_rtn=False,raw=False, calls_per_minute=5, max_workers=4, retries=3, backoff=1.0,
+               fetcher=None, **args):
+    """
+    Alpha Vantageから複数のティッカーのリターンを並列に取得する。
+
+    呼び出しはAPIキーの上限（calls_per_minute）に合わせてトークンバケットで制限し、
+    失敗した場合は間隔を空けて再試行する。結果は最後に1回だけ結合する。
+
+    Args:
+        ticker_list (list): ティッカーのリスト。
+        log_rtn (bool, optional): Trueの場合は対数リターン。
+        raw (bool, optional): Trueの場合は価格データをそのまま返す。
+        calls_per_minute (float, optional): 1分あたりの呼び出し回数の上限（無料のAPIキーは5回）。
+        max_workers (int, optional): 同時に実行する取得の数。
+        retries (int, optional): 失敗した場合の再試行の回数。
+        backoff (float, optional): 最初の再試行までの待ち時間（秒）。
+        fetcher (FinancialDataFetcher, optional): 使用するFetcher。Noneの場合は1つ作成して共有する。
+
+    Returns:
+        pd.DataFrame: ティッカーの順に列を並べたリターン（rawの場合は価格データ）。
+    """
+    fetcher = fetcher if fetcher is not None else FinancialDataFetcher()
+    bucket = TokenBucket.per_minute(calls_per_minute)
+
+    def fetch(ticker):
+        def call():
+            bucket.acquire()
+            return get_av_rtn_(ticker, log_rtn, raw, fetcher=fetcher, **args)
+        return call_with_retry(call, retries=retries, backoff=backoff)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        frames = list(executor.map(fetch, ticker_list))
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, axis=1)
 
 
 def get_recession_df():
@@ -1,6 +1,6 @@
 # EDGAR データ取得
-import requests
 import pandas as pd
+from .transport import get_client
 
 class EdgarDataFetcher:
     BASE_URL = "https://data.sec.gov"
@@ -16,7 +16,7 @@ class EdgarDataFetcher:
         """Fetch JSON data from the specified URL."""
         if self.print_url:
             print(url)
-        response = requests.get(url, headers=self.headers)
+        response = get_client().get(url, headers=self.headers)
         if response.status_code == 200:
             return response.json()
         else:
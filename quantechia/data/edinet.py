@@ -1,20 +1,30 @@
+import contextlib
 import datetime
-import requests
+import io
+import json
+import sqlite3
+import tempfile
+import threading
 import time
 import unicodedata
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 import pandas as pd
 import zipfile
 import os
 
 import re
 import numpy as np
-from arelle import Cntlr, ViewFileFactTable, ModelDtsObject, XbrlConst,ViewFileFactList
-from arelle.XbrlConst import conceptNameLabelRole, standardLabel, terseLabel, documentationLabel
 
-import requests
 import zipfile
 import os
 import shutil
+from .ratelimit import TokenBucket
+from .transport import get_client
+
+DEFAULT_DOCUMENTS_CACHE = os.path.join('~', '.cache', 'quantechia', 'edinet', 'documents')
+# Arelleが読み込むファイル（XBRLインスタンスと、それが参照する提出者別のスキーマ・リンクベース）
+PUBLIC_DOC_DIR = 'XBRL/PublicDoc/'
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
 def del_files(doc_id):
         # フォルダの削除
     folder_name = doc_id
@@ -31,7 +41,7 @@ class EdinetAPIClient:
     def get_data(self, url, params, args={}):
         """Common method to fetch data from the API"""
         params["Subscription-Key"] = self.api_key
-        response = requests.get(url, params=params, **args)
+        response = get_client().get(url, params=params, **args)
         
         # Check if the request was successful
         if response.status_code == 200:
@@ -55,33 +65,70 @@ class EdinetAPIClient:
 
 
 class DocIdListRetriever:
-    def __init__(self, api_client):
+    def __init__(self, api_client, cache_dir=DEFAULT_DOCUMENTS_CACHE, max_workers=4, calls_per_second=4.0,
+                 refresh_days=3):
+        """
+        Args:
+            api_client (EdinetAPIClient): APIクライアント。
+            cache_dir (str, optional): 日ごとの書類一覧（documents.jsonのresults）を保存するディレクトリ。
+                Noneの場合は保存しない。過去の日の一覧は変わらないため、保存済みの日は取得しない。
+            max_workers (int, optional): 同時に取得する日数。
+            calls_per_second (float, optional): 1秒あたりのAPI呼び出し回数の上限。
+            refresh_days (int, optional): 当日からこの日数以内の日は、保存済みでも取得し直す（提出が追加されるため）。
+        """
         # Initialize with the API client to fetch data
         self.api_client = api_client
+        self.cache_dir = os.path.expanduser(cache_dir) if cache_dir else None
+        self.max_workers = max_workers
+        self.bucket = TokenBucket(calls_per_second)
+        self.refresh_days = refresh_days
 
     def make_day_list(self, start_date, end_date):
         """Generate a list of dates within the specified date range"""
         period = (end_date - start_date).days
         return [start_date + datetime.timedelta(days=d) for d in range(period + 1)]
 
+    def _cache_path(self, day):
+        return os.path.join(self.cache_dir, f"{day.isoformat()}.json")
+
+    def get_day_results(self, day):
+        """Fetch the document list of one day (from the cache if it is old enough to be final)"""
+        day = pd.Timestamp(day).date()
+        final = (datetime.date.today() - day).days > self.refresh_days
+        if self.cache_dir and final:
+            try:
+                with open(self._cache_path(day), encoding='utf-8') as f:
+                    return json.load(f)
+            except FileNotFoundError:
+                pass
+
+        url = "https://disclosure.edinet-fsa.go.jp/api/v2/documents.json"
+        self.bucket.acquire()
+        results = self.api_client.get_data(url, {"date": day.isoformat(), "type": 2})["results"]
+
+        if self.cache_dir and final:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = self._cache_path(day) + f".{os.getpid()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False)
+            os.replace(tmp, self._cache_path(day))
+        return results
+
     def make_doc_id_list(self, day_list):
         """Fetch company information from EDINET and create a list"""
+        # Fetch data for each day in the day list (concurrently, limited to calls_per_second)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            day_results = list(executor.map(self.get_day_results, day_list))
+
+        # Filter the data based on specific conditions
         securities_report_data = []
-        url = "https://disclosure.edinet-fsa.go.jp/api/v2/documents.json"
-        
-        # Fetch data for each day in the day list
-        for day in day_list:
-            params = {"date": day, "type": 2}
-            json_data = self.api_client.get_data(url, params)
-        
-            # Filter the data based on specific conditions
-            for result in json_data["results"]:
+        for results in day_results:
+            for result in results:
                 ordinance_code = result["ordinanceCode"]
                 form_code = result["formCode"]
 
                 if ordinance_code == "010" and form_code == "030000":
                     securities_report_data.append(result)
-            time.sleep(1)
 
         # Convert data into a DataFrame
         df = pd.DataFrame(securities_report_data)
@@ -98,33 +145,81 @@ class ZipFileDownloader:
         # Initialize with the API client to download files
         self.api_client = api_client
 
-    def download_zip_file(self, doc_id):
-        """Download a ZIP file from EDINET and extract its contents"""
+    def download_zip_bytes(self, doc_id):
+        """Download a ZIP file from EDINET into memory"""
         url = f"https://disclosure.edinet-fsa.go.jp/api/v2/documents/{doc_id}"
         params = {"type": 1,"Subscription-Key":self.api_client.api_key}
+        with get_client().get(url, params=params, stream=True) as response:
+            if response.status_code != 200:
+                raise ValueError(f"Failed to download the ZIP file of {doc_id}. Status Code: {response.status_code}")
+            buffer = io.BytesIO()
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                buffer.write(chunk)
+        # EDINETはエラーの場合もステータス200でJSONを返すことがある
+        if not zipfile.is_zipfile(buffer):
+            raise ValueError(f"The response for {doc_id} is not a ZIP file: {buffer.getvalue()[:200]!r}")
+        return buffer.getvalue()
+
+    def download_zip_file(self, doc_id):
+        """Download a ZIP file from EDINET and extract its contents"""
         filename = f"{doc_id}.zip"
         extract_dir = filename.replace('.zip', '')
 
         # Fetch the file from EDINET API
-        response = requests.get(url, params=params, stream=True)
-        if response.status_code == 200:
-            with open(filename, 'wb') as file:
-                for chunk in response.iter_content(chunk_size=1024):
-                    file.write(chunk)
-            print(f"Download of ZIP file {filename} is complete.")
-            
-            # Extract the downloaded ZIP file
-            zip_obj = zipfile.ZipFile(filename, 'r')
+        try:
+            data = self.download_zip_bytes(doc_id)
+        except ValueError:
+            print("Failed to download the ZIP file.")
+            return
+        with open(filename, 'wb') as file:
+            file.write(data)
+        print(f"Download of ZIP file {filename} is complete.")
 
+        # Extract the downloaded ZIP file
+        with zipfile.ZipFile(io.BytesIO(data)) as zip_obj:
             # Create directory for extraction if it doesn't exist
-            if not os.path.exists(extract_dir):
-                os.makedirs(extract_dir)
-
+            os.makedirs(extract_dir, exist_ok=True)
             zip_obj.extractall(extract_dir)
-            zip_obj.close()
-            print(f"Extracted ZIP file {filename}.")
-        else:
-            print("Failed to download the ZIP file.")
+        print(f"Extracted ZIP file {filename}.")
+
+
+def extract_public_doc(zip_bytes, extract_dir):
+    """
+    ZIPファイル（バイト列）から XBRL/PublicDoc/ 以下のファイルだけをextract_dirに展開する。
+
+    Args:
+        zip_bytes (bytes): EDINETの書類のZIPファイル。
+        extract_dir (str): 展開先のディレクトリ。
+
+    Returns:
+        list: 展開したXBRLインスタンス（.xbrl）のパス。
+    """
+    with zipfile.ZipFile(io.BytesIO(zip_bytes)) as zip_obj:
+        members = [name for name in zip_obj.namelist()
+                   if name.startswith(PUBLIC_DOC_DIR) and not name.endswith('/')]
+        zip_obj.extractall(extract_dir, members=members)
+    return sorted(os.path.join(extract_dir, name) for name in members if name.endswith('.xbrl'))
+
+
+@contextlib.contextmanager
+def public_xbrl_files(api_client, doc_id):
+    """
+    書類をメモリ上にダウンロードし、XBRL/PublicDoc/ 以下だけを専用の一時ディレクトリに展開する。
+
+    with文を抜けると（例外の場合も）一時ディレクトリを削除する。XBRLParserの一時的な出力も
+    XBRLファイルと同じこのディレクトリに作られ、カレントディレクトリは使わないため、
+    複数のプロセスやスレッドから同時に使える。
+
+    Args:
+        api_client (EdinetAPIClient): APIクライアント。
+        doc_id (str): 書類管理番号。
+
+    Yields:
+        list: XBRLインスタンス（.xbrl）のパス。
+    """
+    zip_bytes = ZipFileDownloader(api_client).download_zip_bytes(doc_id)
+    with tempfile.TemporaryDirectory(prefix=f"edinet_{doc_id}_") as extract_dir:
+        yield extract_public_doc(zip_bytes, extract_dir)
 
 
 # DataParser class to handle XBRL parsing, cleaning, and other operations
@@ -138,277 +233,229 @@ class DataParser:
         # Assuming XBRL files have the '.xbrl' extension
         return [os.path.join(self.extract_dir, f) for f in os.listdir(self.extract_dir) if f.endswith('.xbrl')]
 
-cols = ['Concept', 'Facts', 'Label', 'Name', 'LocalName', 'Namespace', 'ParentName', 'ParentLocalName', 'ParentNamespace', 'ID', 'Type', 'PeriodType', 'Balance', 'StandardLabel', 'TerseLabel', 'Documentation', 'LinkRole', 'LinkDefinition', 'PreferredLabelRole', 'Depth', 'ArcRole']
-
-class MyViewFacts(ViewFileFactTable.ViewFacts):
-    def __init__(self, modelXbrl, outfile, arcrole, linkrole, linkqname, arcqname, ignoreDims, showDimDefaults, labelrole, lang, cols,col_num=1,label_cell=None):
-        super().__init__(modelXbrl, outfile, arcrole, linkrole, linkqname, arcqname, ignoreDims, showDimDefaults, labelrole, lang, cols)
-        self.data = []
-
-    def viewConcept(self, concept, modelObject, labelPrefix, preferredLabel, n, relationshipSet, visited):
-        # bad relationship could identify non-concept or be None
-        if (not isinstance(concept, ModelDtsObject.ModelConcept) or
-            concept.substitutionGroupQname == XbrlConst.qnXbrldtDimensionItem):
-            return
-        cols = ['' for i in range(self.numCols)]
-        i = 0
-        for col in self.cols:
-            if col == "Facts":
-                self.setRowFacts(cols,concept,preferredLabel)
-                i = self.numCols - (len(self.cols) - i - 1) # skip to next concept property column
-            else:
-                if col in ("Concept", "Label"):
-                    cols[i] = labelPrefix + concept.label(preferredLabel,lang=self.lang,linkroleHint=relationshipSet.linkrole)
-
-
-                i += 1
-
-        attr = {"concept": str(concept.qname)}
-        self.addRow(cols, treeIndent=n,
-                    xmlRowElementName="facts", xmlRowEltAttr=attr, xmlCol0skipElt=True)
-        self.add_content(concept, modelObject)
-        if concept not in visited:
-            visited.add(concept)
-            for i, modelRel in enumerate(relationshipSet.fromModelObject(concept)):
-                nestedRelationshipSet = relationshipSet
-                targetRole = modelRel.targetRole
-                if self.arcrole in XbrlConst.summationItems:
-                    childPrefix = "({:0g}) ".format(modelRel.weight) # format without .0 on integer weights
-                elif targetRole is None or len(targetRole) == 0:
-                    targetRole = relationshipSet.linkrole
-                    childPrefix = ""
-                else:
-                    nestedRelationshipSet = self.modelXbrl.relationshipSet(self.arcrole, targetRole, self.linkqname, self.arcqname)
-                    childPrefix = "(via targetRole) "
-                toConcept = modelRel.toModelObject
-                if toConcept in visited:
-                    childPrefix += "(loop)"
-                labelrole = modelRel.preferredLabel
-                if not labelrole or self.labelrole == conceptNameLabelRole:
-                    labelrole = self.labelrole
-                self.viewConcept(toConcept, modelRel, childPrefix, labelrole, n + 1, nestedRelationshipSet, visited)
-            visited.remove(concept)
-    def add_content(self, concept, modelObject):
-        if concept.isNumeric:
-            label = concept.label(lang='ja')
-            s_label = concept.label(preferredLabel=standardLabel, lang='ja')
-            facts = self.conceptFacts[concept.qname]
-
-            if isinstance(modelObject, ModelDtsObject.ModelRelationship):
-                parent_name = modelObject.fromModelObject.qname
-                parent_label = modelObject.fromModelObject.label(preferredLabel=standardLabel, lang='ja')
-            else:
-                parent_name = None
-                parent_label = None
-            if isinstance(modelObject, str):
-                link_def = self.linkRoleDefintions[modelObject]
-            elif isinstance(modelObject, ModelDtsObject.ModelRelationship):
-                link_def = self.linkRoleDefintions[modelObject.linkrole]
-            for f in facts:
-                if f.unit is not None:
-                    unit = f.unit.value
-                else:
-                    unit = None
-                value = f.xValue
-                context = f.context
-                self.data.append([concept.qname,concept.typeQname,concept.name, label, s_label, parent_name, parent_label,value, context.startDatetime, context.endDatetime, unit, link_def,context.id])
-
-
-
-def viewFacts(modelXbrl, outfile, arcrole=None, linkrole=None, linkqname=None, arcqname=None, ignoreDims=False, showDimDefaults=False, labelrole=None, lang=None, cols=None,col_num=1, label_cell=None):
-    if outfile is None:
-        outfile = 'test.csv'
-        remove_file = True
-    if not arcrole: arcrole=XbrlConst.parentChild
-    view = MyViewFacts(modelXbrl, outfile, arcrole, linkrole, linkqname, arcqname, ignoreDims, showDimDefaults, labelrole, lang, cols,col_num, label_cell)
-
-    view.view(modelXbrl.modelDocument)
-    df = pd.DataFrame(view.data, columns=['Name','Type','LocalName','Label','StandardLabel','ParentName','ParentLabel', 'Value','StartDate','EndDate','Unit','LinkDefinition','ContextID'])
-    view.close()
-    if remove_file:
-        os.remove(outfile)
-    return pd.DataFrame(df)
-
-
-
-class XBRLParser:
-    def __init__(self, xbrl_file):
-        """Initialize DataParser with the directory of extracted files"""
-        self.xbrl_file_path = xbrl_file
-        self.modelXbrl = None
- 
-    def read_xbrl_file(self):
-        """Parse an XBRL file and return the extracted facts in a DataFrame"""
-        ctrl = Cntlr.Cntlr(logFileName='logToPrint')
-        self.modelXbrl = ctrl.modelManager.load(self.xbrl_file_path)
-
-    def get_fact_list(self, file_path=None,cols=None, **args):
-        if self.modelXbrl is None:
-            self.read_xbrl_file()
-        if cols is None:
-            cols = ['Concept', 'Label', 'Name', 'LocalName', 'Namespace', 'contextRef', 'unitRef', 'Dec', 'Value',  'Period',  'ID', 'Type', 'PeriodType']
-        if file_path is None:
-            file_path = 'fact_list.csv'
-            remove_file = True
-        ViewFileFactList.viewFacts(self.modelXbrl, file_path, cols=cols, **args)
-        df = pd.read_csv(file_path)
-        if remove_file:
-            os.remove(file_path)
-        return df
-    
-    def get_fact_table(self, file_path=None, cols=None, **args):
-        if self.modelXbrl is None:
-            self.read_xbrl_file()
-        if cols is None:
-            cols = ['Concept', 'Facts', 'Label', 'Name', 'LocalName', 'Namespace', 'ParentName', 'ParentLocalName', 'ParentNamespace', 'ID', 'Type', 'PeriodType', 'Balance', 'StandardLabel', 'TerseLabel', 'Documentation', 'LinkRole', 'LinkDefinition', 'PreferredLabelRole', 'Depth', 'ArcRole']
-        if file_path is None:
-            file_path = 'fact_list.csv'
-            remove_file = True
-        ViewFileFactTable.viewFacts(self.modelXbrl, file_path, cols=cols, arcrole=XbrlConst.summationItem, **args)
-        df = pd.read_csv(file_path)
-        if remove_file:
-            os.remove(file_path)
-        return df
-
-    
-    # 年ごとの補完処理
-    def fill_missing_values(self, group):
-        # 欠損値が最も少ない行を基本行として選択
-        base_row = group.loc[group.isna().sum(axis=1).idxmin()].copy()
-
-        # 基本行の欠損値を、他の行のデータで補完
-        for _, row in group.iterrows():
-            base_row.fillna(row, inplace=True)
-
-        return base_row
-
-    def parse_duplicated_label(self, df):
-        # Nameをキーとする辞書（検索高速化）
-        name_to_parent = df.set_index('Name')['ParentName'].to_dict()
-        name_to_parent_label = df.set_index('Name')['ParentLabel'].to_dict()
-        name_to_label = df.set_index('Name')['StandardLabel'].to_dict()
-
-        # 異なる Name で同じ StandardLabel を持つケースを検出
-        duplicate_labels = df.groupby('StandardLabel')['Name'].nunique()
-        duplicate_labels = duplicate_labels[duplicate_labels > 1].index.tolist()
-
-        # StandardLabel の重複がなくなるまで処理
-
-        for label in duplicate_labels:
-            # 重複している StandardLabel を持つ行を取得
-            duplicate_rows = df[df['StandardLabel'] == label]
-
-            for idx, row in duplicate_rows.iterrows():
-                name = row['Name']
-                parent_name = row['ParentName']
-                new_label = row['StandardLabel']
-
-                # 親をたどって識別できるようにする
-                while name in name_to_label:
-                    parent_label = name_to_parent_label.get(name, "")
-                    if parent_label:
-                        new_label = parent_label + " / " + new_label  # 親のラベルを前に追加
-                    else:
-                        break  # これ以上さかのぼれない
-                    
-                    # 異なる Name での重複が解消されたら終了
-                    if df[(df['StandardLabel'] == new_label) & (df['Name'] != name)].empty:
-                        break
-                    
-                    name = name_to_parent.get(name)  # さらに上の親をたどる
-
-                # それでも重複が解消されなかった場合 `_1`, `_2` をつける
-                suffix = 1
-                original_label = new_label
-                while not df[(df['StandardLabel'] == new_label) & (df['Name'] != row['Name'])].empty:
-                    new_label = f"{original_label}_{suffix}"
-                    suffix += 1
-                
-                # ラベルを更新
-                df.at[idx, 'StandardLabel'] = new_label
-                name_to_label[row['Name']] = new_label  # 辞書も更新
-        return df
-        
-
 
-    def parse_xbrl_data(self, pivot=True, groupby_year=True, main_label='StandardLabel'):
-        if self.modelXbrl is None:
-            self.read_xbrl_file()
-        
-        cols = ['Concept', 'Facts', 'Label', 'Name', 'LocalName', 'Namespace', 'ParentName', 'ParentLocalName', 'ParentNamespace', 'ID', 'Type', 'PeriodType', 'Balance', 'StandardLabel', 'TerseLabel', 'Documentation', 'LinkRole', 'LinkDefinition', 'PreferredLabelRole', 'Depth', 'ArcRole']
-        
-        df = viewFacts(self.modelXbrl,None, cols=cols, lang='ja')
-        
-        if len(df) > 0:
-            df = df[df['Value'].isnull()==False]
-            df = df.drop_duplicates(['Name','ContextID','Value'])
-            # df = df[['Name','ParentName','StandardLabel','Value','StartDate','EndDate','Unit','ContextID','ParentLabel']]
-            if not pivot:
-                return df
-            else:
-                
-                if main_label=='StandardLabel':
-                    df = self.parse_duplicated_label(df)
-                main_df_ = df.copy()
-                
-                main_df_ = main_df_.drop_duplicates(subset=[main_label,'EndDate'],keep='first')
-                main_pivot = pd.pivot(main_df_,index=['EndDate'],columns=main_label,values='Value').reset_index()
-                if groupby_year:
-                    # 年ごとに処理を適用
-                    filled_df = main_pivot.groupby(pd.to_datetime(main_pivot['EndDate']).dt.year).apply(self.fill_missing_values)
-
-                    return filled_df
-                else:
-                    return main_pivot
-
-    def get_standard_data(self, pivot=True, groupby_year=True, main_label='StandardLabel'):
-        df = self.parse_xbrl_data(pivot=False)
-        name_pfs = ['売上高',
-            '売上総利益又は売上総損失（△）',
-            '営業利益又は営業損失（△）',
-            '経常利益又は経常損失（△）',
-            '当期純利益又は当期純損失（△）',
-            '親会社株主に帰属する当期純利益又は親会社株主に帰属する当期純損失（△）',
-            # '金融費用',
-            '営業活動によるキャッシュ・フロー',
-            '投資活動によるキャッシュ・フロー',
-            '財務活動によるキャッシュ・フロー',
-            '資産',
-            '負債',
-            '流動資産',
-            '流動負債',
-            '純資産',
-            '株主資本',
-            '利益剰余金',
-            '短期借入金',
-            '長期借入金',
-            '法人税等',
-            '販売費及び一般管理費',
-            '減価償却費',
-            '受取利息及び受取配当金',
-            '支払利息']
-        name_crp = ['株価収益率',
-        '発行済株式総数',
-                            ]
-        name_div = ['１株当たり配当額']
-        id_pfs = list(df[(df['StandardLabel'].isin(name_pfs))&(df['Name'].astype(str).str.contains('jppfs_cor:'))].drop_duplicates(subset='Name')['Name'])
-        id_cor = list(df[(df['StandardLabel'].isin(name_crp))&(df['Name'].astype(str).str.contains('jpcrp_cor:'))].drop_duplicates(subset='Name')['Name'])
-        id_div = list(df[(df['StandardLabel'].isin(name_div))&(df['Name'].astype(str).str.contains('jpcrp_cor:'))].drop_duplicates(subset='Name')['Name'])
-        name_id_list = id_pfs+id_cor+id_div
-
-        
-        df = df[df['Name'].isin(name_id_list)]
-        
-        main_df_ = df.copy()
-        
-        main_df_ = main_df_.drop_duplicates(subset=[main_label,'EndDate'],keep='first')
-        main_pivot = pd.pivot(main_df_,index=['EndDate'],columns=main_label,values='Value').reset_index()
-        if groupby_year:
-            # 年ごとに処理を適用
-            filled_df = main_pivot.groupby(pd.to_datetime(main_pivot['EndDate']).dt.year).apply(self.fill_missing_values)
-
-            return filled_df
-        else:
-            return main_pivot
-
-        
+def parse_standard_data(doc_id, zip_bytes, parse_kwargs=None):
+    """
+    書類のZIPファイル（バイト列）からget_standard_data()の結果を作成する（ワーカープロセスで実行される）。
+
+    Args:
+        doc_id (str): 書類管理番号。
+        zip_bytes (bytes): 書類のZIPファイル。
+        parse_kwargs (dict, optional): XBRLParser.get_standard_dataに渡す引数。
+
+    Returns:
+        pd.DataFrame: get_standard_data()の結果。
+    """
+    from .xbrl import XBRLParser
+    with tempfile.TemporaryDirectory(prefix=f"edinet_{doc_id}_") as extract_dir:
+        xbrl_files = extract_public_doc(zip_bytes, extract_dir)
+        if not xbrl_files:
+            raise ValueError(f"{doc_id} に {PUBLIC_DOC_DIR} のXBRLファイルがありません。")
+        xbrl_p = XBRLParser(xbrl_files[0])
+        try:
+            return xbrl_p.get_standard_data(**(parse_kwargs or {}))
+        finally:
+            xbrl_p.close()
+
+
+class StandardDataExtractor:
+    """
+    多数の書類のget_standard_data()をまとめて作成し、1つのSQLiteファイルに保存するクラス。
+
+    ダウンロードはスレッドで（calls_per_second以下に制限して）行い、ダウンロードが終わった書類から順に
+    Arelleでの解析をプロセスプールに渡すため、ダウンロードと解析が並行して進みます。
+    解析待ちのZIPファイルはmax_pending件までしか保持しません。
+
+    結果は standard_data テーブル（doc_id、end_date、label、value、主キーは (doc_id, end_date, label)）に、
+    書類ごとの処理結果は documents テーブルに保存し、処理済みの書類は次回以降の実行で取得しません。
+    """
+
+    def __init__(self, api_client, output_path, n_jobs=None, download_workers=4, calls_per_second=4.0,
+                 max_pending=None, executor=None, parse=parse_standard_data):
+        """
+        Args:
+            api_client (EdinetAPIClient): APIクライアント。
+            output_path (str): 結果を保存するSQLiteファイルのパス。
+            n_jobs (int, optional): 解析に使うワーカープロセス数。Noneの場合はCPU数。
+            download_workers (int, optional): 同時にダウンロードする書類数。
+            calls_per_second (float, optional): 1秒あたりのダウンロード回数の上限。
+            max_pending (int, optional): ダウンロード済みで解析待ちの書類数の上限。Noneの場合はワーカー数の2倍。
+            executor (Executor, optional): 解析に使うExecutor。指定した場合はn_jobsより優先。
+            parse (callable, optional): `parse(doc_id, zip_bytes, parse_kwargs)` でDataFrameを返す関数
+                （モジュールの最上位で定義されたpickle可能なもの）。
+        """
+        self.api_client = api_client
+        self.output_path = os.path.expanduser(output_path)
+        self.n_jobs = n_jobs
+        self.download_workers = download_workers
+        self.bucket = TokenBucket(calls_per_second)
+        self.max_pending = max_pending or 2 * (n_jobs or os.cpu_count() or 1)
+        self.executor = executor
+        self.parse = parse
+        self._conn = None
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.output_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.output_path, timeout=30)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS standard_data ("
+                "doc_id TEXT NOT NULL, end_date TEXT NOT NULL, label TEXT NOT NULL, value, "
+                "PRIMARY KEY (doc_id, end_date, label))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                "doc_id TEXT PRIMARY KEY, status TEXT NOT NULL, error TEXT, updated INTEGER NOT NULL)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def processed(self, include_failed=True):
+        """
+        処理済みの書類管理番号を返します。
+
+        Args:
+            include_failed (bool, optional): Falseの場合は解析に成功した書類のみ。
+        """
+        query = "SELECT doc_id FROM documents" + ("" if include_failed else " WHERE status = 'ok'")
+        return {row[0] for row in self.conn.execute(query)}
+
+    def _save(self, doc_id, data=None, error=None):
+        """1つの書類の結果を保存する（同じ書類の以前の結果は置き換える）"""
+        rows = []
+        if data is not None:
+            data = data.reset_index(drop=True)
+            labels = [column for column in data.columns if column != 'EndDate']
+            for _, row in data.iterrows():
+                end_date = str(row['EndDate'])
+                for label in labels:
+                    value = row[label]
+                    if pd.notna(value):
+                        rows.append((doc_id, end_date, str(label), value.item() if hasattr(value, 'item') else value))
+        with self.conn:
+            self.conn.execute("DELETE FROM standard_data WHERE doc_id = ?", (doc_id,))
+            self.conn.executemany("INSERT INTO standard_data (doc_id, end_date, label, value) VALUES (?, ?, ?, ?)",
+                                  rows)
+            self.conn.execute("INSERT OR REPLACE INTO documents (doc_id, status, error, updated) VALUES (?, ?, ?, ?)",
+                              (doc_id, 'ok' if error is None else 'error', error, time.time_ns()))
+
+    def run(self, doc_ids, retry_failed=False, **parse_kwargs):
+        """
+        書類をダウンロード・解析して保存します。処理済みの書類は取得しません。
+
+        Args:
+            doc_ids (list or pd.DataFrame): 書類管理番号のリスト、またはDocIdListRetrieverの結果（docID列）。
+            retry_failed (bool, optional): Trueの場合は以前に失敗した書類も処理し直す。
+            **parse_kwargs: get_standard_dataに渡す引数。
+
+        Returns:
+            pd.DataFrame: 今回処理した書類の doc_id、status（'ok'または'error'）、error。
+        """
+        if isinstance(doc_ids, pd.DataFrame):
+            doc_ids = doc_ids['docID'].tolist()
+        done = self.processed(include_failed=not retry_failed)
+        todo = [doc_id for doc_id in dict.fromkeys(doc_ids) if doc_id not in done]
+        results = []
+
+        def record(doc_id, data=None, error=None):
+            self._save(doc_id, data, error)
+            results.append({'doc_id': doc_id, 'status': 'ok' if error is None else 'error', 'error': error})
+
+        if not todo:
+            return pd.DataFrame(results, columns=['doc_id', 'status', 'error'])
+
+        downloader = ZipFileDownloader(self.api_client)
+        slots = threading.BoundedSemaphore(self.max_pending)
+
+        stop = threading.Event()
+
+        def download(doc_id):
+            # 解析待ちがmax_pending件に達している場合は、解析が終わるまでダウンロードを待つ
+            while not slots.acquire(timeout=0.1):
+                if stop.is_set():
+                    raise RuntimeError("中断されました。")
+            try:
+                self.bucket.acquire()
+                return downloader.download_zip_bytes(doc_id)
+            except BaseException:
+                slots.release()
+                raise
+
+        executor = self.executor or ProcessPoolExecutor(max_workers=self.n_jobs)
+        try:
+            with ThreadPoolExecutor(max_workers=self.download_workers) as download_pool:
+                downloads = {download_pool.submit(download, doc_id): doc_id for doc_id in todo}
+                parses = {}
+                pending = set(downloads)
+                try:
+                    while pending:
+                        finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            if future in downloads:
+                                doc_id = downloads.pop(future)
+                                try:
+                                    zip_bytes = future.result()
+                                except Exception as e:
+                                    record(doc_id, error=f"{type(e).__name__}: {e}")
+                                    continue
+                                parse_future = executor.submit(self.parse, doc_id, zip_bytes, parse_kwargs)
+                                parses[parse_future] = doc_id
+                                pending.add(parse_future)
+                            else:
+                                doc_id = parses.pop(future)
+                                slots.release()
+                                try:
+                                    data = future.result()
+                                except Exception as e:
+                                    record(doc_id, error=f"{type(e).__name__}: {e}")
+                                    continue
+                                record(doc_id, data=data)
+                except BaseException:
+                    # 待っているダウンロードを止めてから終了する
+                    stop.set()
+                    download_pool.shutdown(cancel_futures=True)
+                    raise
+        finally:
+            if self.executor is None:
+                executor.shutdown(cancel_futures=True)
+        return pd.DataFrame(results, columns=['doc_id', 'status', 'error'])
+
+    def load(self, doc_ids=None):
+        """
+        保存した結果を読み込みます。
+
+        Args:
+            doc_ids (list, optional): 読み込む書類管理番号。Noneの場合はすべて。
+
+        Returns:
+            pd.DataFrame: (doc_id, end_date) をインデックス、項目（label）を列とする表。
+        """
+        query = "SELECT doc_id, end_date, label, value FROM standard_data"
+        params = ()
+        if doc_ids is not None:
+            doc_ids = list(doc_ids)
+            query += f" WHERE doc_id IN ({', '.join('?' * len(doc_ids))})"
+            params = tuple(doc_ids)
+        data = pd.DataFrame(self.conn.execute(query, params).fetchall(), columns=['doc_id', 'end_date', 'label', 'value'])
+        table = data.pivot(index=['doc_id', 'end_date'], columns='label', values='value')
+        table.columns.name = None
+        return table
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+# XBRLの解析（arelleを使う）は、最初に使われた時点でxbrlモジュールから読み込む
+_XBRL_NAMES = ('cols', 'MyViewFacts', 'viewFacts', 'XBRLParser')
+
+
+def __getattr__(name):
+    if name in _XBRL_NAMES:
+        from . import xbrl
+        return getattr(xbrl, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,5 +1,5 @@
-import requests
 import pandas as pd
+from .transport import get_client
 from urllib.parse import urlencode, quote
 
 def get_financial_data(api_key, company_name=None, sec_code=None, doc_id=None, start_date=None, end_date=None):
@@ -51,7 +51,7 @@ def get_financial_data(api_key, company_name=None, sec_code=None, doc_id=None, s
     headers = {"X-API-Key": api_key}
 
     # APIリクエストの送信
-    response = requests.get(final_url, headers=headers)
+    response = get_client().get(final_url, headers=headers)
 
     # レスポンスの処理
     if response.status_code == 200:
@@ -1,5 +1,5 @@
-import requests
 import pandas as pd
+from .transport import get_client
 
 class FREDData:
     def __init__(self, api_key):
@@ -8,7 +8,7 @@ class FREDData:
 
     def get_data(self, url, params, data_key=None):
         # Send the API request
-        response = requests.get(url, params=params)
+        response = get_client().get(url, params=params)
         
         # Parse the response as JSON
         data = response.json()
@@ -0,0 +1,79 @@
+# APIの呼び出し回数の制限と再試行
+import random
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    トークンバケット方式のレートリミッター（スレッドセーフ）。
+
+    rate回/秒でトークンが補充され、最大capacity個まで貯まります。
+    acquire() はトークンを1つ取り出し、足りない場合は補充されるまで待ちます。
+    """
+
+    def __init__(self, rate: float, capacity: float = 1):
+        """
+        初期化メソッド。
+
+        Args:
+            rate (float): 1秒あたりに補充するトークン数。
+            capacity (float, optional): 貯められるトークンの上限（連続して呼び出せる回数）。
+        """
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate は正の値、capacity は1以上で指定してください。")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, calls: float, burst: float = 1) -> 'TokenBucket':
+        """1分あたりcalls回に制限するTokenBucketを作成します。"""
+        return cls(calls / 60.0, burst)
+
+    def acquire(self, tokens: float = 1) -> float:
+        """
+        トークンを取り出します。足りない場合は補充されるまで待ちます。
+
+        Returns:
+            float: 待った時間（秒）。
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+def call_with_retry(func, retries: int = 3, backoff: float = 1.0, max_backoff: float = 60.0,
+                    exceptions=(Exception,)):
+    """
+    funcを呼び出し、exceptionsが送出された場合は指数的に間隔を空けて再試行します。
+
+    Args:
+        func (callable): 引数なしの関数。
+        retries (int, optional): 再試行の回数。
+        backoff (float, optional): 最初の待ち時間（秒）。再試行ごとに2倍になる（0〜50%のゆらぎを加える）。
+        max_backoff (float, optional): 待ち時間の上限（秒）。
+        exceptions (tuple, optional): 再試行する例外。
+
+    Returns:
+        funcの戻り値。最後の再試行でも失敗した場合はその例外を送出する。
+    """
+    for attempt in range(retries + 1):
+        try:
+            return func()
+        except exceptions:
+            if attempt == retries:
+                raise
+            wait = min(max_backoff, backoff * 2 ** attempt)
+            time.sleep(wait * (1 + random.random() * 0.5))
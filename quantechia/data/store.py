@@ -0,0 +1,225 @@
+# 価格データのローカル保存（取得済みの期間はネットワークにアクセスせずに返す）
+import json
+import os
+import urllib.parse
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_STORE_PATH = os.path.join('~', '.cache', 'quantechia', 'market_data')
+
+
+class MarketDataStore:
+    """
+    価格データを データソース/ティッカー ごとに列指向で保存するストア。
+
+    各ティッカーのディレクトリに、日付（index.npy）と数値の列（values.npy、行 × 列のfloat64）を
+    npy形式で保存します。読み込みはメモリマップ（mmap_mode='r'）を通して行うため、
+    必要な期間だけがディスクから読まれます。数値以外の列は extra.pkl に保存します。
+    meta.json には列名と、取得済みの期間（coverage）を記録します。
+
+    get() は取得済みの期間をそのまま返し、足りない期間（先頭・末尾）だけを取得して追記します。
+    offline=True の場合はネットワークにアクセスしません。
+    """
+
+    def __init__(self, root: str = DEFAULT_STORE_PATH):
+        """
+        初期化メソッド。
+
+        Args:
+            root (str, optional): 保存先のディレクトリ。
+        """
+        self.root = os.path.expanduser(root)
+
+    def path(self, source: str, ticker: str) -> str:
+        """ティッカーのディレクトリ（ファイル名に使えない文字はエスケープする）"""
+        return os.path.join(self.root, urllib.parse.quote(source, safe=''), urllib.parse.quote(str(ticker), safe=''))
+
+    def _read_meta(self, source: str, ticker: str):
+        try:
+            with open(os.path.join(self.path(source, ticker), 'meta.json')) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def coverage(self, source: str, ticker: str):
+        """
+        取得済みの期間を返します。保存されていない場合はNone。
+
+        Returns:
+            tuple: (開始日, 終了日)。開始日がNoneの場合は、データソースの既定の期間を取得したがデータが空だった。
+        """
+        meta = self._read_meta(source, ticker)
+        if meta is None:
+            return None
+        start = pd.Timestamp(meta['start']) if meta['start'] is not None else None
+        return start, pd.Timestamp(meta['end'])
+
+    def tickers(self, source: str) -> list:
+        """保存されているティッカーの一覧"""
+        directory = os.path.join(self.root, urllib.parse.quote(source, safe=''))
+        if not os.path.isdir(directory):
+            return []
+        return sorted(urllib.parse.unquote(name) for name in os.listdir(directory)
+                      if os.path.exists(os.path.join(directory, name, 'meta.json')))
+
+    def read(self, source: str, ticker: str, start=None, end=None, mmap: bool = False) -> pd.DataFrame:
+        """
+        保存されたデータを読み込みます。保存されていない場合はNone。
+
+        Args:
+            source (str): データソース。
+            ticker (str): ティッカー。
+            start (optional): 開始日（この日を含む）。
+            end (optional): 終了日（この日を含む）。
+            mmap (bool, optional): Trueの場合は数値の列をメモリマップのまま返す（コピーしないが読み取り専用）。
+                Falseの場合は必要な期間だけを読み込んだ書き込み可能なコピーを返す。
+
+        Returns:
+            pd.DataFrame: 日付をインデックスとするデータ。
+        """
+        meta = self._read_meta(source, ticker)
+        if meta is None:
+            return None
+        directory = self.path(source, ticker)
+        index = np.load(os.path.join(directory, 'index.npy'), mmap_mode='r')
+        first = 0 if start is None else np.searchsorted(index, np.datetime64(pd.Timestamp(start), 'ns'), side='left')
+        last = len(index) if end is None else np.searchsorted(index, np.datetime64(pd.Timestamp(end), 'ns'),
+                                                              side='right')
+        values = np.load(os.path.join(directory, 'values.npy'), mmap_mode='r')[first:last]
+        if not mmap:
+            values = np.array(values)
+        data = pd.DataFrame(values, index=pd.DatetimeIndex(np.asarray(index[first:last]), name=meta['index_name']),
+                            columns=meta['numeric'], copy=False)
+        if meta['extra']:
+            extra = pd.read_pickle(os.path.join(directory, 'extra.pkl')).iloc[first:last]
+            extra.index = data.index
+            data = pd.concat([data, extra], axis=1)[meta['columns']]
+        return data
+
+    def write(self, source: str, ticker: str, data: pd.DataFrame, coverage: tuple = None):
+        """
+        データを保存します（既存のデータは置き換える）。
+
+        Args:
+            source (str): データソース。
+            ticker (str): ティッカー。
+            data (pd.DataFrame): 日付をインデックスとするデータ。
+            coverage (tuple, optional): 取得済みの期間 (開始日, 終了日)。Noneの場合はデータの最初と最後の日付。
+        """
+        data = data.copy()
+        index = pd.DatetimeIndex(pd.to_datetime(data.index))
+        data.index = (index.tz_localize(None) if index.tz is not None else index).as_unit('ns')
+        data = data[~data.index.duplicated(keep='last')].sort_index()
+        data.columns = [str(column) for column in data.columns]
+        numeric = [column for column in data.columns if pd.api.types.is_numeric_dtype(data[column])]
+        extra = [column for column in data.columns if column not in numeric]
+        if coverage is None:
+            coverage = (data.index[0], data.index[-1]) if len(data) else (None, None)
+        start, end = coverage
+
+        directory = self.path(source, ticker)
+        os.makedirs(directory, exist_ok=True)
+        # 一時ファイルに書いてから置き換える（meta.jsonは最後に更新する）
+        files = {'index.npy': lambda f: np.save(f, data.index.to_numpy('datetime64[ns]')),
+                 'values.npy': lambda f: np.save(f, data[numeric].to_numpy(dtype=np.float64))}
+        if extra:
+            files['extra.pkl'] = lambda f: data[extra].to_pickle(f)
+        for name, save in files.items():
+            tmp = os.path.join(directory, f'.{name}.tmp')
+            with open(tmp, 'wb') as f:
+                save(f)
+            os.replace(tmp, os.path.join(directory, name))
+
+        meta = {'columns': list(data.columns), 'numeric': numeric, 'extra': extra, 'index_name': data.index.name,
+                'start': None if start is None else pd.Timestamp(start).isoformat(),
+                'end': None if end is None else pd.Timestamp(end).isoformat()}
+        tmp = os.path.join(directory, '.meta.json.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(directory, 'meta.json'))
+
+    def append(self, source: str, ticker: str, data: pd.DataFrame, coverage: tuple = None):
+        """
+        データを既存のデータに追加します。同じ日付の行は新しいデータで置き換えます。
+
+        Args:
+            source (str): データソース。
+            ticker (str): ティッカー。
+            data (pd.DataFrame): 追加するデータ。
+            coverage (tuple, optional): 追加後の取得済みの期間。Noneの場合は既存の期間とdataの期間を合わせたもの。
+        """
+        current = self.read(source, ticker)
+        if current is None:
+            self.write(source, ticker, data, coverage)
+            return
+        data = data.copy()
+        index = pd.DatetimeIndex(pd.to_datetime(data.index))
+        data.index = index.tz_localize(None) if index.tz is not None else index
+        data.columns = [str(column) for column in data.columns]
+        merged = pd.concat([current, data])
+        if coverage is None:
+            old_start, old_end = self.coverage(source, ticker)
+            if len(data):
+                old_start = None if old_start is None else min(old_start, data.index[0])
+                old_end = max(old_end, data.index[-1])
+            coverage = (old_start, old_end)
+        self.write(source, ticker, merged, coverage)
+
+    def get(self, source: str, ticker: str, fetch, start=None, end=None, offline: bool = False) -> pd.DataFrame:
+        """
+        start〜endのデータを返します。取得済みでない期間だけfetchで取得して保存します。
+
+        当日のデータは取引中に変わる可能性があるため、取得済みの期間には前日までを記録します。
+
+        Args:
+            source (str): データソース。
+            ticker (str): ティッカー。
+            fetch (callable): `fetch(start, end)` でstart〜end（両端を含む、NoneはAPIの既定値）の
+                DataFrameを返す関数。
+            start (optional): 開始日。Noneの場合は保存されている最初の日付から（未保存の場合はAPIの既定値）。
+            end (optional): 終了日。Noneの場合は当日まで。
+            offline (bool, optional): Trueの場合は取得せず、保存されている範囲のみを返す。
+
+        Returns:
+            pd.DataFrame: 日付をインデックスとするデータ（書き込み可能なコピー）。
+        """
+        start = None if start is None else pd.Timestamp(start)
+        end = None if end is None else pd.Timestamp(end)
+        today = pd.Timestamp.today().normalize()
+        target_end = today if end is None else min(end, today)
+        covered = self.coverage(source, ticker)
+
+        if offline:
+            if covered is None:
+                raise ValueError(f"{source}/{ticker} は保存されていないため、オフラインでは取得できません。")
+            return self.read(source, ticker, start, end)
+
+        if covered is None:
+            data = fetch(start, end)
+            first = start
+            if first is None and len(data):
+                # APIの既定の期間を取得した場合は実際の最初の日付を記録し、より前の期間を指定されたら取得する
+                first = pd.Timestamp(pd.to_datetime(data.index).min())
+                first = first.tz_localize(None) if first.tzinfo is not None else first
+            self.write(source, ticker, data, (first, min(target_end, today - pd.Timedelta(days=1))))
+            return self.read(source, ticker, start, end)
+
+        covered_start, covered_end = covered
+        if start is not None and covered_start is not None and start < covered_start:
+            head = fetch(start, covered_start - pd.Timedelta(days=1))
+            self.append(source, ticker, head, (start, covered_end))
+            covered_start = start
+        if target_end > covered_end:
+            tail = fetch(covered_end + pd.Timedelta(days=1), end)
+            self.append(source, ticker, tail, (covered_start, min(target_end, today - pd.Timedelta(days=1))))
+        return self.read(source, ticker, start, end)
+
+    def delete(self, source: str, ticker: str):
+        """保存されたデータを削除します。"""
+        directory = self.path(source, ticker)
+        if not os.path.isdir(directory):
+            return
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
@@ -1,7 +1,7 @@
 # Tiingo データ取得
-import requests
 import pandas as pd
 from io import StringIO
+from .transport import get_client
 
 class TiingoAPI:
     def __init__(self, api_key):
@@ -16,13 +16,12 @@ class TiingoAPI:
             url += "&" + "&".join(f"{k}={v}" for k, v in params.items())
 
         if csv:
-            with requests.Session() as s:
-                download = s.get(url, headers=headers)
-                decoded_content = download.content.decode('utf-8')
-                df = pd.read_csv(StringIO(decoded_content))
+            download = get_client().get(url, headers=headers)
+            decoded_content = download.content.decode('utf-8')
+            df = pd.read_csv(StringIO(decoded_content))
             return df
 
-        response = requests.get(url, headers=headers)
+        response = get_client().get(url, headers=headers)
         data = response.json()
 
         if is_df:
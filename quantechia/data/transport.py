@@ -0,0 +1,105 @@
+# データソース共通のHTTP通信（接続の再利用・タイムアウト・再試行・圧縮転送）
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# 再試行するステータスコード（呼び出し回数の超過とサーバー側のエラー）
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+class HttpClient:
+    """
+    データソース共通のHTTPクライアント。
+
+    requests.Sessionを1つ保持し、ホストごとに接続を使い回します（keep-alive）。
+    429と5xxは指数的に間隔を空けて再試行し（Retry-Afterがあればそれに従う）、
+    gzip/deflateで圧縮された転送を受け付けます。
+
+    transportにrequestsのアダプター（requests.adapters.BaseAdapterのサブクラス）を渡すと、
+    すべての通信をそのアダプターで行います（テストで手元のスタブに差し替える場合など）。
+    """
+
+    def __init__(self, timeout=(5, 60), retries: int = 3, backoff: float = 0.5, pool_connections: int = 16,
+                 pool_maxsize: int = 16, headers: dict = None, transport=None):
+        """
+        初期化メソッド。
+
+        Args:
+            timeout (float or tuple, optional): 既定のタイムアウト（秒）。(接続, 読み込み) のタプルでも指定できる。
+            retries (int, optional): 429・5xx・接続エラーの再試行の回数。
+            backoff (float, optional): 再試行の待ち時間の係数（backoff × 2^(n-1) 秒）。
+            pool_connections (int, optional): 接続を保持するホストの数。
+            pool_maxsize (int, optional): 1つのホストに保持する接続の数（並列に取得する場合はワーカー数以上にする）。
+            headers (dict, optional): すべてのリクエストに付けるヘッダー。
+            transport (requests.adapters.BaseAdapter, optional): 通信に使うアダプター。
+                Noneの場合は再試行付きのHTTPAdapter。
+        """
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers['Accept-Encoding'] = 'gzip, deflate'
+        if headers:
+            self.session.headers.update(headers)
+        if transport is None:
+            retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=RETRY_STATUS,
+                          allowed_methods=frozenset({'GET', 'HEAD'}), respect_retry_after_header=True,
+                          raise_on_status=False)
+            transport = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.transport = transport
+        self.session.mount('http://', transport)
+        self.session.mount('https://', transport)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        リクエストを送信します。timeoutを指定しない場合は既定のタイムアウトを使います。
+
+        Args:
+            method (str): HTTPメソッド。
+            url (str): URL。
+            **kwargs: requests.Session.requestに渡す引数（params、headers、streamなど）。
+
+        Returns:
+            requests.Response: レスポンス。再試行しても429・5xxの場合はそのステータスのレスポンス。
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """GETリクエストを送信します。"""
+        return self.request('GET', url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> HttpClient:
+    """
+    プロセスで共有するHttpClientを返します（最初の呼び出しで作成）。
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient()
+    return _client
+
+
+def set_client(client: HttpClient) -> HttpClient:
+    """
+    共有するHttpClientを差し替えます（タイムアウトや再試行の設定を変える場合、テストでスタブを使う場合など）。
+
+    Args:
+        client (HttpClient): 新しいクライアント。Noneの場合は次のget_client()で既定の設定で作り直す。
+
+    Returns:
+        HttpClient: 差し替える前のクライアント。
+    """
+    global _client
+    with _client_lock:
+        previous, _client = _client, client
+    return previous
@@ -0,0 +1,308 @@
+"""
+EDINETのXBRLファイルをarelleで解析するモジュール。
+
+arelleはimportに時間がかかるため、edinetモジュールからは
+XBRLParserなどが最初に使われた時点で読み込まれます。
+"""
+import os
+import tempfile
+import pandas as pd
+from arelle import Cntlr, ViewFileFactTable, ModelDtsObject, XbrlConst,ViewFileFactList
+from arelle.XbrlConst import conceptNameLabelRole, standardLabel, terseLabel, documentationLabel
+
+cols = ['Concept', 'Facts', 'Label', 'Name', 'LocalName', 'Namespace', 'ParentName', 'ParentLocalName', 'ParentNamespace', 'ID', 'Type', 'PeriodType', 'Balance', 'StandardLabel', 'TerseLabel', 'Documentation', 'LinkRole', 'LinkDefinition', 'PreferredLabelRole', 'Depth', 'ArcRole']
+
+class MyViewFacts(ViewFileFactTable.ViewFacts):
+    def __init__(self, modelXbrl, outfile, arcrole, linkrole, linkqname, arcqname, ignoreDims, showDimDefaults, labelrole, lang, cols,col_num=1,label_cell=None):
+        super().__init__(modelXbrl, outfile, arcrole, linkrole, linkqname, arcqname, ignoreDims, showDimDefaults, labelrole, lang, cols)
+        self.data = []
+
+    def viewConcept(self, concept, modelObject, labelPrefix, preferredLabel, n, relationshipSet, visited):
+        # bad relationship could identify non-concept or be None
+        if (not isinstance(concept, ModelDtsObject.ModelConcept) or
+            concept.substitutionGroupQname == XbrlConst.qnXbrldtDimensionItem):
+            return
+        cols = ['' for i in range(self.numCols)]
+        i = 0
+        for col in self.cols:
+            if col == "Facts":
+                self.setRowFacts(cols,concept,preferredLabel)
+                i = self.numCols - (len(self.cols) - i - 1) # skip to next concept property column
+            else:
+                if col in ("Concept", "Label"):
+                    cols[i] = labelPrefix + concept.label(preferredLabel,lang=self.lang,linkroleHint=relationshipSet.linkrole)
+
+
+                i += 1
+
+        attr = {"concept": str(concept.qname)}
+        self.addRow(cols, treeIndent=n,
+                    xmlRowElementName="facts", xmlRowEltAttr=attr, xmlCol0skipElt=True)
+        self.add_content(concept, modelObject)
+        if concept not in visited:
+            visited.add(concept)
+            for i, modelRel in enumerate(relationshipSet.fromModelObject(concept)):
+                nestedRelationshipSet = relationshipSet
+                targetRole = modelRel.targetRole
+                if self.arcrole in XbrlConst.summationItems:
+                    childPrefix = "({:0g}) ".format(modelRel.weight) # format without .0 on integer weights
+                elif targetRole is None or len(targetRole) == 0:
+                    targetRole = relationshipSet.linkrole
+                    childPrefix = ""
+                else:
+                    nestedRelationshipSet = self.modelXbrl.relationshipSet(self.arcrole, targetRole, self.linkqname, self.arcqname)
+                    childPrefix = "(via targetRole) "
+                toConcept = modelRel.toModelObject
+                if toConcept in visited:
+                    childPrefix += "(loop)"
+                labelrole = modelRel.preferredLabel
+                if not labelrole or self.labelrole == conceptNameLabelRole:
+                    labelrole = self.labelrole
+                self.viewConcept(toConcept, modelRel, childPrefix, labelrole, n + 1, nestedRelationshipSet, visited)
+            visited.remove(concept)
+    def add_content(self, concept, modelObject):
+        if concept.isNumeric:
+            label = concept.label(lang='ja')
+            s_label = concept.label(preferredLabel=standardLabel, lang='ja')
+            facts = self.conceptFacts[concept.qname]
+
+            if isinstance(modelObject, ModelDtsObject.ModelRelationship):
+                parent_name = modelObject.fromModelObject.qname
+                parent_label = modelObject.fromModelObject.label(preferredLabel=standardLabel, lang='ja')
+            else:
+                parent_name = None
+                parent_label = None
+            if isinstance(modelObject, str):
+                link_def = self.linkRoleDefintions[modelObject]
+            elif isinstance(modelObject, ModelDtsObject.ModelRelationship):
+                link_def = self.linkRoleDefintions[modelObject.linkrole]
+            for f in facts:
+                if f.unit is not None:
+                    unit = f.unit.value
+                else:
+                    unit = None
+                value = f.xValue
+                context = f.context
+                self.data.append([concept.qname,concept.typeQname,concept.name, label, s_label, parent_name, parent_label,value, context.startDatetime, context.endDatetime, unit, link_def,context.id])
+
+
+
+def _scratch_file(directory=None, suffix='.csv'):
+    """arelleの出力先に使う一意な一時ファイルのパス（カレントディレクトリは使わない）"""
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=directory)
+    os.close(fd)
+    return path
+
+
+def viewFacts(modelXbrl, outfile, arcrole=None, linkrole=None, linkqname=None, arcqname=None, ignoreDims=False, showDimDefaults=False, labelrole=None, lang=None, cols=None,col_num=1, label_cell=None, scratch_dir=None):
+    # outfileがNoneの場合、arelleが作る出力ファイルはscratch_dir（Noneの場合はシステムの一時ディレクトリ）に置いて削除する
+    remove_file = outfile is None
+    if outfile is None:
+        outfile = _scratch_file(scratch_dir)
+    if not arcrole: arcrole=XbrlConst.parentChild
+    view = MyViewFacts(modelXbrl, outfile, arcrole, linkrole, linkqname, arcqname, ignoreDims, showDimDefaults, labelrole, lang, cols,col_num, label_cell)
+
+    try:
+        view.view(modelXbrl.modelDocument)
+        df = pd.DataFrame(view.data, columns=['Name','Type','LocalName','Label','StandardLabel','ParentName','ParentLabel', 'Value','StartDate','EndDate','Unit','LinkDefinition','ContextID'])
+        view.close()
+    finally:
+        if remove_file and os.path.exists(outfile):
+            os.remove(outfile)
+    return pd.DataFrame(df)
+
+
+
+class XBRLParser:
+    def __init__(self, xbrl_file):
+        """Initialize DataParser with the directory of extracted files"""
+        self.xbrl_file_path = xbrl_file
+        self.modelXbrl = None
+        # 一時的な出力ファイルはXBRLファイルと同じディレクトリに一意な名前で作る
+        self.scratch_dir = os.path.dirname(os.path.abspath(xbrl_file))
+ 
+    def read_xbrl_file(self):
+        """Parse an XBRL file and return the extracted facts in a DataFrame"""
+        ctrl = Cntlr.Cntlr(logFileName='logToPrint')
+        self.modelXbrl = ctrl.modelManager.load(self.xbrl_file_path)
+
+    def close(self):
+        """Close the loaded XBRL model (releases the files it references)"""
+        if self.modelXbrl is not None:
+            self.modelXbrl.close()
+            self.modelXbrl = None
+
+    def get_fact_list(self, file_path=None,cols=None, **args):
+        if self.modelXbrl is None:
+            self.read_xbrl_file()
+        if cols is None:
+            cols = ['Concept', 'Label', 'Name', 'LocalName', 'Namespace', 'contextRef', 'unitRef', 'Dec', 'Value',  'Period',  'ID', 'Type', 'PeriodType']
+        remove_file = file_path is None
+        if file_path is None:
+            file_path = _scratch_file(self.scratch_dir)
+        try:
+            ViewFileFactList.viewFacts(self.modelXbrl, file_path, cols=cols, **args)
+            df = pd.read_csv(file_path)
+        finally:
+            if remove_file and os.path.exists(file_path):
+                os.remove(file_path)
+        return df
+    
+    def get_fact_table(self, file_path=None, cols=None, **args):
+        if self.modelXbrl is None:
+            self.read_xbrl_file()
+        if cols is None:
+            cols = ['Concept', 'Facts', 'Label', 'Name', 'LocalName', 'Namespace', 'ParentName', 'ParentLocalName', 'ParentNamespace', 'ID', 'Type', 'PeriodType', 'Balance', 'StandardLabel', 'TerseLabel', 'Documentation', 'LinkRole', 'LinkDefinition', 'PreferredLabelRole', 'Depth', 'ArcRole']
+        remove_file = file_path is None
+        if file_path is None:
+            file_path = _scratch_file(self.scratch_dir)
+        try:
+            ViewFileFactTable.viewFacts(self.modelXbrl, file_path, cols=cols, arcrole=XbrlConst.summationItem, **args)
+            df = pd.read_csv(file_path)
+        finally:
+            if remove_file and os.path.exists(file_path):
+                os.remove(file_path)
+        return df
+
+    
+    # 年ごとの補完処理
+    def fill_missing_values(self, group):
+        # 欠損値が最も少ない行を基本行として選択
+        base_row = group.loc[group.isna().sum(axis=1).idxmin()].copy()
+
+        # 基本行の欠損値を、他の行のデータで補完
+        for _, row in group.iterrows():
+            base_row.fillna(row, inplace=True)
+
+        return base_row
+
+    def parse_duplicated_label(self, df):
+        # Nameをキーとする辞書（検索高速化）
+        name_to_parent = df.set_index('Name')['ParentName'].to_dict()
+        name_to_parent_label = df.set_index('Name')['ParentLabel'].to_dict()
+        name_to_label = df.set_index('Name')['StandardLabel'].to_dict()
+
+        # 異なる Name で同じ StandardLabel を持つケースを検出
+        duplicate_labels = df.groupby('StandardLabel')['Name'].nunique()
+        duplicate_labels = duplicate_labels[duplicate_labels > 1].index.tolist()
+
+        # StandardLabel の重複がなくなるまで処理
+
+        for label in duplicate_labels:
+            # 重複している StandardLabel を持つ行を取得
+            duplicate_rows = df[df['StandardLabel'] == label]
+
+            for idx, row in duplicate_rows.iterrows():
+                name = row['Name']
+                parent_name = row['ParentName']
+                new_label = row['StandardLabel']
+
+                # 親をたどって識別できるようにする
+                while name in name_to_label:
+                    parent_label = name_to_parent_label.get(name, "")
+                    if parent_label:
+                        new_label = parent_label + " / " + new_label  # 親のラベルを前に追加
+                    else:
+                        break  # これ以上さかのぼれない
+                    
+                    # 異なる Name での重複が解消されたら終了
+                    if df[(df['StandardLabel'] == new_label) & (df['Name'] != name)].empty:
+                        break
+                    
+                    name = name_to_parent.get(name)  # さらに上の親をたどる
+
+                # それでも重複が解消されなかった場合 `_1`, `_2` をつける
+                suffix = 1
+                original_label = new_label
+                while not df[(df['StandardLabel'] == new_label) & (df['Name'] != row['Name'])].empty:
+                    new_label = f"{original_label}_{suffix}"
+                    suffix += 1
+                
+                # ラベルを更新
+                df.at[idx, 'StandardLabel'] = new_label
+                name_to_label[row['Name']] = new_label  # 辞書も更新
+        return df
+        
+
+
+    def parse_xbrl_data(self, pivot=True, groupby_year=True, main_label='StandardLabel'):
+        if self.modelXbrl is None:
+            self.read_xbrl_file()
+        
+        cols = ['Concept', 'Facts', 'Label', 'Name', 'LocalName', 'Namespace', 'ParentName', 'ParentLocalName', 'ParentNamespace', 'ID', 'Type', 'PeriodType', 'Balance', 'StandardLabel', 'TerseLabel', 'Documentation', 'LinkRole', 'LinkDefinition', 'PreferredLabelRole', 'Depth', 'ArcRole']
+        
+        df = viewFacts(self.modelXbrl,None, cols=cols, lang='ja', scratch_dir=self.scratch_dir)
+        
+        if len(df) > 0:
+            df = df[df['Value'].isnull()==False]
+            df = df.drop_duplicates(['Name','ContextID','Value'])
+            # df = df[['Name','ParentName','StandardLabel','Value','StartDate','EndDate','Unit','ContextID','ParentLabel']]
+            if not pivot:
+                return df
+            else:
+                
+                if main_label=='StandardLabel':
+                    df = self.parse_duplicated_label(df)
+                main_df_ = df.copy()
+                
+                main_df_ = main_df_.drop_duplicates(subset=[main_label,'EndDate'],keep='first')
+                main_pivot = pd.pivot(main_df_,index=['EndDate'],columns=main_label,values='Value').reset_index()
+                if groupby_year:
+                    # 年ごとに処理を適用
+                    filled_df = main_pivot.groupby(pd.to_datetime(main_pivot['EndDate']).dt.year).apply(self.fill_missing_values)
+
+                    return filled_df
+                else:
+                    return main_pivot
+
+    def get_standard_data(self, pivot=True, groupby_year=True, main_label='StandardLabel'):
+        df = self.parse_xbrl_data(pivot=False)
+        name_pfs = ['売上高',
+            '売上総利益又は売上総損失（△）',
+            '営業利益又は営業損失（△）',
+            '経常利益又は経常損失（△）',
+            '当期純利益又は当期純損失（△）',
+            '親会社株主に帰属する当期純利益又は親会社株主に帰属する当期純損失（△）',
+            # '金融費用',
+            '営業活動によるキャッシュ・フロー',
+            '投資活動によるキャッシュ・フロー',
+            '財務活動によるキャッシュ・フロー',
+            '資産',
+            '負債',
+            '流動資産',
+            '流動負債',
+            '純資産',
+            '株主資本',
+            '利益剰余金',
+            '短期借入金',
+            '長期借入金',
+            '法人税等',
+            '販売費及び一般管理費',
+            '減価償却費',
+            '受取利息及び受取配当金',
+            '支払利息']
+        name_crp = ['株価収益率',
+        '発行済株式総数',
+                            ]
+        name_div = ['１株当たり配当額']
+        id_pfs = list(df[(df['StandardLabel'].isin(name_pfs))&(df['Name'].astype(str).str.contains('jppfs_cor:'))].drop_duplicates(subset='Name')['Name'])
+        id_cor = list(df[(df['StandardLabel'].isin(name_crp))&(df['Name'].astype(str).str.contains('jpcrp_cor:'))].drop_duplicates(subset='Name')['Name'])
+        id_div = list(df[(df['StandardLabel'].isin(name_div))&(df['Name'].astype(str).str.contains('jpcrp_cor:'))].drop_duplicates(subset='Name')['Name'])
+        name_id_list = id_pfs+id_cor+id_div
+
+        
+        df = df[df['Name'].isin(name_id_list)]
+        
+        main_df_ = df.copy()
+        
+        main_df_ = main_df_.drop_duplicates(subset=[main_label,'EndDate'],keep='first')
+        main_pivot = pd.pivot(main_df_,index=['EndDate'],columns=main_label,values='Value').reset_index()
+        if groupby_year:
+            # 年ごとに処理を適用
+            filled_df = main_pivot.groupby(pd.to_datetime(main_pivot['EndDate']).dt.year).apply(self.fill_missing_values)
+
+            return filled_df
+        else:
+            return main_pivot
+
+        
@@ -0,0 +1,199 @@
+import numpy as np
+import pandas as pd
+from .utils import calculate_turnover
+
+
+# summaryが返す指標（列の順序）
+METRICS = ('sharpe_ratio', 'sortino_ratio', 'max_drawdown', 'calmar_ratio',
+           'winning_rate', 'volatility', 'turnover')
+
+
+def _to_matrix(returns):
+    """
+    リターンを(T, K)のfloat64配列に変換する。infはNaNとして扱う。
+
+    Returns:
+        tuple: (配列, 列, Seriesが渡されたかどうか)
+    """
+    if isinstance(returns, pd.Series):
+        values, columns, squeeze = returns.to_numpy(dtype=float)[:, None], pd.Index([returns.name]), True
+    else:
+        values, columns, squeeze = returns.to_numpy(dtype=float), returns.columns, False
+    values = np.where(np.isinf(values), np.nan, values)
+    return values, columns, squeeze
+
+
+def _wrap(values, columns, squeeze):
+    """Seriesが渡された場合はfloat、DataFrameの場合は列ごとのSeriesで返す"""
+    return float(values[0]) if squeeze else pd.Series(values, index=columns)
+
+
+def _excess(values, rf, periods):
+    """年率のリスクフリーレートを1期間あたりに換算して引く"""
+    if rf:
+        values = values - (np.power(1 + rf, 1.0 / periods) - 1.0)
+    return values
+
+
+def _mean_std(values):
+    """列ごとの(個数, 平均, 標本標準偏差)。NaNは除く"""
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(valid, values, 0.0).sum(axis=0) / count
+        sq_dev = np.where(valid, values - mean, 0.0) ** 2
+        std = np.sqrt(sq_dev.sum(axis=0) / (count - 1))
+    return count, mean, std
+
+
+def _sharpe(values, rf, periods):
+    _, mean, std = _mean_std(_excess(values, rf, periods))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return mean / std * np.sqrt(periods)
+
+
+def _sortino(values, rf, periods):
+    values = _excess(values, rf, periods)
+    count, mean, _ = _mean_std(values)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        downside = np.sqrt((np.where(values < 0, values, 0.0) ** 2).sum(axis=0) / count)
+        return mean / np.where(downside == 0, np.nan, downside) * np.sqrt(periods)
+
+
+def _max_drawdown(values):
+    if len(values) == 0:
+        return np.zeros(values.shape[1])
+    # 欠損日は横ばいとして資産推移を作り、開始時点の1.0を最初の高値とする
+    wealth = np.cumprod(1 + np.nan_to_num(values), axis=0)
+    peak = np.maximum(np.maximum.accumulate(wealth, axis=0), 1.0)
+    return np.minimum((wealth / peak).min(axis=0), 1.0) - 1
+
+
+def _cagr(values, periods):
+    count = (~np.isnan(values)).sum(axis=0)
+    wealth = np.nanprod(1 + values, axis=0)
+    with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+        return np.where(wealth < 0, np.nan, np.abs(wealth) ** (periods / count) - 1)
+
+
+def _win_rate(values):
+    valid = ~np.isnan(values)
+    wins = (values > 0).sum(axis=0)
+    trades = (valid & (values != 0)).sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(trades == 0, 0.0, wins / trades)
+
+
+def sharpe(returns, rf: float = 0.0, periods: int = 252):
+    """
+    年率のシャープレシオ（quantstats.stats.sharpeと同じ定義）。
+
+    Args:
+        returns (pd.Series or pd.DataFrame): リターン。DataFrameの場合は列ごとに計算する。
+        rf (float, optional): 年率のリスクフリーレート。
+        periods (int, optional): 1年あたりの期間数。
+
+    Returns:
+        float or pd.Series: シャープレシオ。
+    """
+    values, columns, squeeze = _to_matrix(returns)
+    return _wrap(_sharpe(values, rf, periods), columns, squeeze)
+
+
+def sortino(returns, rf: float = 0.0, periods: int = 252):
+    """
+    年率のソルティノレシオ（quantstats.stats.sortinoと同じ定義）。
+    下方偏差が0の場合はNaN。引数はsharpeと同じ。
+    """
+    values, columns, squeeze = _to_matrix(returns)
+    return _wrap(_sortino(values, rf, periods), columns, squeeze)
+
+
+def max_drawdown(returns):
+    """
+    最大ドローダウン（quantstats.stats.max_drawdownにリターンを渡した場合と同じ定義）。
+
+    Args:
+        returns (pd.Series or pd.DataFrame): リターン。
+
+    Returns:
+        float or pd.Series: 最大ドローダウン（0以下）。
+    """
+    values, columns, squeeze = _to_matrix(returns)
+    return _wrap(_max_drawdown(values), columns, squeeze)
+
+
+def cagr(returns, periods: int = 252):
+    """
+    年率の複利リターン（quantstats.stats.cagrと同じ定義）。年数は有効な期間数 / periods。
+    """
+    values, columns, squeeze = _to_matrix(returns)
+    return _wrap(_cagr(values, periods), columns, squeeze)
+
+
+def calmar(returns, periods: int = 252):
+    """
+    カルマーレシオ（CAGR / |最大ドローダウン|、quantstats.stats.calmarと同じ定義）。
+    """
+    values, columns, squeeze = _to_matrix(returns)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result = _cagr(values, periods) / np.abs(_max_drawdown(values))
+    return _wrap(result, columns, squeeze)
+
+
+def win_rate(returns):
+    """
+    勝率（0以外のリターンのうちプラスの割合、quantstats.stats.win_rateと同じ定義）。
+    0以外のリターンがない場合は0。
+    """
+    values, columns, squeeze = _to_matrix(returns)
+    return _wrap(_win_rate(values), columns, squeeze)
+
+
+def volatility(returns, periods: int = 252):
+    """
+    年率のボラティリティ（quantstats.stats.volatilityと同じ定義）。
+    """
+    values, columns, squeeze = _to_matrix(returns)
+    return _wrap(_mean_std(values)[2] * np.sqrt(periods), columns, squeeze)
+
+
+def summary(returns, weights=None, rf: float = 0.0, periods: int = 252, freq: str = 'ME') -> pd.DataFrame:
+    """
+    K個の戦略のリターンから評価指標をまとめて計算します。
+
+    Args:
+        returns (pd.Series or pd.DataFrame): (T, K)のリターン。列が戦略。
+        weights (list, optional): 戦略ごとのウェイト（DataFrameまたはSparseWeight、列と同じ順序）。
+            指定した場合は回転率も計算する。
+        rf (float, optional): 年率のリスクフリーレート（シャープレシオとソルティノレシオのみ）。
+        periods (int, optional): 1年あたりの期間数。
+        freq (str, optional): 回転率の集計頻度。
+
+    Returns:
+        pd.DataFrame: (K × 指標)の評価結果。列はMETRICSの順。
+    """
+    if isinstance(returns, pd.Series):
+        returns = returns.to_frame()
+    values, columns, _ = _to_matrix(returns)
+
+    excess = _excess(values, rf, periods)
+    _, mean, std = _mean_std(values)
+    _, excess_mean, excess_std = _mean_std(excess) if rf else (None, mean, std)
+    mdd = _max_drawdown(values)
+    growth = _cagr(values, periods)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result = {
+            'sharpe_ratio': excess_mean / excess_std * np.sqrt(periods),
+            'sortino_ratio': _sortino(excess, 0.0, periods),
+            'max_drawdown': mdd,
+            'calmar_ratio': growth / np.abs(mdd),
+            'winning_rate': _win_rate(values),
+            'volatility': std * np.sqrt(periods),
+        }
+    if weights is not None:
+        if len(weights) != len(columns):
+            raise ValueError("weightsの数がリターンの列数と一致しません。")
+        result['turnover'] = [np.nan if w is None else calculate_turnover(w, freq=freq) for w in weights]
+
+    return pd.DataFrame(result, index=columns)
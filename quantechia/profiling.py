@@ -0,0 +1,119 @@
+import contextlib
+import time
+
+import pandas as pd
+
+
+class Profiler:
+    """
+    バックテストの処理段階（ステージ）ごとの実行時間と呼び出し回数を記録するクラス。
+
+    戦略に `profiler=Profiler()`（または `profiler=True`）を渡すと、データの準備、
+    calculate_weight、calculate_returns、評価指標、レポート作成などの時間と、
+    日付ごとの最適化（calculate_current_weight、cal_risk_parity、_optimize_weights）の時間が記録されます。
+    1つのProfilerを複数の戦略で共有することもできます。
+    """
+
+    def __init__(self, callback=None):
+        """
+        初期化メソッド。
+
+        Args:
+            callback (callable, optional): 記録のたびに `callback(stage, seconds, date)` として呼ばれる関数。
+                dateは日付ごとの記録以外ではNone。
+        """
+        self.callback = callback
+        self.stages = {}   # ステージ名 -> [呼び出し回数, 合計時間, 最大時間]
+        self.records = []  # 日付ごとの記録 (ステージ名, 日付, 時間)
+
+    def stage(self, name: str, date=None) -> '_Stage':
+        """
+        with文で囲んだ処理の時間をnameのステージとして記録します。
+
+        Args:
+            name (str): ステージ名。
+            date (optional): 日付ごとの処理の場合はその日付。
+        """
+        return _Stage(self, name, date)
+
+    def record(self, name: str, seconds: float, date=None):
+        """
+        計測済みの時間を記録します。
+
+        Args:
+            name (str): ステージ名。
+            seconds (float): 時間（秒）。
+            date (optional): 日付ごとの処理の場合はその日付。
+        """
+        stats = self.stages.get(name)
+        if stats is None:
+            self.stages[name] = [1, seconds, seconds]
+        else:
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+        if date is not None:
+            self.records.append((name, date, seconds))
+        if self.callback is not None:
+            self.callback(name, seconds, date)
+
+    def to_frame(self, by_date: bool = False) -> pd.DataFrame:
+        """
+        記録をDataFrameで返します。
+
+        Args:
+            by_date (bool, optional): Falseの場合はステージごとの集計
+                （calls、total、mean、max、単位は秒）、Trueの場合は日付ごとの記録（stage、date、seconds）。
+
+        Returns:
+            pd.DataFrame: 計測結果。
+        """
+        if by_date:
+            return pd.DataFrame(self.records, columns=['stage', 'date', 'seconds'])
+        frame = pd.DataFrame([(name, calls, total, total / calls, longest)
+                              for name, (calls, total, longest) in self.stages.items()],
+                             columns=['stage', 'calls', 'total', 'mean', 'max'])
+        return frame.set_index('stage')
+
+    def reset(self):
+        """記録を消去します。"""
+        self.stages = {}
+        self.records = []
+
+
+class _Stage:
+    def __init__(self, profiler: Profiler, name: str, date):
+        self.profiler = profiler
+        self.name = name
+        self.date = date
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, time.perf_counter() - self.start, self.date)
+        return False
+
+
+# 計測しない場合に使う何もしないコンテキスト（使い回せる）
+_DISABLED = contextlib.nullcontext()
+
+
+def stage(profiler, name: str, date=None):
+    """
+    profilerがNoneの場合は何もしないコンテキストを、そうでなければprofiler.stageを返します。
+    計測を無効にした場合のコストは関数呼び出し1回分です。
+    """
+    if profiler is None:
+        return _DISABLED
+    return profiler.stage(name, date)
+
+
+def make_profiler(profiler):
+    """
+    戦略のprofiler引数をProfilerに変換します（Trueの場合は新しいProfiler、None/Falseの場合はNone）。
+    """
+    if profiler is True:
+        return Profiler()
+    return profiler or None
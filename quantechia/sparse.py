@@ -0,0 +1,229 @@
+import numpy as np
+import pandas as pd
+
+
+class SparseWeight:
+    """
+    リバランス日のウェイトを、0でない要素だけ保存する疎な形式（CSR）で保持するクラス。
+
+    i行目（index[i]の日付）のウェイトは indices[indptr[i]:indptr[i + 1]] の列に
+    data[indptr[i]:indptr[i + 1]] の値を持ち、それ以外の列は0です。
+    ウェイトが未計算（すべてNaN）の行は missing がTrueになります。
+    行内の一部だけがNaNの要素は0として扱います。
+
+    calculate_return、calculate_turnover、calculate_daily_weight、RiskContributionに
+    DataFrameの代わりに渡せます。
+    """
+
+    def __init__(self, index, columns, indptr, indices, data, missing=None):
+        """
+        初期化メソッド。
+
+        Args:
+            index (pd.Index): リバランス日。
+            columns (pd.Index): 銘柄。
+            indptr (np.ndarray): 各行の要素の開始位置（長さは行数+1）。
+            indices (np.ndarray): 要素の列位置。
+            data (np.ndarray): 要素の値。
+            missing (np.ndarray, optional): すべてNaNの行を示すbool配列。
+        """
+        self.index = pd.Index(index)
+        self.columns = pd.Index(columns)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.data = np.asarray(data, dtype=float)
+        self.missing = np.zeros(len(self.index), dtype=bool) if missing is None else np.asarray(missing, dtype=bool)
+
+    @classmethod
+    def from_dense(cls, weight_data: pd.DataFrame) -> 'SparseWeight':
+        """
+        DataFrameのウェイトから作成します。
+
+        Args:
+            weight_data (pd.DataFrame): (日付 × 銘柄)のウェイト。
+
+        Returns:
+            SparseWeight: 疎な形式のウェイト。
+        """
+        values = weight_data.to_numpy(dtype=float)
+        missing = np.isnan(values).all(axis=1)
+        rows, cols = np.nonzero(np.nan_to_num(values) != 0)
+        return cls.from_coo(rows, cols, values[rows, cols], weight_data.index, weight_data.columns, missing)
+
+    @classmethod
+    def from_coo(cls, rows, cols, data, index, columns, missing=None) -> 'SparseWeight':
+        """
+        (行位置, 列位置, 値)の配列から作成します。同じ要素の値は合計され、0の要素は保存しません。
+        selection.select_weightsの戻り値をそのまま渡せます。
+
+        Args:
+            rows, cols, data (np.ndarray): 要素の行位置、列位置、値。
+            index (pd.Index): リバランス日。
+            columns (pd.Index): 銘柄。
+            missing (np.ndarray, optional): すべてNaNの行を示すbool配列。
+
+        Returns:
+            SparseWeight: 疎な形式のウェイト。
+        """
+        n_rows, n_cols = len(index), len(columns)
+        keys = np.asarray(rows, dtype=np.int64) * n_cols + np.asarray(cols, dtype=np.int64)
+        keys, inverse = np.unique(keys, return_inverse=True)
+        data = np.bincount(inverse, weights=np.asarray(data, dtype=float), minlength=len(keys))
+        nonzero = data != 0
+        keys, data = keys[nonzero], data[nonzero]
+
+        rows, cols = np.divmod(keys, n_cols) if n_cols else (keys, keys)
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=n_rows))])
+        return cls(index, columns, indptr, cols, data, missing)
+
+    @classmethod
+    def concat(cls, weights: list) -> 'SparseWeight':
+        """
+        行方向に連結します。DataFrameが含まれる場合は疎な形式に変換してから連結します。
+
+        Args:
+            weights (list): SparseWeightまたはDataFrameのリスト（同じ銘柄）。
+
+        Returns:
+            SparseWeight: 連結したウェイト。
+        """
+        weights = [w if isinstance(w, SparseWeight) else cls.from_dense(w) for w in weights]
+        columns = weights[0].columns
+        indptr = [np.zeros(1, dtype=np.int64)]
+        offset = 0
+        for w in weights:
+            if not w.columns.equals(columns):
+                raise ValueError("連結するウェイトの銘柄が一致しません。")
+            indptr.append(w.indptr[1:] + offset)
+            offset += w.nnz
+        return cls(weights[0].index.append([w.index for w in weights[1:]]), columns,
+                   np.concatenate(indptr),
+                   np.concatenate([w.indices for w in weights]),
+                   np.concatenate([w.data for w in weights]),
+                   np.concatenate([w.missing for w in weights]))
+
+    @property
+    def shape(self) -> tuple:
+        return len(self.index), len(self.columns)
+
+    @property
+    def nnz(self) -> int:
+        """保存している要素数"""
+        return len(self.data)
+
+    @property
+    def nbytes(self) -> int:
+        """配列のメモリ使用量（バイト）"""
+        return self.indptr.nbytes + self.indices.nbytes + self.data.nbytes + self.missing.nbytes
+
+    @property
+    def empty(self) -> bool:
+        return len(self.index) == 0
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __repr__(self) -> str:
+        return f"SparseWeight(shape={self.shape}, nnz={self.nnz})"
+
+    @property
+    def iloc(self):
+        """行位置（スライス、整数配列、bool配列）で行を選ぶ（DataFrame.ilocと同じ書き方）"""
+        return _RowIndexer(self)
+
+    def take(self, positions) -> 'SparseWeight':
+        """
+        指定した行位置の行を取り出します。
+
+        Args:
+            positions (np.ndarray): 行位置の配列。
+
+        Returns:
+            SparseWeight: 取り出したウェイト。
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        counts = self.indptr[positions + 1] - self.indptr[positions]
+        starts = np.repeat(self.indptr[positions] - np.concatenate([[0], np.cumsum(counts)[:-1]]), counts)
+        elements = starts + np.arange(counts.sum())
+        return SparseWeight(self.index[positions], self.columns,
+                            np.concatenate([[0], np.cumsum(counts)]),
+                            self.indices[elements], self.data[elements], self.missing[positions])
+
+    def row_positions(self) -> np.ndarray:
+        """各要素の行位置"""
+        return np.repeat(np.arange(len(self.index)), np.diff(self.indptr))
+
+    def row(self, i: int) -> tuple:
+        """
+        i行目の(列位置, 値)を返します。
+        """
+        start, stop = self.indptr[i], self.indptr[i + 1]
+        return self.indices[start:stop], self.data[start:stop]
+
+    def active_columns(self) -> pd.Index:
+        """
+        一度でも0でないウェイトを持つ銘柄（元の列順）を返します。
+        """
+        return self.columns[np.unique(self.indices)]
+
+    def to_array(self, columns=None) -> np.ndarray:
+        """
+        (行数 × 銘柄数)の配列に変換します。すべてNaNの行はNaNになります。
+
+        Args:
+            columns (pd.Index, optional): 出力する銘柄。Noneの場合はすべての銘柄。
+                含まれない銘柄の要素は出力されません。
+
+        Returns:
+            np.ndarray: ウェイトの配列。
+        """
+        if columns is None:
+            columns = self.columns
+            col_pos = self.indices
+        else:
+            col_pos = pd.Index(columns).get_indexer(self.columns)[self.indices]
+        dense = np.zeros((len(self.index), len(columns)))
+        keep = col_pos >= 0
+        dense[self.row_positions()[keep], col_pos[keep]] = self.data[keep]
+        dense[self.missing] = np.nan
+        return dense
+
+    def to_dense(self, columns=None) -> pd.DataFrame:
+        """
+        DataFrameに変換します（引数はto_arrayと同じ）。
+        """
+        columns = self.columns if columns is None else pd.Index(columns)
+        return pd.DataFrame(self.to_array(columns), index=self.index, columns=columns)
+
+    def diff_abs_sum(self) -> np.ndarray:
+        """
+        各行の前の行からのウェイト変化の絶対値の合計を返します。
+        `weight.diff().abs().sum(axis=1)` と同じく、最初の行と、前後どちらかがすべてNaNの行は0です。
+
+        Returns:
+            np.ndarray: 行ごとのウェイト変化。
+        """
+        n_rows, n_cols = self.shape
+        rows = self.row_positions()
+        # 当日の要素から前日の要素を引くため、各要素を翌行に負の値で複製して合計する
+        keys = np.concatenate([rows * n_cols + self.indices, (rows + 1) * n_cols + self.indices])
+        values = np.concatenate([self.data, -self.data])
+        keys, inverse = np.unique(keys, return_inverse=True)
+        change = np.abs(np.bincount(inverse, weights=values, minlength=len(keys)))
+        key_rows = keys // n_cols if n_cols else keys
+        inside = key_rows < n_rows
+        out = np.bincount(key_rows[inside], weights=change[inside], minlength=n_rows)[:n_rows]
+        if n_rows:
+            out[0] = 0.0
+            out[self.missing] = 0.0
+            out[1:][self.missing[:-1]] = 0.0
+        return out
+
+
+class _RowIndexer:
+    def __init__(self, weight: SparseWeight):
+        self.weight = weight
+
+    def __getitem__(self, key) -> SparseWeight:
+        positions = np.arange(len(self.weight.index))[key]
+        return self.weight.take(np.atleast_1d(positions))
@@ -1,7 +1,83 @@
 import pandas as pd
 import numpy as np
-import quantstats as qs
-from ..utils import calculate_portfolio,calculate_return, calculate_daily_weight, calculate_turnover, calculate_sharpe_ratio, calculate_max_drawdown, calculate_winning_rate
+from ..cache import OptimizationCache
+from ..covariance import RollingCovariance
+from ..profiling import make_profiler, stage
+from ..sparse import SparseWeight
+from ..utils import calculate_portfolio,calculate_return, calculate_daily_weight, calculate_turnover
+from .. import metrics
+
+
+def get_rebalance_dates(rtn_data: pd.DataFrame, rebalance_freq=None) -> pd.Index:
+    """
+    rebalance_freqで指定された頻度に基づいてリバランス日を取得します。
+
+    Args:
+        rtn_data (pd.DataFrame): リターンデータ。
+        rebalance_freq (str, int, list, pd.DatetimeIndex or pd.PeriodIndex, optional):
+            'M'・'Q'・'A'・'W'などの頻度、行の間隔、行位置のリスト、または日付。Noneの場合は全日付。
+
+    Returns:
+        pd.Index: rtn_data.index内のリバランス日。
+    """
+    idx = rtn_data.index
+
+    if rebalance_freq is None:
+        return idx
+
+    elif isinstance(rebalance_freq, str):
+        if rebalance_freq.upper().startswith("M"):  # Monthly
+            return idx[idx.is_month_end]
+        elif rebalance_freq.upper().startswith("Q"):  # Quarterly
+            return idx[idx.is_quarter_end]
+        elif rebalance_freq.upper().startswith("A") or rebalance_freq.upper().startswith("Y"):  # Annual
+            return idx[idx.is_year_end]
+        elif rebalance_freq.upper().startswith("W"):  # Weekly
+            return rtn_data.groupby(idx.to_period("W")).tail(1).index
+        else:
+            # デフォルト処理（例：'5D'などの期間指定）→ ただし存在しない日付の可能性あり
+            return rtn_data.resample(rebalance_freq).last().dropna().index
+
+    elif isinstance(rebalance_freq, int):
+        return idx[::rebalance_freq]
+
+    elif isinstance(rebalance_freq, list):
+        return idx[rebalance_freq]
+
+    elif isinstance(rebalance_freq, pd.DatetimeIndex):
+        return rebalance_freq[rebalance_freq.isin(idx)]
+
+    elif isinstance(rebalance_freq, pd.PeriodIndex):
+        return idx[idx.to_period(rebalance_freq.freq).isin(rebalance_freq)]
+
+    else:
+        raise ValueError("Unsupported type for rebalance_freq.")
+
+
+def first_changed_date(old_dates: pd.Index, new_dates: pd.Index, new_index: pd.Index):
+    """
+    データの追加前後のリバランス日を比べ、重みを計算し直す必要がある最初の日付を返します。
+
+    週次やresampleによる頻度では、最後の期間のリバランス日が追加したデータの日付に移ることがあります。
+
+    Args:
+        old_dates (pd.Index): 追加前のリバランス日。
+        new_dates (pd.Index): 追加後のリバランス日。
+        new_index (pd.Index): 追加された日付。
+
+    Returns:
+        最初に異なるリバランス日。追加前のリバランス日が変わらない場合はnew_index[0]。
+    """
+    n = min(len(old_dates), len(new_dates))
+    changed = np.flatnonzero(old_dates[:n] != new_dates[:n])
+    if len(changed):
+        k = changed[0]
+        return min(old_dates[k], new_dates[k])
+    if len(old_dates) > n:
+        return old_dates[n]
+    return min(new_dates[n], new_index[0]) if len(new_dates) > n else new_index[0]
+
+
 class BaseStrategy:
     """
     取引戦略の基本クラス。
@@ -9,6 +85,10 @@ class BaseStrategy:
     すべての取引戦略の基本となるクラスです。
     """
 
+    # 最適化結果のキャッシュキーに含めない属性（重みの計算結果に影響しないもの）
+    _CACHE_IGNORED = ('strategy_name', 'initial_capital', 'shift_num', 'cost', 'cost_unit',
+                      'rebalance_freq', 'n_jobs', 'chunk_size', 'batch_size', 'failures')
+
     def __init__(self, 
                  price_data: pd.DataFrame = None, 
                  rtn_data: pd.DataFrame = None, 
@@ -16,7 +96,9 @@ class BaseStrategy:
                  initial_capital: float = 1, 
                  shift_num: int = 1, 
                  cost: bool = True, 
-                 cost_unit: float = 0.0005):
+                 cost_unit: float = 0.0005,
+                 dtype=None,
+                 profiler=None):
         """
         初期化メソッド。
 
@@ -28,17 +110,25 @@ class BaseStrategy:
             shift_num (int, optional): シフト数。デフォルトは1。
             cost (bool, optional): コストの有無。デフォルトはTrue。
             cost_unit (float, optional): コストの単位。デフォルトは0.0005。
+            dtype (optional): 価格・リターン・ウェイトとリターン計算の中間データの型（例：'float32'）。
+                Noneの場合はfloat64。ポートフォリオの累積はfloat64で計算する。
+            profiler (Profiler or bool, optional): 処理段階ごとの時間を記録するProfiler。
+                Trueの場合は新しいProfilerを作成する。結果はself.profileで参照できる。
         """
-        if price_data is not None:
-            self.price_data = price_data
-            self.rtn_data = price_data.pct_change().iloc[1:]
-        elif rtn_data is not None:
-            self.rtn_data = rtn_data
-            self.price_data = (1 + rtn_data).cumprod()
-            # 最初の行に初期資本を適用するなら以下のように：
-            self.price_data *= initial_capital
-        else:
-            raise ValueError("price_data か rtn_data のいずれかを指定してください。")
+        self.dtype = dtype
+        self.profiler = make_profiler(profiler)
+        with stage(self.profiler, 'prepare_data'):
+            if price_data is not None:
+                self.price_data = self._astype(price_data)
+                self.rtn_data = self.price_data.pct_change().iloc[1:]
+            elif rtn_data is not None:
+                self.rtn_data = self._astype(rtn_data)
+                self.price_data = (1 + rtn_data).cumprod()
+                # 最初の行に初期資本を適用するなら以下のように：
+                self.price_data *= initial_capital
+                self.price_data = self._astype(self.price_data)
+            else:
+                raise ValueError("price_data か rtn_data のいずれかを指定してください。")
 
         self.strategy_name = strategy_name if strategy_name else 'Strategy'
         self.weight = None
@@ -50,6 +140,24 @@ class BaseStrategy:
         self.rtn = None
         self.port = None
         self.rtn_by_asset = None
+        self._return_params = None
+        self._cov_engine = None
+
+    @property
+    def profile(self) -> pd.DataFrame:
+        """
+        処理段階ごとの呼び出し回数と時間（秒）。profilerを指定していない場合はNone。
+        日付ごとの最適化時間は self.profiler.to_frame(by_date=True) で参照できます。
+        """
+        return None if self.profiler is None else self.profiler.to_frame()
+
+    def _astype(self, data):
+        """
+        self.dtypeが指定されていれば、DataFrameをその型に変換します。
+        """
+        if self.dtype is None or not isinstance(data, pd.DataFrame):
+            return data
+        return data.astype(self.dtype)
 
     def calculate_weight(self) -> pd.DataFrame:
         """
@@ -62,6 +170,68 @@ class BaseStrategy:
         """
         raise NotImplementedError("Subclasses should implement this method.")
 
+    def update_weight(self, new_index: pd.Index) -> pd.DataFrame:
+        """
+        追加された日付に対応する重みのみを計算します。
+
+        デフォルトでは全期間を再計算して追加分を取り出します。
+        サブクラスでオーバーライドすると、追加分だけを計算できます。
+
+        Args:
+            new_index (pd.Index): 追加された日付。
+
+        Returns:
+            pd.DataFrame: 追加された日付の重み。
+        """
+        weight = self.calculate_weight()
+        return weight.iloc[weight.index.isin(new_index)]
+
+    def _covariance_engine(self, **kwargs) -> RollingCovariance:
+        """
+        self.lookback・self.cov_method・self.cov_paramsのRollingCovarianceを保持して使い回します。
+        append()で追加された行だけを渡すため、計算済みの状態から追加分だけを更新します。
+        rtn_dataが置き換えられた場合は作り直します。
+
+        Args:
+            **kwargs: RollingCovarianceに渡す追加の引数（scaleなど）。
+        """
+        engine = self._cov_engine
+        n = 0 if engine is None else len(engine)
+        if not 0 < n <= len(self.rtn_data) or engine.index[-1] != self.rtn_data.index[n - 1]:
+            engine = self._cov_engine = RollingCovariance(self.rtn_data, self.lookback, self.cov_method,
+                                                          **kwargs, **self.cov_params)
+        elif n < len(self.rtn_data):
+            engine.append(self.rtn_data.iloc[n:])
+        return engine
+
+    def _weight_update_start(self, new_index: pd.Index):
+        """
+        データの追加によって重みが変わる最初の日付を返します。この日付以降の重みとリターンは計算し直します。
+
+        デフォルトでは追加された最初の日付です。リバランス日が変わる戦略はオーバーライドしてください。
+
+        Args:
+            new_index (pd.Index): 追加された日付。
+        """
+        return new_index[0]
+
+    def _cache_params(self, window_rtn: pd.DataFrame = None) -> dict:
+        """
+        最適化結果のキャッシュキーに含めるパラメータを返します。
+
+        デフォルトでは公開属性のうちNone以外のスカラー値と辞書をすべて含めます。
+        窓ごとに変わる外部データを使う戦略は、オーバーライドしてそのデータを加えてください。
+
+        Args:
+            window_rtn (pd.DataFrame, optional): 最適化に使うリターンの窓。
+
+        Returns:
+            dict: パラメータ名と値。
+        """
+        return {key: value for key, value in vars(self).items()
+                if not key.startswith('_') and key not in self._CACHE_IGNORED
+                and isinstance(value, (bool, int, float, str, dict))}
+
     def calculate_daily_weight(self) -> pd.DataFrame:
         """
         Calculate daily weight.
@@ -77,20 +247,107 @@ class BaseStrategy:
         cost = kwargs.get('cost', self.cost)
         cost_unit = kwargs.get('cost_unit', self.cost_unit)
         mode = kwargs.get('mode', None)
+        engine = kwargs.get('engine', 'pandas')
        
         # Calculate returns
         if self.weight is None:
-            self.weight = self.calculate_weight()
+            with stage(self.profiler, 'calculate_weight'):
+                self.weight = self.calculate_weight()
+        self.weight = self._astype(self.weight)
         # Calculate returns based on the weight and price data
-        self.rtn_by_asset, self.rtn = calculate_return(self.price_data, self.weight, mode=mode, shift_num=shift_num, cost=cost, cost_unit=cost_unit)
-        
-        self.port = calculate_portfolio(self.rtn, self.initial_capital)
+        self._return_params = dict(mode=mode, shift_num=shift_num, cost=cost, cost_unit=cost_unit, engine=engine,
+                                   dtype=self.dtype)
+        with stage(self.profiler, 'calculate_returns'):
+            self.rtn_by_asset, self.rtn = calculate_return(self.price_data, self.weight, **self._return_params)
+            self.port = calculate_portfolio(self.rtn, self.initial_capital)
         self.port.name = self.strategy_name
         self.rtn.name = self.strategy_name
 
         return self.rtn
 
-    def evaluate(self, report_path=None,display_mode=None, freq='ME',**kwargs) -> dict:
+    def append(self, new_prices: pd.DataFrame) -> pd.Series:
+        """
+        新しい価格データを追加し、追加分だけ重み・リターン・ポートフォリオを更新します。
+
+        計算済みでない段階（weight や rtn が None）は更新せず、次回の計算に任せます。
+        リバランス日は追加後のデータで判定します。週次などで既存のリバランス日が変わる場合は、
+        最初に変わる日付以降の重み・リターンを計算し直すため、全期間を計算し直した場合と同じ結果になります。
+
+        Args:
+            new_prices (pd.DataFrame): 既存の価格データより後の日付の価格データ。
+
+        Returns:
+            pd.Series: 更新後のリターン。
+        """
+        new_prices = self._astype(new_prices.loc[new_prices.index > self.price_data.index[-1], self.price_data.columns])
+        if new_prices.empty:
+            return self.rtn
+
+        # 直前の価格を基準に追加分のリターンだけを計算
+        new_rtn = pd.concat([self.price_data.iloc[[-1]], new_prices]).pct_change().iloc[1:]
+        self.price_data = pd.concat([self.price_data, new_prices])
+        self.rtn_data = pd.concat([self.rtn_data, new_rtn])
+
+        if self.weight is None:
+            return self.rtn
+        with stage(self.profiler, 'update_weight'):
+            start = self._weight_update_start(new_prices.index)
+            new_weight = self._astype(self.update_weight(self.rtn_data.index[self.rtn_data.index >= start]))
+        # 変わる日付以降の既存の重みは置き換える
+        weight = self.weight.iloc[:self.weight.index.searchsorted(start)]
+        if isinstance(weight, SparseWeight) or isinstance(new_weight, SparseWeight):
+            self.weight = SparseWeight.concat([weight, new_weight])
+        else:
+            self.weight = pd.concat([weight, new_weight])
+
+        if self.rtn is None:
+            return self.rtn
+        with stage(self.profiler, 'append_returns'):
+            self._append_returns(start, new_weight.index)
+        return self.rtn
+
+    def _append_returns(self, start, new_weight_index: pd.Index):
+        """
+        start以降のリターンとポートフォリオを計算して、既存の結果のstartより前の部分に連結します。
+        計算に必要な直近のリバランス日以降のデータだけを使います。
+        """
+        params = self._return_params
+        shift_num = max(params['shift_num'], 0)
+        weight_index = self.weight.index
+
+        self.rtn_by_asset = self.rtn_by_asset.loc[self.rtn_by_asset.index < start]
+        self.rtn = self.rtn.loc[self.rtn.index < start]
+        self.port = self.port.loc[self.port.index < start]
+
+        if params['mode'] == 'daily':
+            # 基準価格とリセット点はshift_numの2倍だけ遡るので、その前のリバランス日から計算
+            first = self.price_data.index.searchsorted(start)
+            context = (weight_index <= self.price_data.index[max(first - 2 * shift_num, 0)]).sum()
+            weight = self.weight.iloc[context - 1:] if context > 0 else self.weight
+            target_index = self.price_data.index[first:]
+        else:
+            if len(new_weight_index) == 0:
+                return
+            # シフトしたウェイトとコスト（差分）に必要な直前の行を含める
+            context = max(len(weight_index) - len(new_weight_index) - max(shift_num, 1), 0)
+            weight = self.weight.iloc[context:]
+            target_index = new_weight_index
+
+        price_start = max(self.price_data.index.searchsorted(weight.index[0], side='right') - 1, 0)
+        rtn_by_asset, rtn = calculate_return(self.price_data.iloc[price_start:], weight, **params)
+        rtn_by_asset = rtn_by_asset.loc[rtn_by_asset.index.isin(target_index)]
+        rtn = rtn.loc[rtn.index.isin(target_index)]
+
+        capital = self.port.iloc[-1] if len(self.port) > 0 else self.initial_capital
+        port = calculate_portfolio(rtn, capital)
+
+        self.rtn_by_asset = pd.concat([self.rtn_by_asset, rtn_by_asset])
+        self.rtn = pd.concat([self.rtn, rtn])
+        self.port = pd.concat([self.port, port])
+        self.port.name = self.strategy_name
+        self.rtn.name = self.strategy_name
+
+    def evaluate(self, report_path=None,display_mode=None, freq='ME', metric_engine='native', **kwargs) -> dict:
         """
         戦略のパフォーマンスを評価します。
 
@@ -98,43 +355,55 @@ class BaseStrategy:
             report_path (str, optional): レポートのパス。デフォルトはNone。
             display_mode (str, optional): 表示モード。デフォルトはNone。
             freq (str, optional): 頻度。デフォルトは'ME'。
+            metric_engine (str, optional): 'native'の場合はquantechia.metrics、
+                'quantstats'の場合はquantstatsで指標を計算します。デフォルトは'native'。
 
         Returns:
-            dict: シャープレシオ、最大ドローダウン、勝率、ターンオーバーを含む辞書。
+            dict: シャープレシオ、ソルティノレシオ、最大ドローダウン、カルマーレシオ、勝率、
+                ボラティリティ、ターンオーバーを含む辞書。
         """
         if self.rtn is None:
             self.rtn = self.calculate_returns(**kwargs)
-        # Calculate Sharpe ratio
-        sharpe_ratio = qs.stats.sharpe(self.rtn)
-        # Calculate maximum drawdown
-        max_drawdown = qs.stats.max_drawdown(self.rtn)
-        # Calculate winning rate
-        winning_rate = qs.stats.win_rate(self.rtn)
-
-        turnover = calculate_turnover(self.weight, freq=freq)
+        if metric_engine == 'quantstats' or report_path or display_mode:
+            # quantstatsはimportに時間がかかるため、使う場合のみ読み込む
+            with stage(self.profiler, 'import_quantstats'):
+                import quantstats as qs
+
+        with stage(self.profiler, 'metrics'):
+            if metric_engine == 'native':
+                result = metrics.summary(self.rtn, weights=[self.weight], freq=freq).iloc[0].to_dict()
+            elif metric_engine == 'quantstats':
+                result = {
+                    "sharpe_ratio": qs.stats.sharpe(self.rtn),
+                    "sortino_ratio": qs.stats.sortino(self.rtn),
+                    "max_drawdown": qs.stats.max_drawdown(self.rtn),
+                    "calmar_ratio": qs.stats.calmar(self.rtn),
+                    "winning_rate": qs.stats.win_rate(self.rtn),
+                    "volatility": qs.stats.volatility(self.rtn),
+                    "turnover": calculate_turnover(self.weight, freq=freq),
+                }
+            else:
+                raise ValueError(f"Unsupported metric engine: {metric_engine}")
 
         rtn = self.rtn.squeeze() if isinstance(self.rtn, pd.DataFrame) else self.rtn
         if report_path:
-            try:
-                qs.reports.html(rtn, output=report_path, **kwargs)
-            except Exception as e:
-                print(f'Report Error: {e}')
-        if display_mode == 'basic':
-            qs.reports.basic(rtn, **kwargs)
-        elif display_mode == 'full':
-            qs.reports.full(rtn, **kwargs)
-        elif display_mode == 'stats':
-            qs.reports.stats(rtn, **kwargs)
-        elif display_mode == 'plot':
-            qs.reports.plots(rtn, **kwargs)
-            
-
-        return {
-            "sharpe_ratio": sharpe_ratio,
-            "max_drawdown": max_drawdown,
-            "winning_rate": winning_rate,
-            "turnover": turnover,
-        }
+            with stage(self.profiler, 'report'):
+                try:
+                    qs.reports.html(rtn, output=report_path, **kwargs)
+                except Exception as e:
+                    print(f'Report Error: {e}')
+        if display_mode:
+            with stage(self.profiler, 'report'):
+                if display_mode == 'basic':
+                    qs.reports.basic(rtn, **kwargs)
+                elif display_mode == 'full':
+                    qs.reports.full(rtn, **kwargs)
+                elif display_mode == 'stats':
+                    qs.reports.stats(rtn, **kwargs)
+                elif display_mode == 'plot':
+                    qs.reports.plots(rtn, **kwargs)
+
+        return result
 
 class EqualWeightStrategy(BaseStrategy):
     """
@@ -149,81 +418,105 @@ class EqualWeightStrategy(BaseStrategy):
         self.weight = pd.DataFrame(1 / num_assets, index=self.price_data.index, columns=self.price_data.columns)
         return self.weight
 
+    def update_weight(self, new_index):
+        """
+        Calculate the equal weight for the appended dates.
+        """
+        num_assets = len(self.price_data.columns)
+        return pd.DataFrame(1 / num_assets, index=new_index, columns=self.price_data.columns)
+
 class RebalanceStrategy(BaseStrategy):
     """
     指定された頻度に基づいてポートフォリオをリバランスする戦略。
     """
 
-    def __init__(self, price_data: pd.DataFrame,rebalance_freq=None, lookback: int = 60, **kwargs):
+    def __init__(self, price_data: pd.DataFrame,rebalance_freq=None, lookback: int = 60,
+                 cov_method: str = None, cov_params: dict = None, cache: OptimizationCache = None, **kwargs):
+        """
+        Args:
+            cov_method (str, optional): 共分散の計算方法。Noneの場合は窓ごとに`cov()`で再計算、
+                'rolling'または'ewma'の場合はRollingCovarianceで逐次更新する。
+            cov_params (dict, optional): RollingCovarianceに渡す追加の引数（halflifeなど）。
+            cache (OptimizationCache, optional): calculate_current_weightの結果を保存するキャッシュ。
+        """
         super().__init__(price_data, **kwargs)
         self.rebalance_freq = rebalance_freq
         self.rebalance_dates = self.get_rebalance_dates()
         self.lookback = lookback
+        self.cov_method = cov_method
+        self.cov_params = cov_params if cov_params is not None else {}
+        self.cache = cache
     
     def get_rebalance_dates(self):
         """
         self.rebalance_freqで指定された頻度に基づいてリバランス日を取得します。
         返される日付は、self.price_data.index内に存在することが保証されています。
         """
-        idx = self.rtn_data.index
-
-        if self.rebalance_freq is None:
-            return idx
-
-        elif isinstance(self.rebalance_freq, str):
-            if self.rebalance_freq.upper().startswith("M"):  # Monthly
-                return idx[idx.is_month_end]
-            elif self.rebalance_freq.upper().startswith("Q"):  # Quarterly
-                return idx[idx.is_quarter_end]
-            elif self.rebalance_freq.upper().startswith("A") or self.rebalance_freq.upper().startswith("Y"):  # Annual
-                return idx[idx.is_year_end]
-            elif self.rebalance_freq.upper().startswith("W"):  # Weekly
-                return self.rtn_data.groupby(idx.to_period("W")).tail(1).index
-            else:
-                # デフォルト処理（例：'5D'などの期間指定）→ ただし存在しない日付の可能性あり
-                return self.rtn_data.resample(self.rebalance_freq).last().dropna().index
-
-        elif isinstance(self.rebalance_freq, int):
-            return idx[::self.rebalance_freq]
+        return get_rebalance_dates(self.rtn_data, self.rebalance_freq)
 
-        elif isinstance(self.rebalance_freq, list):
-            return idx[self.rebalance_freq]
 
-        elif isinstance(self.rebalance_freq, pd.DatetimeIndex):
-            return self.rebalance_freq[self.rebalance_freq.isin(idx)]
-
-        elif isinstance(self.rebalance_freq, pd.PeriodIndex):
-            return idx[idx.to_period(self.rebalance_freq.freq).isin(self.rebalance_freq)]
+    def calculate_weight(self):
+        """
+        過去の`lookback`日数とカスタムオプティマイザを使用して、ローリングリスクパリティの重みを計算します。
+        """
+        self.weight = self._calculate_weight_rows(self.rebalance_dates)
+        return self.weight
 
-        else:
-            raise ValueError("Unsupported type for rebalance_freq.")
+    def update_weight(self, new_index):
+        """
+        追加された日付のうちリバランス日に当たる日付の重みのみを計算します。
+        """
+        self.rebalance_dates = self.get_rebalance_dates()
+        return self._calculate_weight_rows(self.rebalance_dates[self.rebalance_dates.isin(new_index)])
 
+    def _weight_update_start(self, new_index):
+        """
+        追加前後でリバランス日が最初に変わる日付（週次の最後の週など）を返します。
+        """
+        return first_changed_date(self.rebalance_dates, self.get_rebalance_dates(), new_index)
 
-    def calculate_weight(self):
+    def _calculate_weight_rows(self, dates):
         """
-        過去の`lookback`日数とカスタムオプティマイザを使用して、ローリングリスクパリティの重みを計算します。
+        指定された日付ごとに直近`lookback`日数のリターンから重みを計算します。
         """
         assets = self.rtn_data.columns
         weights = []
+        cov_engine = None
+        if self.cov_method is not None:
+            cov_engine = self._covariance_engine()
 
-        for date in self.rebalance_dates:
+        for date in dates:
             i = self.rtn_data.index.get_loc(date)
             if i < self.lookback:
                 weights.append([np.nan] * len(assets))
                 continue
 
             window_rtn = self.rtn_data.iloc[i - self.lookback:i]
-            w = self.calculate_current_weight(window_rtn)
+            cov_matrix = None if cov_engine is None else cov_engine.covariance(i)
+            with stage(self.profiler, 'calculate_current_weight', date):
+                w = self._current_weight(window_rtn, cov_matrix)
             weights.append(w)
 
-        self.weight = pd.DataFrame(weights, index=self.rebalance_dates, columns=assets)
-        return self.weight
+        return pd.DataFrame(weights, index=dates, columns=assets, dtype=float)
+
+    def _current_weight(self, window_rtn, cov_matrix=None):
+        """
+        calculate_current_weightを呼び出します。キャッシュがあれば保存された結果を使います。
+        """
+        kwargs = {} if cov_matrix is None else {'cov_matrix': cov_matrix}
+        if self.cache is None:
+            return self.calculate_current_weight(window_rtn, **kwargs)
+        return self.cache.get_or_compute(type(self).__qualname__, (window_rtn, cov_matrix),
+                                         self._cache_params(window_rtn),
+                                         lambda: self.calculate_current_weight(window_rtn, **kwargs))
     
-    def calculate_current_weight(self, window_rtn):
+    def calculate_current_weight(self, window_rtn, cov_matrix=None):
         """
         カスタムオプティマイザを使用して重みを計算します。
+        cov_matrixが指定されていない場合は、window_rtnから共分散行列を計算します。
         """
-        cov_matrix = window_rtn.cov()
+        if cov_matrix is None:
+            cov_matrix = window_rtn.cov()
         inv_cov_matrix = np.linalg.inv(cov_matrix)
         ones = np.ones(len(window_rtn.columns))
         w = inv_cov_matrix @ ones
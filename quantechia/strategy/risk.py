@@ -1,12 +1,163 @@
-from .basestrategy import BaseStrategy,RebalanceStrategy
+from .basestrategy import BaseStrategy,RebalanceStrategy, first_changed_date, get_rebalance_dates
+from ..cache import OptimizationCache, make_cache_key
+from ..profiling import stage
+import copy
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
 import scipy.optimize as op
 import numpy as np
 import pandas as pd
 from scipy.optimize import minimize
-import riskfolio as rp
 from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
 
-def cal_risk_parity(Sigma):
+if TYPE_CHECKING:
+    import riskfolio as rp
+
+def cal_risk_parity(Sigma, solver='newton', x0=None, **kwargs):
+    """
+    リスク寄与が均等になる（Equal Risk Contribution）ウェイトを計算する。
+
+    Args:
+        Sigma (np.ndarray): 共分散行列。
+        solver (str, optional): 'newton'（対数バリア定式化のニュートン法）または'slsqp'。
+        x0 (array-like, optional): 初期値。前日の解を渡すとウォームスタートになる。
+        **kwargs: ソルバーに渡す追加の引数（newtonの場合はbudget, tol, max_iter）。
+
+    Returns:
+        np.ndarray: 合計1のウェイト。
+    """
+    if solver == 'newton':
+        return _cal_risk_parity_newton(Sigma, x0=x0, **kwargs)
+    elif solver == 'slsqp':
+        return _cal_risk_parity_slsqp(Sigma, x0=x0)
+    else:
+        raise ValueError(f"Unsupported solver: {solver}")
+
+def _cal_risk_parity_newton(Sigma, x0=None, budget=None, tol=1e-10, max_iter=100):
+    """
+    凸な対数バリア問題 min 0.5 * y'Σy - Σ b_i log(y_i) をニュートン法で解く。
+    最適解ではy_i (Σy)_i = b_iとなるため、w = y / sum(y)がリスクバジェットbのウェイトになる。
+    """
+    Sigma = np.asarray(Sigma, dtype=float)
+    n = Sigma.shape[0]
+    if not np.all(np.isfinite(Sigma)):
+        raise ValueError("Risk parity optimization failed: covariance matrix contains NaN or inf")
+    b = np.full(n, 1. / n) if budget is None else np.asarray(budget, dtype=float) / np.sum(budget)
+
+    # 初期値：ウォームスタートがなければ逆ボラティリティ
+    if x0 is not None and np.all(np.isfinite(x0)) and np.sum(x0) > 0:
+        y = np.maximum(np.asarray(x0, dtype=float), 1e-8)
+    else:
+        y = 1 / np.sqrt(np.diag(Sigma))
+    # 最適解はy'Σy = sum(b) = 1を満たすので、その尺度に合わせる
+    y /= np.sqrt(y @ Sigma @ y)
+
+    def objective(y):
+        return 0.5 * y @ Sigma @ y - b @ np.log(y)
+
+    for _ in range(max_iter):
+        Sy = Sigma @ y
+        if np.max(np.abs(y * Sy - b)) < tol:
+            return y / np.sum(y)
+
+        grad = Sy - b / y
+        hess = Sigma + np.diag(b / y ** 2)
+        step = np.linalg.solve(hess, grad)
+
+        # 正の領域に留まり、目的関数が十分に減少するまでステップを縮める
+        # （最適解の近傍では減少量が丸め誤差以下になるため、フルステップを採用）
+        t = 1.0
+        while np.any(y - t * step <= 0):
+            t *= 0.5
+        decrement = grad @ step
+        if decrement > 1e-12:
+            f = objective(y)
+            while objective(y - t * step) > f - 0.25 * t * decrement and t > 1e-12:
+                t *= 0.5
+        y = y - t * step
+
+    raise ValueError(f"Risk parity optimization failed: Newton method did not converge in {max_iter} iterations")
+
+def cal_risk_parity_batch(Sigmas, x0=None, budget=None, tol=1e-10, max_iter=100):
+    """
+    複数日付のリスクパリティ問題を、ニュートン法の反復をまとめてベクトル化して解く。
+
+    Args:
+        Sigmas (np.ndarray): (T, N, N)の共分散行列のテンソル。
+        x0 (np.ndarray, optional): (T, N)の初期値。
+        budget (array-like, optional): リスクバジェット。デフォルトは均等。
+        tol (float, optional): y_i (Σy)_i と b_i の差の許容誤差。
+        max_iter (int, optional): 最大反復回数。
+
+    Returns:
+        tuple: (T, N)のウェイト（収束しなかった日付はNaN）と、(T,)の収束フラグ。
+    """
+    Sigmas = np.asarray(Sigmas, dtype=float)
+    T, n, _ = Sigmas.shape
+    b = np.full(n, 1. / n) if budget is None else np.asarray(budget, dtype=float) / np.sum(budget)
+    weights = np.full((T, n), np.nan)
+    converged = np.zeros(T, dtype=bool)
+
+    valid = np.all(np.isfinite(Sigmas), axis=(1, 2))
+    diag = np.diagonal(Sigmas, axis1=1, axis2=2)
+    valid &= np.all(diag > 0, axis=1)
+    idx = np.flatnonzero(valid)
+    if len(idx) == 0:
+        return weights, converged
+
+    S = Sigmas[idx]
+    if x0 is not None:
+        y = np.asarray(x0, dtype=float)[idx].copy()
+        bad = ~np.all(np.isfinite(y), axis=1) | (np.nansum(y, axis=1) <= 0)
+        y[bad] = 1 / np.sqrt(diag[idx][bad])
+        y = np.maximum(y, 1e-8)
+    else:
+        y = 1 / np.sqrt(diag[idx])
+    y /= np.sqrt(np.einsum('ti,tij,tj->t', y, S, y))[:, None]
+
+    def objective(S, y):
+        return 0.5 * np.einsum('ti,tij,tj->t', y, S, y) - np.log(y) @ b
+
+    # 未収束の問題だけを反復する
+    active = np.arange(len(idx))
+    for _ in range(max_iter):
+        Sa, ya = S[active], y[active]
+        Sy = np.einsum('tij,tj->ti', Sa, ya)
+        done = np.max(np.abs(ya * Sy - b), axis=1) < tol
+        if done.any():
+            weights[idx[active[done]]] = ya[done] / ya[done].sum(axis=1, keepdims=True)
+            converged[idx[active[done]]] = True
+            keep = ~done
+            active, Sa, ya, Sy = active[keep], Sa[keep], ya[keep], Sy[keep]
+        if len(active) == 0:
+            break
+
+        grad = Sy - b / ya
+        hess = Sa.copy()
+        hess[:, np.arange(n), np.arange(n)] += b / ya ** 2
+        step = np.linalg.solve(hess, grad[..., None])[..., 0]
+
+        # 問題ごとのステップ幅（正の領域に留まるように縮め、十分な減少を確認）
+        t = np.ones(len(active))
+        for _ in range(60):
+            shrink = np.any(ya - t[:, None] * step <= 0, axis=1)
+            if not shrink.any():
+                break
+            t[shrink] *= 0.5
+        decrement = np.einsum('ti,ti->t', grad, step)
+        f = objective(Sa, ya)
+        for _ in range(40):
+            shrink = (decrement > 1e-12) & (objective(Sa, ya - t[:, None] * step) > f - 0.25 * t * decrement) & (t > 1e-12)
+            if not shrink.any():
+                break
+            t[shrink] *= 0.5
+        y[active] = ya - t[:, None] * step
+
+    return weights, converged
+
+def _cal_risk_parity_slsqp(Sigma, x0=None):
     n = Sigma.shape[0]
 
     def calculate_portfolio_var(w, Sigma):
@@ -28,7 +179,8 @@ def cal_risk_parity(Sigma):
 
     cons = [{'type': 'eq', 'fun': lambda w: np.sum(w) - 1}]
     bnds = [(0, None)] * n
-    x0 = [1. / n] * n
+    if x0 is None:
+        x0 = [1. / n] * n
 
     result = op.minimize(risk_parity_objective, x0=x0, method='SLSQP', bounds=bnds, constraints=cons)
 
@@ -41,36 +193,136 @@ class RiskParityStrategyScipy(BaseStrategy):
     Rolling Risk Parity Strategy using user-defined cal_risk_parity.
     """
 
-    def __init__(self, price_data: pd.DataFrame, lookback: int = 60, **kwargs):
+    def __init__(self, price_data: pd.DataFrame, lookback: int = 60,
+                 cov_method: str = None, cov_params: dict = None, solver: str = 'newton',
+                 batch_size: int = 250, cache: OptimizationCache = None, **kwargs):
+        """
+        Args:
+            cov_method (str, optional): None to recompute `cov()` for every window,
+                'rolling' or 'ewma' to update it incrementally with RollingCovariance.
+            cov_params (dict, optional): Extra arguments for RollingCovariance (e.g. halflife).
+            solver (str, optional): Solver for cal_risk_parity ('newton' or 'slsqp').
+                Each date is warm-started from the previous date's solution.
+                'batch' solves `batch_size` dates at once with cal_risk_parity_batch.
+            batch_size (int, optional): Number of dates per batch for solver='batch'.
+            cache (OptimizationCache, optional): Cache for cal_risk_parity results keyed by the covariance matrix.
+        """
         super().__init__(price_data, **kwargs)
         self.lookback = lookback
+        self.cov_method = cov_method
+        self.cov_params = cov_params if cov_params is not None else {}
+        self.solver = solver
+        self.batch_size = batch_size
+        self.cache = cache
+        self.failures = {}  # 最適化に失敗した日付とエラー内容
 
     def calculate_weight(self):
         """
         Calculate rolling risk parity weights using past `lookback` days and custom optimizer.
+        Dates where the optimization fails get NaN weights and are recorded in `self.failures`.
+        """
+        self.failures = {}
+        self.weight = self._calculate_weight_rows(0)
+        return self.weight
+
+    def update_weight(self, new_index):
+        """
+        Calculate risk parity weights only for the appended dates.
         """
-        dates = self.rtn_data.index
+        return self._calculate_weight_rows(self.rtn_data.index.get_loc(new_index[0]))
+
+    def _calculate_weight_rows(self, start):
+        """
+        Calculate risk parity weights for the rows of `rtn_data` from position `start`.
+        """
+        if self.solver == 'batch':
+            return self._calculate_weight_rows_batch(start)
+
+        dates = self.rtn_data.index[start:]
         assets = self.rtn_data.columns
         weights = []
-
-        for i in range(len(self.rtn_data)):
+        cov_engine = None
+        if self.cov_method is not None:
+            cov_engine = self._covariance_engine(scale=100)
+        # 前日の解をウォームスタートに使う（追加時は計算済みの最後の重みから）
+        w_prev = None
+        if start > 0 and self.weight is not None and len(self.weight) > 0:
+            w_prev = self.weight.iloc[-1].values
+
+        for i in range(start, len(self.rtn_data)):
             if i < self.lookback:
                 weights.append([np.nan] * len(assets))
                 continue
 
-            window_rtn = self.rtn_data.iloc[i - self.lookback:i]
-            Sigma = (100*window_rtn).cov().values  # 共分散行列
+            if cov_engine is None:
+                window_rtn = self.rtn_data.iloc[i - self.lookback:i]
+                Sigma = (100*window_rtn).cov().values  # 共分散行列
+            else:
+                Sigma = cov_engine.covariance(i)
 
             try:
-                w_opt = cal_risk_parity(Sigma)
+                with stage(self.profiler, 'cal_risk_parity', dates[i - start]):
+                    if self.cache is None:
+                        w_opt = cal_risk_parity(Sigma, solver=self.solver, x0=w_prev)
+                    else:
+                        w_opt = self.cache.get_or_compute('cal_risk_parity', Sigma, {'solver': self.solver},
+                                                          lambda: cal_risk_parity(Sigma, solver=self.solver, x0=w_prev))
+                w_prev = w_opt
             except Exception as e:
-                print(f"Optimization failed at index {i}: {e}")
+                self.failures[dates[i - start]] = f"{type(e).__name__}: {e}"
                 w_opt = [np.nan] * len(assets)
 
             weights.append(w_opt)
 
-        self.weight = pd.DataFrame(weights, index=dates, columns=assets)
-        return self.weight
+        return pd.DataFrame(weights, index=dates, columns=assets, dtype=float)
+
+    def _calculate_weight_rows_batch(self, start):
+        """
+        Calculate risk parity weights from position `start`, solving `batch_size` dates at once.
+        """
+        dates = self.rtn_data.index[start:]
+        assets = self.rtn_data.columns
+        weights = np.full((len(dates), len(assets)), np.nan)
+        cov_engine = None
+        if self.cov_method is not None:
+            cov_engine = self._covariance_engine(scale=100)
+
+        rows = np.arange(max(start, self.lookback), len(self.rtn_data))
+        for k in range(0, len(rows), self.batch_size):
+            batch_rows = rows[k:k + self.batch_size]
+            if cov_engine is None:
+                Sigmas = np.stack([(100*self.rtn_data.iloc[i - self.lookback:i]).cov().values for i in batch_rows])
+            else:
+                Sigmas = np.stack([cov_engine.covariance(i) for i in batch_rows])
+
+            with stage(self.profiler, 'cal_risk_parity_batch'):
+                if self.cache is None:
+                    w_opt, converged = cal_risk_parity_batch(Sigmas)
+                else:
+                    w_opt, converged = self._cached_batch(Sigmas)
+            weights[batch_rows - start] = w_opt
+            for i in batch_rows[~converged]:
+                self.failures[self.rtn_data.index[i]] = "batch Newton method did not converge"
+
+        return pd.DataFrame(weights, index=dates, columns=assets)
+
+    def _cached_batch(self, Sigmas):
+        """
+        Solve only the covariance matrices missing from the cache with cal_risk_parity_batch.
+        """
+        keys = [make_cache_key('cal_risk_parity', Sigma, {'solver': self.solver}) for Sigma in Sigmas]
+        cached = [self.cache.get(key) for key in keys]
+        missing = np.array([w is None for w in cached])
+
+        w_opt = np.full(Sigmas.shape[:2], np.nan)
+        converged = np.ones(len(Sigmas), dtype=bool)
+        if (~missing).any():
+            w_opt[~missing] = np.stack([w for w in cached if w is not None])
+        if missing.any():
+            w_opt[missing], converged[missing] = cal_risk_parity_batch(Sigmas[missing])
+            for k in np.flatnonzero(missing & converged):
+                self.cache.set(keys[k], w_opt[k])
+        return w_opt, converged
 
 
 
@@ -81,23 +333,44 @@ class BaseRiskfolioStrategy(BaseStrategy, ABC):
 
     def __init__(self, price_data: pd.DataFrame, lookback: int = 60,
                  optimizer: str = 'optimization', strategy_name: str = "Flexible Strategy",
-                 opt_params: dict = None, **kwargs):
+                 opt_params: dict = None, rebalance_freq=None, n_jobs: int = 1, executor: Executor = None,
+                 chunk_size: int = None, cache: OptimizationCache = None, **kwargs):
+        """
+        Args:
+            rebalance_freq (optional): 最適化する日付の頻度。RebalanceStrategyと同じ指定方法で、
+                Noneの場合は全日付で最適化する。
+            n_jobs (int, optional): 最適化に使うワーカープロセス数。1の場合は直列、Noneの場合はCPU数。
+            executor (Executor, optional): 最適化に使うExecutor。指定した場合はn_jobsより優先し、
+                n_jobsはチャンクの大きさを決めるワーカー数としてのみ使う（1またはNoneの場合はCPU数）。
+            chunk_size (int, optional): 1タスクにまとめる日付数。Noneの場合はワーカー数から決める。
+            cache (OptimizationCache, optional): 窓ごとの最適化結果を保存するキャッシュ。
+        """
         super().__init__(price_data, **kwargs)
         self.lookback = lookback
         self.optimizer = optimizer
         self.strategy_name = strategy_name
         self.opt_params = opt_params if opt_params is not None else {}
-
-    def _create_portfolio(self, returns: pd.DataFrame, **kwargs) -> rp.Portfolio:
+        self.rebalance_freq = rebalance_freq
+        self.rebalance_dates = self.get_rebalance_dates()
+        self.n_jobs = n_jobs
+        self.executor = executor
+        self.chunk_size = chunk_size
+        self.cache = cache
+        self.failures = {}  # 最適化に失敗した日付とエラー内容
+
+    def _create_portfolio(self, returns: pd.DataFrame, **kwargs) -> 'rp.Portfolio':
         """
         rp.Portfolioの生成。引数は自由に渡せる。
         """
+        # riskfolioはimportに時間がかかるため、最適化を行う時点で読み込む
+        import riskfolio as rp
+
         # 例えば returns は必須で、他は任意のkwargで
         portfolio_args = kwargs.get('portfolio_args', {})
         port = rp.Portfolio(returns=returns, **portfolio_args)
         return port
 
-    def _apply_preprocessing(self, port: rp.Portfolio, preprocessing_params: dict):
+    def _apply_preprocessing(self, port: 'rp.Portfolio', preprocessing_params: dict):
         """
         複数の前処理メソッドを条件に応じて呼ぶ
         preprocessing_params = {
@@ -139,7 +412,7 @@ class BaseRiskfolioStrategy(BaseStrategy, ABC):
         
         return opt_params
 
-    def _update_opt_params(self, opt_params: dict, port: rp.Portfolio) -> dict:
+    def _update_opt_params(self, opt_params: dict, port: 'rp.Portfolio') -> dict:
         """
         最適化用のパラメータを更新するメソッド。
         ここで定義したパラメータは、_optimize_weightsメソッドで使用される。
@@ -161,7 +434,7 @@ class BaseRiskfolioStrategy(BaseStrategy, ABC):
         self._apply_preprocessing(port,  preprocessing_params)
 
         # 最適化用パラメータ
-        optimize_params = opt_params.get('optimize_params', {})
+        optimize_params = dict(opt_params.get('optimize_params', {}))
 
         
 
@@ -178,28 +451,138 @@ class BaseRiskfolioStrategy(BaseStrategy, ABC):
             w = port.optimization(**optimize_params)
 
         return w.values.flatten()
+
+    def _optimize_window(self, window_rtn: pd.DataFrame) -> np.ndarray:
+        """
+        _optimize_weightsを呼び出します。キャッシュがあれば保存された結果を使います。
+        """
+        if self.cache is None:
+            return self._optimize_weights(window_rtn)
+        return self.cache.get_or_compute(f"{type(self).__qualname__}.{self.optimizer}", window_rtn,
+                                         self._cache_params(window_rtn),
+                                         lambda: self._optimize_weights(window_rtn))
     
+    def get_rebalance_dates(self):
+        """
+        self.rebalance_freqで指定された頻度に基づいてリバランス日を取得します。
+        """
+        return get_rebalance_dates(self.rtn_data, self.rebalance_freq)
+
     def calculate_weight(self) -> pd.DataFrame:
-        dates = self.rtn_data.index
-        assets = self.rtn_data.columns
-        weights = []
+        self.failures = {}
+        self.weight = self._calculate_weight_rows(self.rebalance_dates)
+        return self.weight
 
-        for i in range(len(self.rtn_data)):
-            if i < self.lookback:
-                weights.append([np.nan] * len(assets))
-                continue
+    def update_weight(self, new_index) -> pd.DataFrame:
+        """
+        追加された日付のうちリバランス日に当たる日付の重みのみを最適化します。
+        """
+        self.rebalance_dates = self.get_rebalance_dates()
+        return self._calculate_weight_rows(self.rebalance_dates[self.rebalance_dates.isin(new_index)])
 
-            window_rtn = self.rtn_data.iloc[i - self.lookback:i]
+    def _weight_update_start(self, new_index):
+        """
+        追加前後でリバランス日が最初に変わる日付（週次の最後の週など）を返します。
+        """
+        return first_changed_date(self.rebalance_dates, self.get_rebalance_dates(), new_index)
 
-            try:
-                w = self._optimize_weights(window_rtn)
-                weights.append(w)
-            except Exception as e:
-                print(f"Optimization failed at index {i}: {e}")
-                weights.append([np.nan] * len(assets))
+    def _calculate_weight_rows(self, dates) -> pd.DataFrame:
+        """
+        指定された日付ごとに重みを最適化します。
+        失敗した日付の重みはNaNとし、エラー内容をself.failuresに記録します。
+        """
+        assets = self.rtn_data.columns
+        weights = np.full((len(dates), len(assets)), np.nan)
+
+        rows = [(k, i) for k, i in enumerate(self.rtn_data.index.get_indexer(dates)) if i >= self.lookback]
+        positions = [i for _, i in rows]
+        for (k, i), (w, error, seconds) in zip(rows, self._optimize_positions(positions)):
+            if error is None:
+                weights[k] = w
+            else:
+                self.failures[self.rtn_data.index[i]] = error
+            if self.profiler is not None:
+                # ワーカープロセスで計測した時間も日付ごとに記録する
+                self.profiler.record('optimize_weights', seconds, self.rtn_data.index[i])
+
+        return pd.DataFrame(weights, index=dates, columns=assets)
+
+    def _optimize_positions(self, positions: list) -> list:
+        """
+        各位置の直近`lookback`日の窓で重みを最適化します。
+        n_jobsまたはexecutorが指定されている場合は、連続した位置をチャンクにまとめて
+        ワーカープロセスで計算します。結果は位置の順に(重み, エラー, 計算時間)のリストで返します。
+        """
+        if len(positions) == 0 or (self.executor is None and self.n_jobs == 1):
+            return _optimize_chunk(self, self.rtn_data, positions, self.lookback)[0]
+
+        # Executorの内部の属性は参照せず、n_jobs（1またはNoneの場合はCPU数）からチャンクの大きさを決める
+        n_workers = self.n_jobs if self.n_jobs is not None and self.n_jobs > 1 else os.cpu_count()
+        chunk_size = self.chunk_size or max(1, -(-len(positions) // (n_workers * 4)))
+
+        # ワーカーには価格データを持たないコピーと、チャンクに必要な範囲のリターンだけを送る
+        tasks = []
+        for k in range(0, len(positions), chunk_size):
+            chunk = positions[k:k + chunk_size]
+            offset = chunk[0] - self.lookback
+            block = self.rtn_data.iloc[offset:chunk[-1]]
+            tasks.append((self._worker_copy(), block, [i - offset for i in chunk], self.lookback))
+
+        if self.executor is not None:
+            futures = [self.executor.submit(_optimize_chunk, *task) for task in tasks]
+            return self._merge_chunks(futures)
+
+        with ProcessPoolExecutor(max_workers=self.n_jobs) as executor:
+            futures = [executor.submit(_optimize_chunk, *task) for task in tasks]
+            return self._merge_chunks(futures)
+
+    def _merge_chunks(self, futures) -> list:
+        """
+        チャンクの結果を位置の順に連結し、ワーカーでのキャッシュのヒット数・ミス数をself.cacheに加えます。
+        """
+        results = []
+        for future in futures:
+            chunk_results, (hits, misses) = future.result()
+            results.extend(chunk_results)
+            if self.cache is not None:
+                self.cache.hits += hits
+                self.cache.misses += misses
+        return results
+
+    def _worker_copy(self):
+        """
+        ワーカーに送るための、データとExecutorとProfilerを持たないコピーを返します。
+        キャッシュはワーカーごとに接続を開き直し、参照回数を0から数えるコピーにします。
+        """
+        worker = copy.copy(self)
+        for attr in ('price_data', 'rtn_data', 'weight', 'rtn', 'port', 'rtn_by_asset', 'executor', 'profiler'):
+            setattr(worker, attr, None)
+        worker.failures = {}
+        if self.cache is not None:
+            worker.cache = copy.copy(self.cache)
+            worker.cache.hits = worker.cache.misses = 0
+        return worker
 
-        self.weight = pd.DataFrame(weights, index=dates, columns=assets)
-        return self.weight
+
+def _optimize_chunk(strategy: BaseRiskfolioStrategy, rtn_data: pd.DataFrame, positions: list, lookback: int) -> tuple:
+    """
+    rtn_data内の各位置について重みを最適化します（プロセスプールから呼ばれる）。
+    結果は(重み, エラー, 計算時間)のリストと、この呼び出しでのキャッシュの(ヒット数, ミス数)です。
+    """
+    cache = strategy.cache
+    hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    results = []
+    for i in positions:
+        window_rtn = rtn_data.iloc[i - lookback:i]
+        start = time.perf_counter()
+        try:
+            w, error = strategy._optimize_window(window_rtn), None
+        except Exception as e:
+            w, error = None, f"{type(e).__name__}: {e}"
+        results.append((w, error, time.perf_counter() - start))
+    if cache is not None:
+        hits, misses = cache.hits - hits, cache.misses - misses
+    return results, (hits, misses)
     
 DEFAULT_OPT_PARAMS = {
     'preprocessing_params': {
@@ -377,10 +760,13 @@ class FactorStrategy(RebalanceStrategy):
         self.alpha = alpha
         self.hist = hist
 
-    def calculate_current_weight(self, window_rtn):
+    def calculate_current_weight(self, window_rtn, cov_matrix=None):
         """
         ファクター制約をポートフォリオに反映するようにopt_paramsを更新
+        共分散はRiskfolio側で推定するため、cov_matrixは使用しない
         """
+        import riskfolio as rp
+
         port = rp.Portfolio(returns=window_rtn)
         
         port.assets_stats(method_mu=self.method_mu, method_cov=self.method_cov)
@@ -404,4 +790,14 @@ class FactorStrategy(RebalanceStrategy):
         w = port.optimization(model=self.model, rm=self.rm, obj=self.obj, rf=self.rf, l=self.l, hist=self.hist)
         return w.values.flatten()
 
+    def _cache_params(self, window_rtn=None) -> dict:
+        """
+        ファクターリターンの窓と制約もキャッシュキーに含める
+        """
+        params = super()._cache_params(window_rtn)
+        params['factor_constraints'] = pd.DataFrame(self.factor_constraints)
+        if window_rtn is not None:
+            params['factors_window'] = self.factor_returns.loc[window_rtn.index]
+        return params
+
         
\ No newline at end of file
@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+
+
+def top_k(scores, k: int, largest: bool = True):
+    """
+    各行でスコアが大きい（largest=Falseの場合は小さい）k列を選ぶ。
+
+    np.argpartitionを使うため、1行あたりO(N)で計算できる（選ばれた列の順序は不定）。
+    NaNは選ばれず、有効な列がk未満の行では有効な列のみを返す。
+    k=1の場合は同値のとき左の列を選ぶ（idxmaxと同じ）。
+
+    Args:
+        scores (np.ndarray): (T, N)のスコア。
+        k (int): 選ぶ列数。
+        largest (bool, optional): Trueの場合は上位、Falseの場合は下位を選ぶ。
+
+    Returns:
+        tuple: 選ばれた要素の行位置と列位置の配列（行の昇順）。
+    """
+    scores = np.asarray(scores, dtype=float)
+    n_rows, n_cols = scores.shape
+    k = min(k, n_cols)
+    if k <= 0 or n_rows == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+    missing = np.isnan(scores)
+    key = np.where(missing, -np.inf, scores if largest else -scores)
+    if k == 1:
+        cols = np.argmax(key, axis=1)[:, None]
+    elif k < n_cols:
+        cols = np.argpartition(-key, k - 1, axis=1)[:, :k]
+    else:
+        cols = np.broadcast_to(np.arange(n_cols), (n_rows, n_cols))
+    rows = np.broadcast_to(np.arange(n_rows)[:, None], cols.shape)
+
+    keep = ~missing[rows, cols]
+    return rows[keep], cols[keep]
+
+
+def quantile_buckets(scores, n_quantiles: int) -> np.ndarray:
+    """
+    各行のスコアを分位点でn_quantiles個のバケットに分ける（pd.qcut(labels=False)と同じ境界）。
+
+    NaNを含まない場合はnp.quantile（部分ソート）で1行あたりO(N)、
+    NaNを含む場合は行ごとに有効な個数が異なるためソートで分位点を求める。
+
+    Args:
+        scores (np.ndarray): (T, N)のスコア。
+        n_quantiles (int): バケット数。
+
+    Returns:
+        np.ndarray: (T, N)のバケット番号（0が最小、NaNは-1）。
+    """
+    scores = np.asarray(scores, dtype=float)
+    missing = np.isnan(scores)
+    probs = np.linspace(0, 1, n_quantiles + 1)[1:-1]
+
+    if not missing.any():
+        thresholds = np.quantile(scores, probs, axis=1)
+    else:
+        # NaNを末尾に並べ、行ごとの有効な個数から分位点の位置を線形補間で求める
+        ordered = np.sort(np.where(missing, np.inf, scores), axis=1)
+        n_valid = (~missing).sum(axis=1)
+        pos = probs[:, None] * np.maximum(n_valid - 1, 0)
+        lower = np.floor(pos).astype(np.intp)
+        upper = np.minimum(lower + 1, np.maximum(n_valid - 1, 0))
+        frac = pos - lower
+        rows = np.arange(len(scores))
+        lower_value = ordered[rows, lower]
+        upper_value = ordered[rows, upper]
+        with np.errstate(invalid='ignore'):
+            thresholds = lower_value + (upper_value - lower_value) * frac
+        thresholds[:, n_valid == 0] = np.nan
+
+    buckets = (scores[None, :, :] > thresholds[:, :, None]).sum(axis=0)
+    buckets[missing] = -1
+    return buckets
+
+
+def select_weights(scores, method: str = 'top', k: int = 1, n_quantiles: int = 5):
+    """
+    スコアから銘柄を選び、等ウェイトの重みを疎な形式で返す。
+
+    Args:
+        scores (np.ndarray): (T, N)のスコア。
+        method (str, optional): 選び方。
+            'top': 上位k銘柄をロング（合計1）
+            'bottom': 下位k銘柄をロング（合計1）
+            'long_short': 上位k銘柄をロング（合計0.5）、下位k銘柄をショート（合計-0.5）。
+                有効な銘柄が2k未満の日は、両方に入った銘柄の重みが相殺される。
+            'quantile': 最上位の分位バケットの銘柄をロング（合計1）
+        k (int, optional): 'top'、'bottom'、'long_short'で選ぶ銘柄数。
+        n_quantiles (int, optional): 'quantile'のバケット数。
+
+    Returns:
+        tuple: (行位置, 列位置, 重み)の配列。to_weight_frameでDataFrameに変換できる。
+    """
+    scores = np.asarray(scores, dtype=float)
+    n_rows = len(scores)
+
+    if method == 'top' or method == 'bottom':
+        rows, cols = top_k(scores, k, largest=(method == 'top'))
+        return rows, cols, _equal_weights(rows, n_rows, 1.0)
+    elif method == 'long_short':
+        long_rows, long_cols = top_k(scores, k, largest=True)
+        short_rows, short_cols = top_k(scores, k, largest=False)
+        rows = np.concatenate([long_rows, short_rows])
+        cols = np.concatenate([long_cols, short_cols])
+        weights = np.concatenate([_equal_weights(long_rows, n_rows, 0.5),
+                                  _equal_weights(short_rows, n_rows, -0.5)])
+        order = np.argsort(rows, kind='stable')
+        return rows[order], cols[order], weights[order]
+    elif method == 'quantile':
+        buckets = quantile_buckets(scores, n_quantiles)
+        rows, cols = np.nonzero(buckets == n_quantiles - 1)
+        return rows, cols, _equal_weights(rows, n_rows, 1.0)
+    else:
+        raise ValueError(f"Unsupported selection method: {method}")
+
+
+def _equal_weights(rows, n_rows, total):
+    """各行で選ばれた要素に合計totalの等ウェイトを割り当てる"""
+    counts = np.bincount(rows, minlength=n_rows)
+    return total / counts[rows]
+
+
+def to_weight_frame(rows, cols, weights, index, columns) -> pd.DataFrame:
+    """
+    疎な重みを(T, N)のDataFrameに変換する（選ばれなかった銘柄は0）。
+
+    Args:
+        rows, cols, weights (np.ndarray): select_weightsの戻り値。
+        index (pd.Index): 日付。
+        columns (pd.Index): 銘柄。
+
+    Returns:
+        pd.DataFrame: 重み。
+    """
+    dense = np.zeros((len(index), len(columns)))
+    np.add.at(dense, (rows, cols), weights)
+    return pd.DataFrame(dense, index=index, columns=columns)
@@ -0,0 +1,120 @@
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+# ワーカープロセス側で共有メモリから復元した価格データ
+_worker_shm = None
+_worker_price_data = None
+
+
+def expand_param_grid(param_grid) -> list:
+    """
+    パラメータグリッドを組み合わせのリストに展開する。
+
+    Args:
+        param_grid (dict or list): {'lookback': [20, 60], ...} 形式の辞書、またはその辞書のリスト。
+
+    Returns:
+        list: パラメータの辞書のリスト。
+    """
+    if isinstance(param_grid, dict):
+        param_grid = [param_grid]
+
+    combinations = []
+    for grid in param_grid:
+        keys = list(grid.keys())
+        for values in itertools.product(*(grid[key] for key in keys)):
+            combinations.append(dict(zip(keys, values)))
+    return combinations
+
+
+def _init_worker(shm_name, shape, dtype, index, columns):
+    """ワーカーの初期化。価格データは共有メモリをそのまま参照する"""
+    global _worker_shm, _worker_price_data
+    # 同じ親プロセスのリソーストラッカーを共有するため、接続しても親のunlinkと競合しない
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    values = np.ndarray(shape, dtype=dtype, buffer=_worker_shm.buf)
+    values.flags.writeable = False
+    _worker_price_data = pd.DataFrame(values, index=index, columns=columns, copy=False)
+
+
+def _evaluate_params(price_data, strategy_cls, params, strategy_kwargs, evaluate_kwargs) -> dict:
+    """1つのパラメータの組み合わせで戦略を構築して評価する"""
+    row = dict(params)
+    try:
+        strategy = strategy_cls(price_data, **strategy_kwargs, **params)
+        row.update(strategy.evaluate(**evaluate_kwargs))
+        row['error'] = None
+    except Exception as e:
+        row['error'] = f"{type(e).__name__}: {e}"
+    return row
+
+
+def _run_task(task):
+    func, args = task
+    return func(_worker_price_data, *args)
+
+
+def map_with_shared_prices(func, args_list: list, price_data: pd.DataFrame, n_jobs: int = None,
+                           chunksize: int = 1) -> list:
+    """
+    `func(price_data, *args)` をargs_listの各要素についてプロセスプールで実行する。
+
+    価格データは共有メモリに一度だけ置き、各タスクには引数のみを渡す。
+
+    Args:
+        func (callable): モジュールの最上位で定義された関数（pickle可能なもの）。
+        args_list (list): funcに渡す引数のタプルのリスト。
+        price_data (pd.DataFrame): 価格データ。
+        n_jobs (int, optional): ワーカー数。Noneの場合はCPU数。1の場合は直列に実行。
+        chunksize (int, optional): 1回にワーカーへ送るタスク数。
+
+    Returns:
+        list: args_listと同じ順序の実行結果。
+    """
+    if n_jobs == 1:
+        return [func(price_data, *args) for args in args_list]
+
+    values = np.ascontiguousarray(price_data.to_numpy(dtype=float))
+    shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    try:
+        np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf)[:] = values
+        initargs = (shm.name, values.shape, values.dtype.str, price_data.index, price_data.columns)
+        tasks = [(func, args) for args in args_list]
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=initargs) as executor:
+            return list(executor.map(_run_task, tasks, chunksize=chunksize))
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def parameter_sweep(strategy_cls, param_grid, price_data: pd.DataFrame, n_jobs: int = None,
+                    strategy_kwargs: dict = None, evaluate_kwargs: dict = None, chunksize: int = 1) -> pd.DataFrame:
+    """
+    戦略クラスのパラメータグリッドサーチをプロセスプールで並列実行する。
+
+    価格データは共有メモリに一度だけ置き、各タスクにはパラメータのみを渡す。
+
+    Args:
+        strategy_cls (type): BaseStrategyのサブクラス。
+        param_grid (dict or list): 探索するパラメータのグリッド。
+        price_data (pd.DataFrame): 価格データ。
+        n_jobs (int, optional): ワーカー数。Noneの場合はCPU数。1の場合は直列に実行。
+        strategy_kwargs (dict, optional): すべての組み合わせに共通のコンストラクタ引数。
+        evaluate_kwargs (dict, optional): evaluate()に渡す引数。
+        chunksize (int, optional): 1回にワーカーへ送る組み合わせ数。
+
+    Returns:
+        pd.DataFrame: パラメータとevaluate()の指標を1行1組み合わせでまとめたもの。
+            失敗した組み合わせはerror列にエラー内容が入る。
+    """
+    combinations = expand_param_grid(param_grid)
+    strategy_kwargs = strategy_kwargs if strategy_kwargs is not None else {}
+    evaluate_kwargs = evaluate_kwargs if evaluate_kwargs is not None else {}
+
+    args_list = [(strategy_cls, params, strategy_kwargs, evaluate_kwargs) for params in combinations]
+    results = map_with_shared_prices(_evaluate_params, args_list, price_data, n_jobs=n_jobs, chunksize=chunksize)
+    return pd.DataFrame(results)
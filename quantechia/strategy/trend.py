@@ -1,3 +1,4 @@
+from . import basestrategy
 from .basestrategy import BaseStrategy
 import pandas as pd
 
@@ -6,8 +7,8 @@ class TrendFollowingStrategy(BaseStrategy):
     Trend following strategy.
     """
 
-    def __init__(self, price_data: pd.DataFrame, window: int = 20, strategy_name: str = None):
-        super().__init__(price_data, strategy_name)
+    def __init__(self, price_data: pd.DataFrame, window: int = 20, strategy_name: str = None, **kwargs):
+        super().__init__(price_data, strategy_name=strategy_name, **kwargs)
         self.window = window
 
     def calculate_weight(self) -> pd.DataFrame:
@@ -20,6 +21,106 @@ class TrendFollowingStrategy(BaseStrategy):
 import pandas as pd
 import numpy as np
 from abc import ABC, abstractmethod
+from .selection import select_weights, to_weight_frame
+from ..sparse import SparseWeight
+
+
+def rolling_compound_return(rtn_data: pd.DataFrame, window: int) -> pd.DataFrame:
+    """
+    過去window期間の累積リターンを計算します。
+
+    `(1 + rtn).rolling(window).apply(np.prod, raw=True) - 1` と同じ結果（窓内にNaNがあればNaN）を、
+    log1pの移動和で求めます。
+
+    Args:
+        rtn_data: リターンデータ
+        window: 計算期間
+
+    Returns:
+        累積リターンのDataFrame
+    """
+    # -100%のリターンはlogが-infになるため、別に数えて累積リターンを-1にする
+    wiped_out = rtn_data == -1
+    log_growth = np.log1p(rtn_data.mask(wiped_out, 0.0))
+    score = np.expm1(log_growth.rolling(window=window).sum())
+    has_wiped_out = wiped_out.astype(float).rolling(window=window, min_periods=1).sum() > 0
+    return score.mask(has_wiped_out & score.notna(), -1.0)
+
+
+def rolling_mean_std(rtn_data: pd.DataFrame, mean_window: int, std_window: int):
+    """
+    移動平均と移動標準偏差を累積和から1回の走査で計算します。
+
+    `rtn_data.rolling(mean_window).mean()` と `rtn_data.rolling(std_window).std()` と同じく、
+    窓内にNaNがあればNaNになります。
+
+    Args:
+        rtn_data: リターンデータ
+        mean_window: 移動平均の期間
+        std_window: 移動標準偏差の期間
+
+    Returns:
+        (移動平均, 移動標準偏差) のDataFrameのタプル
+    """
+    values = rtn_data.to_numpy(dtype=float)
+    valid = ~np.isnan(values)
+    raw = np.where(valid, values, 0.0)
+    # 列平均を引いてから累積すると、2乗和からの分散計算で桁落ちしにくい
+    center = raw.sum(axis=0) / np.maximum(valid.sum(axis=0), 1)
+    x = np.where(valid, values - center, 0.0)
+
+    zeros = np.zeros((1, values.shape[1]))
+    cum_raw = np.concatenate([zeros, np.cumsum(raw, axis=0)])
+    cum_x = np.concatenate([zeros, np.cumsum(x, axis=0)])
+    cum_x2 = np.concatenate([zeros, np.cumsum(x * x, axis=0)])
+    cum_n = np.concatenate([zeros, np.cumsum(valid, axis=0)])
+
+    def window_sum(cum, window):
+        out = np.full(values.shape, np.nan)
+        if window <= len(values):
+            out[window - 1:] = cum[window:] - cum[:-window]
+        return out
+
+    n = window_sum(cum_n, mean_window)
+    mean = window_sum(cum_raw, mean_window) / mean_window
+    mean[n < mean_window] = np.nan
+
+    n = window_sum(cum_n, std_window)
+    sum_x = window_sum(cum_x, std_window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sq_dev = window_sum(cum_x2, std_window) - sum_x * sum_x / std_window
+        # 累積和の差の丸め誤差以下の偏差平方和は0とみなす（一定値の窓の標準偏差を0にする）
+        sq_dev[sq_dev <= 64 * np.finfo(float).eps * cum_x2[1:]] = 0.0
+        std = np.sqrt(sq_dev / (std_window - 1))
+    std[n < std_window] = np.nan
+
+    return (pd.DataFrame(mean, index=rtn_data.index, columns=rtn_data.columns),
+            pd.DataFrame(std, index=rtn_data.index, columns=rtn_data.columns))
+
+
+def top_k_mask(values: np.ndarray, k: int = 1) -> np.ndarray:
+    """
+    各行で値が大きい上位k列をTrueとするマスクを作成します。
+
+    NaNは選ばれず、同値の場合は左の列が優先されます（k=1の場合はidxmaxと同じ列）。
+
+    Args:
+        values: (T, N)の配列
+        k: 選ぶ列数
+
+    Returns:
+        (T, N)のbool配列
+    """
+    missing = np.isnan(values)
+    filled = np.where(missing, -np.inf, values)
+    if k == 1:
+        top = np.argmax(filled, axis=1)[:, None]
+    else:
+        top = np.argsort(-filled, axis=1, kind='stable')[:, :k]
+    mask = np.zeros(values.shape, dtype=bool)
+    np.put_along_axis(mask, top, True, axis=1)
+    return mask & ~missing
+
 
 class MomentumBaseStrategy(basestrategy.BaseStrategy, ABC):
     """
@@ -33,7 +134,13 @@ class MomentumBaseStrategy(basestrategy.BaseStrategy, ABC):
                  initial_capital: float = 1, 
                  shift_num: int = 1, 
                  cost: bool = True, 
-                 cost_unit: float = 0.0005):
+                 cost_unit: float = 0.0005,
+                 selection: str = 'top',
+                 n_select: int = 1,
+                 n_quantiles: int = 5,
+                 sparse: bool = False,
+                 dtype=None,
+                 profiler=None):
         """
         モメンタム戦略の基底クラスの初期化メソッド
         
@@ -46,9 +153,35 @@ class MomentumBaseStrategy(basestrategy.BaseStrategy, ABC):
             shift_num: シフト数
             cost: コスト考慮フラグ
             cost_unit: コスト単位
+            selection: スコアからの銘柄の選び方（'top'、'bottom'、'long_short'、'quantile'）
+            n_select: 'top'、'bottom'、'long_short'で選ぶ銘柄数
+            n_quantiles: 'quantile'の分位数（最上位の分位に投資）
+            sparse: Trueの場合、ウェイトをSparseWeightで返す
+            dtype: 価格・リターン・ウェイトの型（例：'float32'）。Noneの場合はfloat64
+            profiler: 処理段階ごとの時間を記録するProfiler（Trueの場合は新規作成）
         """
-        super().__init__(price_data, rtn_data, strategy_name, initial_capital, shift_num, cost, cost_unit)
+        super().__init__(price_data, rtn_data, strategy_name, initial_capital, shift_num, cost, cost_unit,
+                         dtype=dtype, profiler=profiler)
         self.window = window
+        self.selection = selection
+        self.n_select = n_select
+        self.n_quantiles = n_quantiles
+        self.sparse = sparse
+        self._rolling_stats = None
+    
+    def calculate_rolling_stats(self):
+        """
+        リターンの移動平均（window期間）と移動標準偏差（max(10, window)期間）を計算します。
+        結果は保持され、rtn_dataとwindowが変わらない限り再利用されます。
+        
+        Returns:
+            (移動平均, 移動標準偏差) のDataFrameのタプル
+        """
+        key = (self.window, len(self.rtn_data), self.rtn_data.index[-1] if len(self.rtn_data) else None)
+        if self._rolling_stats is None or self._rolling_stats[0] != key:
+            stats = rolling_mean_std(self.rtn_data, self.window, max(10, self.window))
+            self._rolling_stats = (key, stats)
+        return self._rolling_stats[1]
     
     @abstractmethod
     def calculate_momentum_score(self) -> pd.DataFrame:
@@ -103,9 +236,12 @@ class MomentumBaseStrategy(basestrategy.BaseStrategy, ABC):
         Returns:
             投資ウェイトのDataFrame
         """
-        # デフォルトは単純なベストファクター選択（派生クラスでオーバーライド可能）
-        best_factor = valid_score.idxmax(axis=1)
-        return pd.get_dummies(best_factor).astype(float)
+        # デフォルトは上位n_select銘柄への等ウェイト（n_select=1でベストファクター選択）
+        rows, cols, weights = select_weights(valid_score.to_numpy(dtype=float), self.selection,
+                                             self.n_select, self.n_quantiles)
+        if self.sparse:
+            return SparseWeight.from_coo(rows, cols, weights, valid_score.index, valid_score.columns)
+        return to_weight_frame(rows, cols, weights, valid_score.index, valid_score.columns)
 
 
 class MomentumStrategy(MomentumBaseStrategy):
@@ -120,7 +256,7 @@ class MomentumStrategy(MomentumBaseStrategy):
             モメンタムスコアのDataFrame
         """
         # モメンタムスコア：過去window期間の累積リターン
-        return (1 + self.rtn_data).rolling(window=self.window).apply(np.prod, raw=True) - 1
+        return rolling_compound_return(self.rtn_data, self.window)
 
 
 class MomentumStrategyRR(MomentumBaseStrategy):
@@ -134,8 +270,7 @@ class MomentumStrategyRR(MomentumBaseStrategy):
         Returns:
             モメンタムスコアのDataFrame
         """
-        rolling_mean = self.rtn_data.rolling(window=self.window).mean()
-        rolling_std = self.rtn_data.rolling(window=max(10, self.window)).std()
+        rolling_mean, rolling_std = self.calculate_rolling_stats()
         # リターン/リスク比を返す
         return rolling_mean / rolling_std
 
@@ -190,11 +325,14 @@ class MomentumStrategyLongShort(MomentumBaseStrategy):
                  rtn_data: pd.DataFrame = None,
                  window: int = 12, 
                  alpha: float = 1,
+                 top_k: int = 1,
                  strategy_name: str = None, 
                  initial_capital: float = 1, 
                  shift_num: int = 1, 
                  cost: bool = True, 
-                 cost_unit: float = 0.0005):
+                 cost_unit: float = 0.0005,
+                 dtype=None,
+                 profiler=None):
         """
         ロングショート型モメンタム戦略の初期化メソッド
         
@@ -203,14 +341,19 @@ class MomentumStrategyLongShort(MomentumBaseStrategy):
             rtn_data: リターンデータ
             window: モメンタムの計算期間
             alpha: 直近リターントップに対するボーナス係数
+            top_k: ボーナスを加える直近リターン上位のファクター数
             strategy_name: 戦略名
             initial_capital: 初期資本
             shift_num: シフト数
             cost: コスト考慮フラグ
             cost_unit: コスト単位
+            dtype: 価格・リターン・ウェイトの型（例：'float32'）。Noneの場合はfloat64
+            profiler: 処理段階ごとの時間を記録するProfiler（Trueの場合は新規作成）
         """
-        super().__init__(price_data, rtn_data, window, strategy_name, initial_capital, shift_num, cost, cost_unit)
+        super().__init__(price_data, rtn_data, window, strategy_name, initial_capital, shift_num, cost, cost_unit,
+                         dtype=dtype, profiler=profiler)
         self.alpha = alpha
+        self.top_k = top_k
     
     def calculate_momentum_score(self) -> pd.DataFrame:
         """
@@ -220,25 +363,18 @@ class MomentumStrategyLongShort(MomentumBaseStrategy):
             モメンタムスコアのDataFrame
         """
         # リターン/リスク比の計算
-        rolling_mean = self.rtn_data.rolling(window=self.window).mean()
-        rolling_std = self.rtn_data.rolling(window=max(10, self.window)).std()
+        rolling_mean, rolling_std = self.calculate_rolling_stats()
         rr_score = rolling_mean / (rolling_std + 1e-8)
         rr_score = rr_score.clip(0, 1.5)
         
         # 直近1ヶ月のリターンを取得
         recent_return = self.rtn_data.shift(1)
         
-        # NaN行を除外してトップファクターを取得
-        top_factors = recent_return.dropna(how='all').idxmax(axis=1)
-        
-        # 補正マスクを作成
-        bonus = pd.DataFrame(0, index=rr_score.index, columns=rr_score.columns)
-        for date, factor in top_factors.items():
-            if factor in bonus.columns:
-                bonus.at[date, factor] = 1
+        # 直近リターン上位のファクターを1とする補正マスクを作成（NaNのみの行は0）
+        bonus = top_k_mask(recent_return.to_numpy(dtype=float), self.top_k)
         
         # 補正スコアの加算（ボーナスを加える）
-        return rr_score + self.alpha * bonus
+        return pd.DataFrame(rr_score.to_numpy() + self.alpha * bonus, index=rr_score.index, columns=rr_score.columns)
     
     def convert_score_to_weight(self, valid_score: pd.DataFrame) -> pd.DataFrame:
         """
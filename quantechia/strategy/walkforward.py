@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+
+from .. import metrics
+from .sweep import expand_param_grid, map_with_shared_prices
+
+
+def walk_forward_splits(index: pd.Index, train_size: int, test_size: int, step: int = None,
+                        expanding: bool = False) -> list:
+    """
+    ウォークフォワード（ローリングオリジン）の学習期間と検証期間の組を作成する。
+
+    Args:
+        index (pd.Index): 日付のインデックス。
+        train_size (int): 学習期間の行数。expanding=Trueの場合は最初の学習期間の行数。
+        test_size (int): 検証期間の行数。最後の検証期間はこれより短い場合がある。
+        step (int, optional): 次の組までにずらす行数。Noneの場合はtest_size（検証期間が重ならない）。
+        expanding (bool, optional): Trueの場合は学習期間の開始を固定して拡大していく。
+
+    Returns:
+        list: (学習期間の日付, 検証期間の日付) のリスト。
+    """
+    if train_size <= 0 or test_size <= 0:
+        raise ValueError("train_size と test_size は正の整数で指定してください。")
+    step = step if step is not None else test_size
+    if step <= 0:
+        raise ValueError("step は正の整数で指定してください。")
+
+    splits = []
+    for train_end in range(train_size, len(index), step):
+        train_start = 0 if expanding else train_end - train_size
+        splits.append((index[train_start:train_end], index[train_end:train_end + test_size]))
+    return splits
+
+
+def _strategy_returns(price_data, strategy_cls, params, strategy_kwargs, return_kwargs, stop=None) -> tuple:
+    """
+    戦略のリターンとウェイトを計算する。stopを指定した場合はその行より前の価格データのみを使う。
+
+    Returns:
+        tuple: (リターン, ウェイト, エラー内容)
+    """
+    try:
+        data = price_data if stop is None else price_data.iloc[:stop]
+        strategy = strategy_cls(data, **strategy_kwargs, **params)
+        rtn = strategy.calculate_returns(**return_kwargs)
+        if isinstance(rtn, pd.DataFrame):
+            rtn = rtn.squeeze(axis=1)
+        return rtn, strategy.weight, None
+    except Exception as e:
+        return None, None, f"{type(e).__name__}: {e}"
+
+
+def _between(data, dates: pd.Index):
+    """dataのうちdatesの最初から最後までの行（DataFrame、Series、SparseWeight）"""
+    return data.iloc[data.index.slice_indexer(dates[0], dates[-1])]
+
+
+def walk_forward(strategy_cls, price_data: pd.DataFrame, train_size: int, test_size: int, param_grid=None,
+                 step: int = None, expanding: bool = False, metric: str = 'sharpe_ratio', refit: bool = False,
+                 n_jobs: int = None, strategy_kwargs: dict = None, return_kwargs: dict = None,
+                 rf: float = 0.0, periods: int = 252, freq: str = 'ME', chunksize: int = 1) -> dict:
+    """
+    戦略をウォークフォワードで評価する。
+
+    各組の学習期間でmetricが最大になるパラメータを選び、その直後の検証期間のリターンで評価します。
+    param_gridを指定しない場合は、strategy_kwargsの戦略をそのまま各検証期間で評価します。
+
+    refit=Falseの場合は、パラメータの組み合わせごとに全期間の戦略を1回だけ計算し、
+    各組の学習・検証期間はそのリターンから切り出します。重みの計算は過去のデータのみを使うため
+    検証期間の結果は組ごとに計算し直した場合と同じで、重なった窓のリターンや共分散を何度も計算しません。
+    全期間のデータを使う戦略（例：全期間の統計量で正規化するもの）ではrefit=Trueを指定してください。
+    組ごとに検証期間の最後までの価格データで戦略を作り直し、（組 × パラメータ）を並列に計算します。
+
+    いずれの場合も価格データは共有メモリに一度だけ置き、プロセスプールで並列に計算します。
+
+    Args:
+        strategy_cls (type): BaseStrategyのサブクラス。
+        price_data (pd.DataFrame): 価格データ。
+        train_size (int): 学習期間の行数。
+        test_size (int): 検証期間の行数。
+        param_grid (dict or list, optional): 学習期間で選ぶパラメータのグリッド。
+        step (int, optional): 次の組までにずらす行数。Noneの場合はtest_size。
+        expanding (bool, optional): Trueの場合は学習期間を拡大していく。
+        metric (str, optional): パラメータの選択に使う指標（metrics.METRICSのいずれか、大きいほど良い）。
+        refit (bool, optional): Trueの場合は組ごとに戦略を計算し直す。
+        n_jobs (int, optional): ワーカー数。Noneの場合はCPU数。1の場合は直列に実行。
+        strategy_kwargs (dict, optional): すべての戦略に共通のコンストラクタ引数。
+        return_kwargs (dict, optional): calculate_returns()に渡す引数（例：{'mode': 'daily'}）。
+        rf (float, optional): 年率のリスクフリーレート。
+        periods (int, optional): 1年あたりの期間数。
+        freq (str, optional): 回転率の集計頻度。
+        chunksize (int, optional): 1回にワーカーへ送るタスク数。
+
+    Returns:
+        dict: 'folds'（組ごとの期間、選ばれたパラメータ、学習期間の指標、検証期間の指標、error列）、
+            'returns'（検証期間のリターンをつないだもの。検証期間が重なる場合は後の組を使う）、
+            'metrics'（つないだリターンの指標）を含む辞書。
+    """
+    if metric not in metrics.METRICS[:-1]:
+        raise ValueError(f"Unsupported metric: {metric}")
+    splits = walk_forward_splits(price_data.index, train_size, test_size, step=step, expanding=expanding)
+    if not splits:
+        raise ValueError("price_data の行数が train_size より少ないため、検証期間を作れません。")
+
+    combinations = expand_param_grid(param_grid) if param_grid is not None else [{}]
+    strategy_kwargs = strategy_kwargs if strategy_kwargs is not None else {}
+    return_kwargs = return_kwargs if return_kwargs is not None else {}
+
+    if refit:
+        args_list = [(strategy_cls, params, strategy_kwargs, return_kwargs,
+                      price_data.index.get_loc(test[-1]) + 1)
+                     for _, test in splits for params in combinations]
+    else:
+        args_list = [(strategy_cls, params, strategy_kwargs, return_kwargs) for params in combinations]
+    results = map_with_shared_prices(_strategy_returns, args_list, price_data, n_jobs=n_jobs, chunksize=chunksize)
+
+    rows = []
+    oos_returns = []
+    for k, (train, test) in enumerate(splits):
+        runs = results[k * len(combinations):(k + 1) * len(combinations)] if refit else results
+        row = {'fold': k, 'train_start': train[0], 'train_end': train[-1],
+               'test_start': test[0], 'test_end': test[-1]}
+
+        valid = [j for j, (rtn, _, _) in enumerate(runs) if rtn is not None]
+        if not valid:
+            rows.append({**row, 'error': runs[0][2]})
+            continue
+        train_rtn = pd.concat({j: _between(runs[j][0], train) for j in valid}, axis=1)
+        scores = metrics.summary(train_rtn, rf=rf, periods=periods)[metric].to_numpy()
+        if np.isnan(scores).all():
+            rows.append({**row, 'error': f"学習期間の {metric} を計算できません。"})
+            continue
+        best = valid[int(np.nanargmax(scores))]
+
+        rtn, weight, _ = runs[best]
+        test_rtn = _between(rtn, test)
+        test_metrics = metrics.summary(test_rtn, weights=[_between(weight, test)], rf=rf, periods=periods,
+                                       freq=freq).iloc[0]
+        row.update(combinations[best])
+        row[f'train_{metric}'] = float(np.nanmax(scores))
+        row.update(test_metrics.to_dict())
+        row['error'] = None
+        rows.append(row)
+        oos_returns.append(test_rtn)
+
+    if oos_returns:
+        stitched = pd.concat(oos_returns)
+        stitched = stitched[~stitched.index.duplicated(keep='last')].sort_index()
+        stitched.name = 'walk_forward'
+        oos_metrics = metrics.summary(stitched, rf=rf, periods=periods).iloc[0].drop('turnover', errors='ignore')
+        oos_metrics = oos_metrics.to_dict()
+    else:
+        stitched, oos_metrics = pd.Series(dtype=float, name='walk_forward'), {}
+
+    return {'folds': pd.DataFrame(rows), 'returns': stitched, 'metrics': oos_metrics}
@@ -1,7 +1,21 @@
+import numpy as np
 import pandas as pd
+from .sparse import SparseWeight
+
+def _sum_rows(frame: pd.DataFrame) -> pd.Series:
+    """行ごとの合計（NaNは無視）。float32のデータでも誤差が蓄積しないようfloat64で合計する"""
+    return pd.Series(np.nansum(frame.to_numpy(), axis=1, dtype=np.float64), index=frame.index)
+
+def _densify_active(price_data, weight_data):
+    """SparseWeightの場合は、保有したことのある銘柄の列だけを密なDataFrameにする"""
+    if isinstance(weight_data, SparseWeight):
+        columns = weight_data.active_columns()
+        return price_data.reindex(columns=columns), weight_data.to_dense(columns)
+    return price_data, weight_data
 
 def calculate_daily_weight(price_data, weight_data):
-    """ドリフトしたウェイトを計算"""
+    """ドリフトしたウェイトを計算（SparseWeightの場合は保有したことのある銘柄のみ）"""
+    price_data, weight_data = _densify_active(price_data, weight_data)
     rebalance_dates = weight_data.index
     index_range = price_data.loc[rebalance_dates[0]:].index
     base_price = price_data.loc[rebalance_dates].reindex(index_range).ffill()
@@ -43,7 +57,8 @@ def calc_daily_rtn(price_data, weight_data, shift_num=1, cost=True, cost_unit=0.
     # 累積をリバランス日にリセット
     reset_point = daily_rtn_cum.copy()
     reset_point.loc[rebalance_dates] = weight_data.loc[rebalance_dates]
-    daily_rtn  = daily_rtn_cum.div(reset_point.sum(axis=1).shift(shift_num), axis=0) -weights
+    reset_sum = _sum_rows(reset_point).astype(np.result_type(*reset_point.dtypes))
+    daily_rtn  = daily_rtn_cum.div(reset_sum.shift(shift_num), axis=0) -weights
 
     if cost:
         cost_data = weight_data.reindex(index_range).ffill().diff().abs() * cost_unit
@@ -52,14 +67,130 @@ def calc_daily_rtn(price_data, weight_data, shift_num=1, cost=True, cost_unit=0.
     
     return daily_rtn
 
-def calculate_return(price_data, weight_data, mode=None, shift_num=1, cost=True, cost_unit=0.0005) -> pd.DataFrame:
+def _ffill(values: np.ndarray) -> np.ndarray:
+    """2次元配列を行方向に前方補完（DataFrame.ffill相当）"""
+    rows = np.where(np.isnan(values), 0, np.arange(len(values))[:, None])
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return values[rows, np.arange(values.shape[1])]
+
+def _bfill(values: np.ndarray) -> np.ndarray:
+    """2次元配列を行方向に後方補完（DataFrame.bfill相当）"""
+    return _ffill(values[::-1])[::-1]
+
+def _shift(values: np.ndarray, periods: int) -> np.ndarray:
+    """行方向のシフト（DataFrame.shift相当）"""
+    shifted = np.full(values.shape, np.nan, dtype=values.dtype)
+    if periods > 0:
+        shifted[periods:] = values[:len(values) - periods]
+    elif periods < 0:
+        shifted[:periods] = values[-periods:]
+    else:
+        shifted[:] = values
+    return shifted
+
+def _to_arrays(price_data, weight_data, dtype=None):
+    """価格とウェイトを同じ列順の連続したfloat配列（dtypeがNoneの場合はfloat64）に変換"""
+    dtype = np.float64 if dtype is None else dtype
+    columns = price_data.columns
+    if not columns.equals(weight_data.columns):
+        # pandasの演算と同じく列の和集合に揃える
+        columns = columns.union(weight_data.columns)
+        price_data = price_data.reindex(columns=columns)
+        weight_data = weight_data.reindex(columns=columns)
+    prices = np.ascontiguousarray(price_data.to_numpy(dtype=dtype))
+    weights = np.ascontiguousarray(weight_data.to_numpy(dtype=dtype))
+    return columns, prices, weights
+
+def calc_rtn_np(price_data, weight_data, shift_num=1, cost=True, cost_unit=0.0005, dtype=None):
+    """リバランス日間の実現リターン（NumPy版、calc_rtnと同じ結果）"""
+    columns, prices, weights = _to_arrays(price_data, weight_data, dtype)
+    rebalance_dates = weight_data.index
+    price_index = price_data.index
+
+    # resample('D').ffill()の代わりに、各リバランス日以前の最終価格の位置を求める
+    out_of_range = (rebalance_dates < price_index[0]) | (rebalance_dates > price_index[-1])
+    if out_of_range.any():
+        raise KeyError(f"{list(rebalance_dates[out_of_range])} not in index")
+    pos = price_index.searchsorted(rebalance_dates, side='right') - 1
+
+    rebalance_prices = prices[pos]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rtn = rebalance_prices / _shift(rebalance_prices, 1) - 1
+        rtn *= _shift(weights, shift_num)
+        if cost:
+            rtn -= np.abs(weights - _shift(weights, 1)) * cost_unit
+
+    return pd.DataFrame(rtn, index=rebalance_dates, columns=columns)
+
+def calc_daily_rtn_np(price_data, weight_data, shift_num=1, cost=True, cost_unit=0.0005, dtype=None):
+    """累積リターンから日次リターンを計算（NumPy版、calc_daily_rtnと同じ結果）"""
+    columns, prices, weights = _to_arrays(price_data, weight_data, dtype)
+    rebalance_dates = weight_data.index
+    price_index = price_data.index
+
+    pos = price_index.get_indexer(rebalance_dates)
+    if (pos < 0).any():
+        raise KeyError(f"{list(rebalance_dates[pos < 0])} not in index")
+
+    # リバランス日以降の行だけを扱い、各行が属するリバランス区間の番号を求める
+    start = pos[0]
+    index_range = price_index[start:]
+    prices = prices[start:]
+    local_pos = pos - start
+    segment = np.searchsorted(local_pos, np.arange(len(index_range)), side='right') - 1
+
+    # 区間ごとの値（リバランス日数分の小さな配列）を前方補完してから行に展開
+    base_price = _bfill(_shift(_ffill(prices[local_pos])[segment], shift_num))
+    raw_weight = _ffill(weights)[segment]
+    shifted_weight = _shift(raw_weight, shift_num)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        daily_rtn = prices / base_price
+        daily_rtn *= shifted_weight
+
+        # 累積をリバランス日にリセット
+        # float32のデータでも誤差が蓄積しないよう、行の合計はfloat64で計算する
+        reset_sum = np.nansum(daily_rtn, axis=1, dtype=np.float64)
+        reset_sum[local_pos] = np.nansum(weights, axis=1, dtype=np.float64)
+        daily_rtn /= _shift(reset_sum[:, None], shift_num)
+        daily_rtn -= shifted_weight
+
+        if cost:
+            daily_rtn -= np.abs(raw_weight - _shift(raw_weight, 1)) * cost_unit
+
+    return pd.DataFrame(daily_rtn, index=index_range, columns=columns)
+
+def calculate_return(price_data, weight_data, mode=None, shift_num=1, cost=True, cost_unit=0.0005, engine='pandas',
+                     dtype=None) -> pd.DataFrame:
     """
     リターンを計算する。
 
+    Args:
+        weight_data (pd.DataFrame or SparseWeight): ウェイト。SparseWeightの場合は
+            保有したことのある銘柄の列だけで計算し、銘柄別リターンもその列のみを返す。
+        engine (str): 'pandas' または 'numpy'。'numpy'は配列ベースの計算で同じ結果を返す。
+        dtype (optional): 銘柄別リターンと中間データの型（例：'float32'）。Noneの場合は入力の型のまま
+            （numpyエンジンではfloat64）。ポートフォリオのリターンはfloat64で返す。
 
     Returns:
         pd.DataFrame: リターンデータ。
     """
+    price_data, weight_data = _densify_active(price_data, weight_data)
+    if engine == 'numpy':
+        if mode == 'daily':
+            returns = calc_daily_rtn_np(price_data, weight_data, shift_num, cost, cost_unit, dtype)
+        else:
+            returns = calc_rtn_np(price_data, weight_data, shift_num, cost, cost_unit, dtype)
+        values = returns.to_numpy()
+        valid = ~np.isnan(values).all(axis=1)
+        return returns, pd.Series(np.nansum(values[valid], axis=1, dtype=np.float64), index=returns.index[valid])
+    elif engine != 'pandas':
+        raise ValueError(f"Unsupported engine: {engine}")
+
+    if dtype is not None:
+        price_data = price_data.astype(dtype)
+        weight_data = weight_data.astype(dtype)
+
     if mode == 'daily':
         # 日次リターンを計算
         returns = calc_daily_rtn(price_data, weight_data, shift_num, cost, cost_unit)
@@ -67,7 +198,7 @@ def calculate_return(price_data, weight_data, mode=None, shift_num=1, cost=True,
     else:
         returns = calc_rtn(price_data, weight_data, shift_num, cost, cost_unit)
 
-    return returns, returns.dropna(how='all').sum(axis=1)
+    return returns, _sum_rows(returns.dropna(how='all'))
 
 def calculate_portfolio(returns: pd.DataFrame, initial_capital: float) -> pd.DataFrame:
     """
@@ -80,92 +211,31 @@ def calculate_portfolio(returns: pd.DataFrame, initial_capital: float) -> pd.Dat
     Returns:
         pd.DataFrame: ポートフォリオデータ。
     """
-    # ポートフォリオの価値を計算
+    # ポートフォリオの価値を計算（float32のリターンでも累積はfloat64で行う）
     if isinstance(returns, pd.Series):
-        portfolio = (1 + returns).cumprod() * initial_capital
+        portfolio = (1 + returns.astype(np.float64)).cumprod() * initial_capital
     else:
-        portfolio = (1 + returns.sum(axis=1)).cumprod() * initial_capital
+        portfolio = (1 + returns.sum(axis=1).astype(np.float64)).cumprod() * initial_capital
 
     return portfolio
 
     
-def calculate_sharpe_ratio(returns: pd.DataFrame, risk_free_rate: float = 0.0) -> float:
-    """
-    シャープレシオを計算する。
-
-    Args:
-        returns (pd.DataFrame): リターンデータ。
-        risk_free_rate (float): リスクフリーレート。
-
-    Returns:
-        float: シャープレシオ。
-    """
-    # 平均リターンを計算
-    mean_return = returns.mean().sum()
-
-    # リターンの標準偏差を計算
-    std_dev = returns.std().sum()
-
-    # シャープレシオを計算
-    sharpe_ratio = (mean_return - risk_free_rate) / std_dev
-
-    return sharpe_ratio
-
-def calculate_max_drawdown( portfolio: pd.Series) -> float:
-    """
-    最大ドローダウンを計算する。
-
-    Args:
-        portfolio (pd.Series): ポートフォリオデータ。
-
-    Returns:
-        float: 最大ドローダウン。
-    """
-    # 累積最大値を計算
-    cumulative_max = portfolio.cummax()
-
-    # ドローダウンを計算
-    drawdown = portfolio / cumulative_max - 1
-
-    # 最大ドローダウンを計算
-    max_drawdown = drawdown.min()
-
-    return max_drawdown
-
-def calculate_winning_rate( returns: pd.DataFrame) -> float:
-    """
-    勝率を計算する。
-
-    Args:
-        returns (pd.DataFrame): リターンデータ。
-
-    Returns:
-        float: 勝率。
-    """
-    # 1日ごとのリターンがプラスの日を数える
-    winning_days = (returns.sum(axis=1) > 0).sum()
-
-    # 全体の取引日数を計算
-    total_days = len(returns)
-
-    # 勝率を計算
-    winning_rate = winning_days / total_days
-
-    return winning_rate
-
 def calculate_turnover(weight: pd.DataFrame, freq='ME') -> pd.DataFrame:
     """
     回転率を計算する。
 
     Args:
-        weight (pd.DataFrame): ウェイトデータ。
+        weight (pd.DataFrame or SparseWeight): ウェイトデータ。
         freq (str): 集計頻度。デフォルトは'M'（月次）。
 
     Returns:
         pd.DataFrame: 回転率データ。
     """
     # ウェイトの変化を計算
-    weight_change = weight.diff().abs().sum(axis=1)
+    if isinstance(weight, SparseWeight):
+        weight_change = pd.Series(weight.diff_abs_sum(), index=weight.index)
+    else:
+        weight_change = weight.diff().abs().sum(axis=1)
 
     # 集計頻度に基づいて回転率を計算
     turnover = weight_change.resample(freq).sum().mean()
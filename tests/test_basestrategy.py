@@ -1,6 +1,7 @@
 import unittest
+import numpy as np
 import pandas as pd
-from quantechia.strategies import basestrategy
+from quantechia.strategy import basestrategy
 
 class TestBaseStrategy(unittest.TestCase):
     def test_base_strategy_initialization(self):
@@ -21,5 +22,100 @@ class TestBaseStrategy(unittest.TestCase):
         with self.assertRaises(NotImplementedError):
             strategy.calculate_weight()
 
+class TestAppend(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        dates = pd.bdate_range('2020-01-01', periods=200)
+        prices = np.exp(np.cumsum(rng.normal(0, 0.01, (len(dates), 4)), axis=0)) * 100
+        self.prices_df = pd.DataFrame(prices, index=dates, columns=['A', 'B', 'C', 'D'])
+
+    def assert_append_matches_rebuild(self, make_strategy, n_new=5, **kwargs):
+        strategy = make_strategy(self.prices_df.iloc[:-n_new])
+        strategy.calculate_returns(**kwargs)
+        for k in range(n_new, 0, -1):
+            # 1行ずつ追加する
+            strategy.append(self.prices_df.iloc[-k:len(self.prices_df) - k + 1])
+
+        rebuilt = make_strategy(self.prices_df)
+        rebuilt.calculate_returns(**kwargs)
+        pd.testing.assert_frame_equal(strategy.rtn_data, rebuilt.rtn_data, check_freq=False)
+        pd.testing.assert_frame_equal(strategy.weight, rebuilt.weight, check_freq=False)
+        pd.testing.assert_frame_equal(strategy.rtn_by_asset, rebuilt.rtn_by_asset, check_freq=False)
+        pd.testing.assert_series_equal(strategy.rtn, rebuilt.rtn, check_freq=False)
+        pd.testing.assert_series_equal(strategy.port, rebuilt.port, check_freq=False)
+
+    def test_append_equal_weight(self):
+        # テストケース1：均等ウェイト（日次モード）
+        self.assert_append_matches_rebuild(basestrategy.EqualWeightStrategy, mode='daily')
+
+    def test_append_rebalance(self):
+        # テストケース2：整数頻度のリバランス（リバランス日間リターン）
+        def make_strategy(prices):
+            return basestrategy.RebalanceStrategy(prices, rebalance_freq=3, lookback=20)
+        self.assert_append_matches_rebuild(make_strategy, n_new=7)
+
+    def test_append_rebalance_daily(self):
+        # テストケース3：整数頻度のリバランス（日次モード）
+        def make_strategy(prices):
+            return basestrategy.RebalanceStrategy(prices, rebalance_freq=3, lookback=20, shift_num=2)
+        self.assert_append_matches_rebuild(make_strategy, n_new=7, mode='daily')
+
+    def test_append_weekly(self):
+        # テストケース5：週次のリバランスで最後の週のリバランス日が追加した日付に移る場合も同じ結果になる
+        for cov_method in ('rolling', 'ewma'):
+            def make_strategy(prices):
+                return basestrategy.RebalanceStrategy(prices, rebalance_freq='W', lookback=20, cov_method=cov_method)
+            self.assert_append_matches_rebuild(make_strategy, n_new=7)
+            self.assert_append_matches_rebuild(make_strategy, n_new=7, mode='daily', shift_num=0)
+
+    def test_append_reuses_covariance(self):
+        # テストケース6：共分散の計算は保持したまま追加した行だけを渡す
+        strategy = basestrategy.RebalanceStrategy(self.prices_df.iloc[:-3], rebalance_freq=3, lookback=20,
+                                                  cov_method='ewma')
+        strategy.calculate_returns()
+        engine = strategy._cov_engine
+        strategy.append(self.prices_df.iloc[-3:])
+        self.assertIs(strategy._cov_engine, engine)
+        self.assertEqual(len(engine), len(strategy.rtn_data))
+
+    def test_append_before_calculation(self):
+        # テストケース4：未計算の段階ではデータのみ追加する
+        strategy = basestrategy.EqualWeightStrategy(self.prices_df.iloc[:-1])
+        strategy.append(self.prices_df.iloc[-3:])
+        pd.testing.assert_frame_equal(strategy.price_data, self.prices_df, check_freq=False)
+        self.assertIsNone(strategy.weight)
+        self.assertIsNone(strategy.rtn)
+
+
+class TestDtype(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        dates = pd.bdate_range('2020-01-01', periods=500)
+        self.prices_df = pd.DataFrame(np.exp(np.cumsum(rng.normal(0, 0.01, (500, 10)), axis=0)), index=dates)
+
+    def test_float32(self):
+        # テストケース1：float32でもfloat64と同じリターンになり、ポートフォリオはfloat64で累積する
+        for engine in ('pandas', 'numpy'):
+            for mode in (None, 'daily'):
+                expected = basestrategy.RebalanceStrategy(self.prices_df, rebalance_freq=5, lookback=60)
+                expected.calculate_returns(mode=mode, engine=engine)
+                strategy = basestrategy.RebalanceStrategy(self.prices_df, rebalance_freq=5, lookback=60, dtype='float32')
+                strategy.calculate_returns(mode=mode, engine=engine)
+
+                self.assertTrue((strategy.price_data.dtypes == np.float32).all())
+                self.assertTrue((strategy.weight.dtypes == np.float32).all())
+                self.assertTrue((strategy.rtn_by_asset.dtypes == np.float32).all())
+                self.assertEqual(strategy.port.dtype, np.float64)
+                np.testing.assert_allclose(strategy.port, expected.port, rtol=1e-5)
+
+    def test_float32_append(self):
+        # テストケース2：追加したデータもfloat32のまま
+        strategy = basestrategy.EqualWeightStrategy(self.prices_df.iloc[:-5], dtype='float32')
+        strategy.calculate_returns(mode='daily', engine='numpy')
+        strategy.append(self.prices_df.iloc[-5:])
+        self.assertTrue((strategy.price_data.dtypes == np.float32).all())
+        self.assertEqual(len(strategy.port), len(self.prices_df) - 1)
+
+
 if __name__ == '__main__':
     unittest.main()
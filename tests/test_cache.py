@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from quantechia.cache import OptimizationCache, make_cache_key
+from quantechia.strategy.basestrategy import RebalanceStrategy
+from quantechia.strategy import risk
+
+
+class CountingStrategy(RebalanceStrategy):
+    """calculate_current_weightの呼び出し回数を数える戦略"""
+    calls = 0
+
+    def calculate_current_weight(self, window_rtn, cov_matrix=None):
+        CountingStrategy.calls += 1
+        return super().calculate_current_weight(window_rtn, cov_matrix)
+
+
+class TestOptimizationCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'cache.sqlite')
+        rng = np.random.default_rng(0)
+        idx = pd.bdate_range('2020-01-01', periods=120)
+        self.price = pd.DataFrame(np.exp(np.cumsum(rng.normal(0, 0.01, (120, 3)), axis=0)),
+                                  index=idx, columns=list('abc'))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_key(self):
+        # テストケース1：入力とパラメータが同じなら同じキー、異なれば異なるキー
+        x = np.arange(6.0).reshape(2, 3)
+        key = make_cache_key('opt', x, {'a': 1, 'b': {'c': 2}})
+        self.assertEqual(key, make_cache_key('opt', x.copy(), {'b': {'c': 2}, 'a': 1}))
+        self.assertNotEqual(key, make_cache_key('opt', x + 1e-12, {'a': 1, 'b': {'c': 2}}))
+        self.assertNotEqual(key, make_cache_key('opt', x, {'a': 2, 'b': {'c': 2}}))
+        self.assertNotEqual(key, make_cache_key('other', x, {'a': 1, 'b': {'c': 2}}))
+
+    def test_hit_and_miss(self):
+        # テストケース2：2回目はキャッシュから返され、別のインスタンスからも読める
+        cache = OptimizationCache(self.path)
+        calls = []
+        func = lambda: calls.append(1) or np.array([0.2, 0.8])
+        np.testing.assert_array_equal(cache.get_or_compute('opt', np.ones(3), {}, func), [0.2, 0.8])
+        np.testing.assert_array_equal(cache.get_or_compute('opt', np.ones(3), {}, func), [0.2, 0.8])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        other = OptimizationCache(self.path)
+        np.testing.assert_array_equal(other.get_or_compute('opt', np.ones(3), {}, func), [0.2, 0.8])
+        self.assertEqual(len(calls), 1)
+
+    def test_lru_eviction(self):
+        # テストケース3：上限を超えると最後に使われたのが古いものから削除される
+        cache = OptimizationCache(self.path, max_bytes=3 * 8 * 4)
+        for k in range(3):
+            cache.set(str(k), np.full(4, k))
+        cache.get('0')
+        cache.set('3', np.full(4, 3))
+        self.assertIsNone(cache.get('1'))
+        for k in ('0', '2', '3'):
+            self.assertIsNotNone(cache.get(k))
+        self.assertEqual(cache.stats()['bytes'], 3 * 8 * 4)
+
+    def test_strategy_rerun_skips_solver(self):
+        # テストケース4：同じ入力で再計算するとcalculate_current_weightは呼ばれず、結果も一致する
+        CountingStrategy.calls = 0
+        first = CountingStrategy(self.price, lookback=20, rebalance_freq=5, cache=OptimizationCache(self.path))
+        w1 = first.calculate_weight()
+        n_calls = CountingStrategy.calls
+        self.assertGreater(n_calls, 0)
+
+        second = CountingStrategy(self.price, lookback=20, rebalance_freq=5, cache=OptimizationCache(self.path))
+        w2 = second.calculate_weight()
+        self.assertEqual(CountingStrategy.calls, n_calls)
+        self.assertEqual(second.cache.misses, 0)
+        pd.testing.assert_frame_equal(w1, w2)
+
+        third = CountingStrategy(self.price, lookback=30, rebalance_freq=5, cache=OptimizationCache(self.path))
+        third.calculate_weight()
+        self.assertGreater(CountingStrategy.calls, n_calls)
+
+    def test_risk_parity_scipy(self):
+        # テストケース5：バッチソルバーでもキャッシュの結果と一致する
+        for solver in ('newton', 'batch'):
+            cache = OptimizationCache(self.path)
+            w1 = risk.RiskParityStrategyScipy(self.price, lookback=20, solver=solver, cache=cache).calculate_weight()
+            w2 = risk.RiskParityStrategyScipy(self.price, lookback=20, solver=solver, cache=cache).calculate_weight()
+            pd.testing.assert_frame_equal(w1, w2)
+            self.assertEqual(cache.hits, cache.misses)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import numpy as np
+import pandas as pd
+from quantechia.covariance import RollingCovariance
+from quantechia.strategy import basestrategy, risk
+
+class TestRollingCovariance(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        dates = pd.bdate_range('2020-01-01', periods=300)
+        self.rtn_df = pd.DataFrame(rng.normal(0.0005, 0.01, (len(dates), 4)), index=dates, columns=['A', 'B', 'C', 'D'])
+
+    def test_rolling_matches_pandas(self):
+        # テストケース1：逐次更新した共分散がcov()と一致する（飛ばし飛ばしの位置も含む）
+        engine = RollingCovariance(self.rtn_df, lookback=60)
+        for i in list(range(60, 300, 1)) + [100, 299, 65, 250, 251]:
+            expected = self.rtn_df.iloc[i - 60:i].cov().values
+            np.testing.assert_allclose(engine.covariance(i), expected, rtol=1e-9, atol=1e-15)
+
+    def test_rolling_with_missing_values(self):
+        # テストケース2：欠損値はペアワイズで扱う
+        rtn_df = self.rtn_df.copy()
+        rtn_df.iloc[100:110, 1] = np.nan
+        engine = RollingCovariance(rtn_df, lookback=60)
+        for i in range(60, 300, 5):
+            expected = rtn_df.iloc[i - 60:i].cov().values
+            np.testing.assert_allclose(engine.covariance(i), expected, rtol=1e-9, atol=1e-15)
+
+    def test_ewma_matches_pandas(self):
+        # テストケース3：指数加重共分散がewm().cov()と一致する
+        for adjust in (True, False):
+            engine = RollingCovariance(self.rtn_df, method='ewma', halflife=20, adjust=adjust)
+            expected = self.rtn_df.ewm(halflife=20, adjust=adjust).cov()
+            for date, cov in engine.covariances(self.rtn_df.index[10::10]):
+                i = self.rtn_df.index.get_loc(date)
+                np.testing.assert_allclose(cov, expected.loc[self.rtn_df.index[i - 1]].values, rtol=1e-9)
+
+    def test_rebalance_strategy_uses_engine(self):
+        # テストケース4：RebalanceStrategyで同じ重みになる
+        prices_df = (1 + self.rtn_df).cumprod()
+        expected = basestrategy.RebalanceStrategy(prices_df, rebalance_freq=5).calculate_weight()
+        actual = basestrategy.RebalanceStrategy(prices_df, rebalance_freq=5, cov_method='rolling').calculate_weight()
+        pd.testing.assert_frame_equal(actual, expected, check_freq=False)
+
+    def test_append(self):
+        # テストケース5：追加した行を使った共分散が、全期間で作った場合と一致する（欠損値が途中から現れる場合も含む）
+        rtn_df = self.rtn_df.copy()
+        rtn_df.iloc[250:255, 2] = np.nan
+        for method in ('rolling', 'ewma'):
+            expected = RollingCovariance(rtn_df, lookback=60, method=method)
+            engine = RollingCovariance(rtn_df.iloc[:200], lookback=60, method=method)
+            engine.covariance(199)
+            for k in range(200, 300, 7):
+                engine.append(rtn_df.iloc[k:k + 7])
+                i = min(k + 7, 299)
+                np.testing.assert_allclose(engine.covariance(i), expected.covariance(i), rtol=1e-9, atol=1e-15)
+            self.assertTrue(engine.index.equals(rtn_df.index))
+
+    def test_risk_parity_append_reuses_engine(self):
+        # テストケース6：RiskParityStrategyScipyのappend()は共分散の計算を保持したまま追加分だけを計算する
+        prices_df = (1 + self.rtn_df).cumprod()
+        for solver in ('newton', 'batch'):
+            strategy = risk.RiskParityStrategyScipy(prices_df.iloc[:-5], cov_method='ewma', solver=solver)
+            strategy.calculate_weight()
+            engine = strategy._cov_engine
+            for k in range(5, 0, -1):
+                strategy.append(prices_df.iloc[-k:len(prices_df) - k + 1])
+                self.assertIs(strategy._cov_engine, engine)
+            self.assertEqual(len(engine), len(strategy.rtn_data))
+            expected = risk.RiskParityStrategyScipy(prices_df, cov_method='ewma', solver=solver).calculate_weight()
+            pd.testing.assert_frame_equal(strategy.weight, expected, check_freq=False, atol=1e-8)
+
+    def test_invalid_method(self):
+        with self.assertRaises(ValueError):
+            RollingCovariance(self.rtn_df, method='garch')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,292 @@
+import datetime
+import io
+import os
+import tempfile
+import threading
+import unittest
+import zipfile
+import arelle
+import pandas as pd
+import requests
+from requests.adapters import BaseAdapter
+from quantechia.data import edinet, transport
+from quantechia.data.transport import HttpClient
+
+
+class LocalClient:
+    """日付ごとに決まった書類一覧を返すAPIクライアント"""
+
+    def __init__(self):
+        self.api_key = 'key'
+        self.days = []
+        self.lock = threading.Lock()
+
+    def get_data(self, url, params, args={}):
+        with self.lock:
+            self.days.append(params['date'])
+        code = params['date'][-2:]
+        return {'results': [
+            {'docID': f"S{code}", 'secCode': f"{code}000", 'filerName': 'ｶﾌﾞｼｷｶﾞｲｼｬ', 'ordinanceCode': '010',
+             'formCode': '030000'},
+            {'docID': f"X{code}", 'secCode': None, 'filerName': 'other', 'ordinanceCode': '010', 'formCode': '999'},
+        ]}
+
+
+class ZipAdapter(BaseAdapter):
+    """どのURLにも決まったバイト列を返すトランスポート（bodyが関数の場合はURLから作る）"""
+
+    def __init__(self, body, status_code=200):
+        super().__init__()
+        self.body = body
+        self.status_code = status_code
+        self.urls = []
+        self.lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        with self.lock:
+            self.urls.append(request.url)
+        response = requests.Response()
+        response.status_code = self.status_code
+        response.raw = io.BytesIO(self.body(request.url) if callable(self.body) else self.body)
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+# Arelleで読み込める最小限のタクソノミ（xbrl-instanceはArelle同梱のキャッシュを参照し、ネットワークを使わない）
+XBRL_INSTANCE_XSD = os.path.join(os.path.dirname(arelle.__file__), 'resources', 'cache', 'http', 'www.xbrl.org',
+                                 '2003', 'xbrl-instance-2003-12-31.xsd')
+XBRL_SCHEMA = f"""<?xml version="1.0" encoding="UTF-8"?>
+<xsd:schema targetNamespace="http://example.com/jppfs_cor" elementFormDefault="qualified"
+  xmlns:xsd="http://www.w3.org/2001/XMLSchema" xmlns:xbrli="http://www.xbrl.org/2003/instance"
+  xmlns:link="http://www.xbrl.org/2003/linkbase" xmlns:xlink="http://www.w3.org/1999/xlink"
+  xmlns:jppfs_cor="http://example.com/jppfs_cor">
+  <xsd:annotation><xsd:appinfo>
+    <link:linkbase>
+      <link:roleRef roleURI="http://example.com/role/PL" xlink:type="simple" xlink:href="#PL"/>
+      <link:presentationLink xlink:type="extended" xlink:role="http://example.com/role/PL">
+        <link:loc xlink:type="locator" xlink:href="#jppfs_cor_Heading" xlink:label="h"/>
+        <link:loc xlink:type="locator" xlink:href="#jppfs_cor_NetSales" xlink:label="s"/>
+        <link:presentationArc xlink:type="arc" xlink:arcrole="http://www.xbrl.org/2003/arcrole/parent-child"
+          xlink:from="h" xlink:to="s" order="1"/>
+      </link:presentationLink>
+      <link:labelLink xlink:type="extended" xlink:role="http://www.xbrl.org/2003/role/link">
+        <link:loc xlink:type="locator" xlink:href="#jppfs_cor_NetSales" xlink:label="s"/>
+        <link:label xlink:type="resource" xlink:label="l" xlink:role="http://www.xbrl.org/2003/role/label"
+          xml:lang="ja">売上高</link:label>
+        <link:labelArc xlink:type="arc" xlink:arcrole="http://www.xbrl.org/2003/arcrole/concept-label"
+          xlink:from="s" xlink:to="l"/>
+      </link:labelLink>
+    </link:linkbase>
+    <link:roleType roleURI="http://example.com/role/PL" id="PL">
+      <link:definition>損益計算書</link:definition><link:usedOn>link:presentationLink</link:usedOn>
+    </link:roleType>
+  </xsd:appinfo></xsd:annotation>
+  <xsd:import namespace="http://www.xbrl.org/2003/instance" schemaLocation="{XBRL_INSTANCE_XSD}"/>
+  <xsd:element name="Heading" id="jppfs_cor_Heading" type="xbrli:stringItemType" substitutionGroup="xbrli:item"
+    abstract="true" nillable="true" xbrli:periodType="duration"/>
+  <xsd:element name="NetSales" id="jppfs_cor_NetSales" type="xbrli:monetaryItemType" substitutionGroup="xbrli:item"
+    nillable="true" xbrli:periodType="duration" xbrli:balance="credit"/>
+</xsd:schema>"""
+XBRL_INSTANCE = """<?xml version="1.0" encoding="UTF-8"?>
+<xbrli:xbrl xmlns:xbrli="http://www.xbrl.org/2003/instance" xmlns:link="http://www.xbrl.org/2003/linkbase"
+  xmlns:xlink="http://www.w3.org/1999/xlink" xmlns:iso4217="http://www.xbrl.org/2003/iso4217"
+  xmlns:jppfs_cor="http://example.com/jppfs_cor">
+  <link:schemaRef xlink:type="simple" xlink:href="jpcrp030000-asr-001_E00001-000.xsd"/>
+  <xbrli:context id="CurrentYearDuration">
+    <xbrli:entity><xbrli:identifier scheme="http://disclosure.edinet-fsa.go.jp">E00001</xbrli:identifier></xbrli:entity>
+    <xbrli:period><xbrli:startDate>2023-04-01</xbrli:startDate><xbrli:endDate>2024-03-31</xbrli:endDate></xbrli:period>
+  </xbrli:context>
+  <xbrli:unit id="JPY"><xbrli:measure>iso4217:JPY</xbrli:measure></xbrli:unit>
+  <jppfs_cor:NetSales contextRef="CurrentYearDuration" unitRef="JPY" decimals="-6">1000000000</jppfs_cor:NetSales>
+</xbrli:xbrl>"""
+
+
+def make_zip(value='<xbrl/>', schema='<schema/>'):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zip_obj:
+        zip_obj.writestr('XBRL/PublicDoc/0000000_header.htm', '<html/>')
+        zip_obj.writestr('XBRL/PublicDoc/jpcrp030000-asr-001_E00001-000.xbrl', value)
+        zip_obj.writestr('XBRL/PublicDoc/jpcrp030000-asr-001_E00001-000.xsd', schema)
+        zip_obj.writestr('XBRL/AuditDoc/jpaud-aar-cn-001_E00001-000.xbrl', '<xbrl/>')
+        zip_obj.writestr('XBRL/manifest.xml', '<manifest/>')
+    return buffer.getvalue()
+
+
+class TestZipHandling(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.listdir('.')
+
+    def use_transport(self, adapter):
+        previous = transport.set_client(HttpClient(transport=adapter))
+        self.addCleanup(transport.set_client, previous)
+
+    def test_public_doc_only(self):
+        # テストケース1：PublicDoc以下だけを一時ディレクトリに展開して解析し、終了後に削除する
+        adapter = ZipAdapter(make_zip(XBRL_INSTANCE, XBRL_SCHEMA))
+        self.use_transport(adapter)
+        with edinet.public_xbrl_files(LocalClient(), 'S100TEST') as files:
+            self.assertEqual([os.path.basename(f) for f in files], ['jpcrp030000-asr-001_E00001-000.xbrl'])
+            directory = os.path.dirname(files[0])
+            extracted = ['0000000_header.htm', 'jpcrp030000-asr-001_E00001-000.xbrl',
+                         'jpcrp030000-asr-001_E00001-000.xsd']
+            self.assertEqual(sorted(os.listdir(directory)), extracted)
+            root = directory[:-len(edinet.PUBLIC_DOC_DIR)]
+            self.assertEqual(os.listdir(os.path.join(root, 'XBRL')), ['PublicDoc'])
+
+            xbrl_p = edinet.XBRLParser(files[0])
+            try:
+                self.assertEqual(xbrl_p.get_standard_data()['売上高'].tolist(), [1000000000])
+            finally:
+                xbrl_p.close()
+            self.assertEqual(sorted(os.listdir(directory)), extracted)
+            self.assertEqual(os.listdir('.'), self.cwd)
+        self.assertFalse(os.path.exists(root))
+        self.assertIn('S100TEST', adapter.urls[0])
+        self.assertEqual(os.listdir('.'), self.cwd)
+
+    def test_cleanup_on_failure(self):
+        # テストケース2：例外の場合も一時ディレクトリを削除し、ZIPでない応答はエラーにする
+        self.use_transport(ZipAdapter(make_zip()))
+        with self.assertRaises(RuntimeError):
+            with edinet.public_xbrl_files(LocalClient(), 'S100TEST') as files:
+                directory = os.path.dirname(files[0])
+                raise RuntimeError
+        self.assertFalse(os.path.exists(directory))
+
+        self.use_transport(ZipAdapter(b'{"metadata": {"status": "404"}}'))
+        with self.assertRaises(ValueError):
+            with edinet.public_xbrl_files(LocalClient(), 'S100TEST'):
+                pass
+        self.use_transport(ZipAdapter(b'', status_code=404))
+        with self.assertRaises(ValueError):
+            edinet.ZipFileDownloader(LocalClient()).download_zip_bytes('S100TEST')
+
+
+def parse_value(doc_id, zip_bytes, parse_kwargs):
+    """XBRLファイルに書かれた数値を売上高として返す（Arelleの代わり）"""
+    with zipfile.ZipFile(io.BytesIO(zip_bytes)) as zip_obj:
+        value = zip_obj.read('XBRL/PublicDoc/jpcrp030000-asr-001_E00001-000.xbrl').decode()
+    if value == 'broken':
+        raise ValueError('broken xbrl')
+    return pd.DataFrame({'EndDate': ['2023-03-31', '2024-03-31'], '売上高': [float(value), float(value) * 2],
+                         '資産': [1.0, None]}, index=pd.Index([2023, 2024], name='EndDate'))
+
+
+class TestStandardDataExtractor(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'standard.sqlite')
+        body = lambda url: make_zip('broken' if 'S100BAD' in url else url.split('/')[-1].split('?')[0][-1])
+        self.adapter = ZipAdapter(body)
+        previous = transport.set_client(HttpClient(transport=self.adapter))
+        self.addCleanup(transport.set_client, previous)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_batch(self):
+        # テストケース1：並列に解析した結果を1つの表に保存し、処理済みの書類は取得しない
+        extractor = edinet.StandardDataExtractor(LocalClient(), self.path, n_jobs=2, calls_per_second=1000,
+                                                 parse=parse_value)
+        doc_ids = pd.DataFrame({'docID': ['S1000001', 'S1000002', 'S100BAD', 'S1000003']})
+        result = extractor.run(doc_ids)
+        self.assertEqual(sorted(result['doc_id']), ['S1000001', 'S1000002', 'S1000003', 'S100BAD'])
+        self.assertEqual(result.set_index('doc_id').loc['S100BAD', 'status'], 'error')
+        self.assertIn('broken xbrl', result.set_index('doc_id').loc['S100BAD', 'error'])
+
+        table = extractor.load()
+        self.assertEqual(table.index.names, ['doc_id', 'end_date'])
+        self.assertEqual(len(table), 6)
+        self.assertEqual(table.loc[('S1000002', '2024-03-31'), '売上高'], 4.0)
+        self.assertTrue(pd.isna(table.loc[('S1000003', '2024-03-31'), '資産']))
+        self.assertEqual(list(extractor.load(['S1000001']).index.get_level_values(0).unique()), ['S1000001'])
+
+        self.adapter.urls.clear()
+        self.assertTrue(extractor.run(['S1000001', 'S1000004', 'S100BAD']).equals(
+            pd.DataFrame([{'doc_id': 'S1000004', 'status': 'ok', 'error': None}])))
+        self.assertEqual(len(self.adapter.urls), 1)
+        self.assertEqual(extractor.processed(include_failed=False), {'S1000001', 'S1000002', 'S1000003', 'S1000004'})
+
+        retried = extractor.run(['S100BAD'], retry_failed=True)
+        self.assertEqual(retried['status'].tolist(), ['error'])
+        extractor.close()
+
+
+class TestXBRLParse(unittest.TestCase):
+    def setUp(self):
+        # 作業ディレクトリに以前の実装が一時ファイルに使っていた名前のファイルを置いておく
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.tmpdir.name)
+        for name in ('test.csv', 'fact_list.csv'):
+            with open(name, 'w') as f:
+                f.write('keep')
+
+    def assert_cwd_unchanged(self):
+        self.assertEqual(sorted(os.listdir('.')), ['fact_list.csv', 'test.csv'])
+        for name in ('test.csv', 'fact_list.csv'):
+            with open(name) as f:
+                self.assertEqual(f.read(), 'keep')
+
+    def test_scratch_files_outside_cwd(self):
+        # テストケース1：Arelleの一時的な出力はカレントディレクトリに作らない
+        result = edinet.parse_standard_data('S100TEST', make_zip(XBRL_INSTANCE, XBRL_SCHEMA))
+        self.assertEqual(result['売上高'].tolist(), [1000000000])
+        self.assert_cwd_unchanged()
+
+        with tempfile.TemporaryDirectory() as directory:
+            edinet.extract_public_doc(make_zip(XBRL_INSTANCE, XBRL_SCHEMA), directory)
+            xbrl_dir = os.path.join(directory, edinet.PUBLIC_DOC_DIR)
+            before = sorted(os.listdir(xbrl_dir))
+            xbrl_p = edinet.XBRLParser(os.path.join(xbrl_dir, 'jpcrp030000-asr-001_E00001-000.xbrl'))
+            try:
+                self.assertIn('jppfs_cor:NetSales', xbrl_p.get_fact_list()['Name'].tolist())
+                self.assertIsInstance(xbrl_p.get_fact_table(), pd.DataFrame)
+            finally:
+                xbrl_p.close()
+            self.assertEqual(sorted(os.listdir(xbrl_dir)), before)
+        self.assert_cwd_unchanged()
+
+
+class TestDocIdListRetriever(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_day_cache(self):
+        # テストケース1：日ごとの一覧を並列に取得し、確定した過去の日は保存済みの一覧を使う
+        client = LocalClient()
+        retriever = edinet.DocIdListRetriever(client, cache_dir=self.tmpdir.name, calls_per_second=1000)
+        days = retriever.make_day_list(datetime.date(2024, 6, 1), datetime.date(2024, 6, 10))
+        df = retriever.make_doc_id_list(days)
+        self.assertEqual(df['docID'].tolist(), [f"S{d:02d}" for d in range(1, 11)])
+        self.assertEqual(df['Security Code'].iloc[0], '0100')
+        self.assertEqual(df['Company Name'].iloc[0], 'カブシキガイシャ')
+        self.assertEqual(sorted(client.days), [d.isoformat() for d in days])
+        self.assertEqual(len(os.listdir(self.tmpdir.name)), 10)
+
+        client.days.clear()
+        again = retriever.make_doc_id_list(retriever.make_day_list(datetime.date(2024, 6, 5), datetime.date(2024, 6, 12)))
+        self.assertEqual(sorted(client.days), ['2024-06-11', '2024-06-12'])
+        self.assertEqual(len(again), 8)
+
+    def test_recent_days_are_refetched(self):
+        # テストケース2：直近の日は保存せず、毎回取得する
+        client = LocalClient()
+        retriever = edinet.DocIdListRetriever(client, cache_dir=self.tmpdir.name, calls_per_second=1000)
+        today = datetime.date.today()
+        retriever.make_doc_id_list([today, today - datetime.timedelta(days=1)])
+        retriever.make_doc_id_list([today, today - datetime.timedelta(days=1)])
+        self.assertEqual(len(client.days), 4)
+        self.assertEqual(os.listdir(self.tmpdir.name), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,22 @@
+import subprocess
+import sys
+import unittest
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_heavy_dependencies_not_loaded(self):
+        # テストケース1：importしただけでは重い依存パッケージが読み込まれない
+        code = (
+            "import sys\n"
+            "import quantechia.analysis, quantechia.strategy.risk, quantechia.strategy.trend\n"
+            "import quantechia.data.data_fetcher, quantechia.data.edinet\n"
+            "heavy = ('quantstats', 'riskfolio', 'matplotlib', 'yfinance', 'pandas_datareader', 'arelle', 'httpx')\n"
+            "print(','.join(m for m in heavy if m in sys.modules))\n"
+        )
+        proc = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        self.assertEqual(proc.stdout.strip(), '')
+
+
+if __name__ == '__main__':
+    unittest.main()
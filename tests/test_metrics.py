@@ -0,0 +1,60 @@
+import unittest
+import numpy as np
+import pandas as pd
+import quantstats as qs
+from quantechia import metrics
+from quantechia.strategy.basestrategy import EqualWeightStrategy
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        idx = pd.bdate_range('2020-01-01', periods=500)
+        self.rtn = pd.DataFrame(rng.normal(0.0003, 0.01, (500, 4)), index=idx, columns=list('abcd'))
+        self.rtn.iloc[:60, 1] = np.nan      # 開始前の欠損
+        self.rtn.iloc[100:110, 2] = np.nan  # 途中の欠損
+        self.rtn.iloc[200:220, 3] = 0.0     # 取引のない期間
+        self.rtn.iloc[0, 0] = -0.05         # 初日の損失
+
+    def test_quantstats_parity(self):
+        # テストケース1：quantstatsと同じ値になる
+        cases = [
+            (metrics.sharpe, qs.stats.sharpe),
+            (metrics.sortino, qs.stats.sortino),
+            (metrics.max_drawdown, qs.stats.max_drawdown),
+            (metrics.cagr, qs.stats.cagr),
+            (metrics.calmar, qs.stats.calmar),
+            (metrics.win_rate, qs.stats.win_rate),
+            (metrics.volatility, qs.stats.volatility),
+        ]
+        for func, expected_func in cases:
+            for column in self.rtn.columns:
+                expected = expected_func(self.rtn[column].dropna())
+                self.assertAlmostEqual(func(self.rtn[column]), expected, places=10, msg=func.__name__)
+            np.testing.assert_allclose(func(self.rtn).values,
+                                       [func(self.rtn[c]) for c in self.rtn.columns], rtol=1e-12)
+
+        self.assertAlmostEqual(metrics.sharpe(self.rtn['a'], rf=0.02), qs.stats.sharpe(self.rtn['a'], rf=0.02),
+                               places=10)
+
+    def test_summary(self):
+        # テストケース2：summaryが個別の関数と同じ値になる
+        result = metrics.summary(self.rtn)
+        self.assertEqual(list(result.columns), list(metrics.METRICS[:-1]))
+        pd.testing.assert_series_equal(result['sharpe_ratio'], metrics.sharpe(self.rtn), check_names=False)
+        pd.testing.assert_series_equal(result['calmar_ratio'], metrics.calmar(self.rtn), check_names=False)
+        self.assertEqual(metrics.win_rate(pd.Series(0.0, index=self.rtn.index)), 0.0)
+
+    def test_evaluate(self):
+        # テストケース3：evaluateの結果がquantstatsで計算した場合と一致する
+        price = (1 + self.rtn.fillna(0)).cumprod()
+        strategy = EqualWeightStrategy(price)
+        native = strategy.evaluate()
+        expected = strategy.evaluate(metric_engine='quantstats')
+        self.assertEqual(set(native), set(expected))
+        for key, value in expected.items():
+            self.assertAlmostEqual(native[key], value, places=10, msg=key)
+
+
+if __name__ == '__main__':
+    unittest.main()
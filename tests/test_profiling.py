@@ -0,0 +1,65 @@
+import unittest
+import numpy as np
+import pandas as pd
+from quantechia.profiling import Profiler
+from quantechia.strategy.basestrategy import RebalanceStrategy
+from quantechia.strategy import risk, trend
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        idx = pd.bdate_range('2020-01-01', periods=200)
+        self.price = pd.DataFrame(np.exp(np.cumsum(rng.normal(0, 0.01, (200, 4)), axis=0)),
+                                  index=idx, columns=list('abcd'))
+
+    def test_stages(self):
+        # テストケース1：処理段階ごとの回数と、リバランス日ごとの最適化時間が記録される
+        strategy = RebalanceStrategy(self.price, rebalance_freq='ME', lookback=20, profiler=True)
+        strategy.calculate_returns()
+        strategy.evaluate()
+        new_prices = self.price.iloc[-5:].set_axis(pd.bdate_range(self.price.index[-1], periods=6)[1:])
+        strategy.append(new_prices)
+
+        profile = strategy.profile
+        for name in ('prepare_data', 'calculate_weight', 'calculate_returns', 'metrics', 'update_weight',
+                     'append_returns', 'calculate_current_weight'):
+            self.assertIn(name, profile.index)
+        self.assertEqual(profile.loc['calculate_weight', 'calls'], 1)
+        self.assertTrue((profile['total'] >= profile['max']).all())
+
+        by_date = strategy.profiler.to_frame(by_date=True)
+        n_dates = int(strategy.weight.notna().all(axis=1).sum())
+        self.assertEqual(len(by_date), n_dates)
+        self.assertEqual(profile.loc['calculate_current_weight', 'calls'], n_dates)
+
+    def test_callback_and_shared_profiler(self):
+        # テストケース2：共有したProfilerに複数の戦略の記録が集まり、コールバックが呼ばれる
+        records = []
+        profiler = Profiler(callback=lambda stage, seconds, date: records.append((stage, date)))
+        risk.RiskParityStrategyScipy(self.price, lookback=60, profiler=profiler).calculate_returns()
+        trend.MomentumStrategy(self.price, window=12, profiler=profiler).calculate_returns()
+
+        profile = profiler.to_frame()
+        self.assertEqual(profile.loc['cal_risk_parity', 'calls'], len(self.price) - 1 - 60)
+        self.assertEqual(profile.loc['calculate_weight', 'calls'], 2)
+        self.assertEqual(len(records), profile['calls'].sum())
+
+    def test_riskfolio_parallel(self):
+        # テストケース3：ワーカープロセスでの最適化時間も日付ごとに記録される
+        strategy = risk.RiskParityStrategy(self.price.iloc[:80], lookback=60, n_jobs=2, chunk_size=5, profiler=True)
+        strategy.calculate_weight()
+        by_date = strategy.profiler.to_frame(by_date=True)
+        self.assertEqual(list(by_date['stage'].unique()), ['optimize_weights'])
+        self.assertEqual(len(by_date), 80 - 1 - 60)
+        self.assertTrue((by_date['seconds'] > 0).all())
+
+    def test_disabled(self):
+        # テストケース4：指定しない場合は記録しない
+        strategy = RebalanceStrategy(self.price, lookback=20)
+        strategy.calculate_returns()
+        self.assertIsNone(strategy.profile)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import threading
+import time
+import unittest
+import numpy as np
+import pandas as pd
+from quantechia.data import data_fetcher
+from quantechia.data.ratelimit import TokenBucket, call_with_retry
+
+
+class FlakyFetcher(data_fetcher.FinancialDataFetcher):
+    """ティッカーごとに最初の1回は失敗し、2回目から価格を返すFetcher"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def _fetch_historical_data(self, source, **kwargs):
+        symbol = kwargs['symbol']
+        with self.lock:
+            self.calls.append((time.monotonic(), symbol))
+            first = sum(s == symbol for _, s in self.calls) == 1
+        if first:
+            raise RuntimeError("Alpha Vantage: {'Note': 'rate limit'}")
+        idx = pd.bdate_range('2020-01-01', periods=5).strftime('%Y-%m-%d')
+        return pd.DataFrame({'4. close': 100 + np.arange(5.0) * (1 + len(symbol))}, index=idx)
+
+
+class TestRateLimit(unittest.TestCase):
+    def test_token_bucket(self):
+        # テストケース1：スレッドから同時に呼び出しても、rateを超えない
+        bucket = TokenBucket(rate=50, capacity=1)
+        times = []
+
+        def worker():
+            for _ in range(3):
+                bucket.acquire()
+                times.append(time.monotonic())
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        times.sort()
+        self.assertEqual(len(times), 12)
+        self.assertGreaterEqual(times[-1] - times[0], 11 / 50 * 0.9)
+
+    def test_retry(self):
+        # テストケース2：失敗した場合は再試行し、回数を超えたら例外を送出する
+        attempts = []
+
+        def flaky():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise ConnectionError
+            return 'ok'
+
+        self.assertEqual(call_with_retry(flaky, retries=2, backoff=0.001), 'ok')
+        with self.assertRaises(ValueError):
+            call_with_retry(lambda: int('x'), retries=1, backoff=0.001)
+        with self.assertRaises(KeyError):
+            call_with_retry(lambda: {}['x'], retries=5, backoff=10, exceptions=(ValueError,))
+
+    def test_get_av_rtn(self):
+        # テストケース3：並列に取得した結果がティッカーの順に1回で結合される
+        fetcher = FlakyFetcher()
+        tickers = ['A', 'BB', 'CCC']
+        rtn = data_fetcher.get_av_rtn(tickers, calls_per_minute=6000, backoff=0.001, fetcher=fetcher)
+        self.assertEqual(rtn.shape, (4, 3))
+        self.assertEqual(len(fetcher.calls), 6)
+        expected = [(100 + np.arange(5.0) * (1 + len(t))) for t in tickers]
+        np.testing.assert_allclose(rtn.to_numpy(), np.column_stack([e[1:] / e[:-1] - 1 for e in expected]))
+
+
+if __name__ == '__main__':
+    unittest.main()
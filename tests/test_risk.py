@@ -0,0 +1,188 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from concurrent.futures import Executor, Future
+import numpy as np
+import pandas as pd
+from quantechia.cache import OptimizationCache
+from quantechia.strategy import risk
+
+class TestRiskParitySolver(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(4)
+        a = rng.normal(size=(200, 6)) @ rng.normal(size=(6, 6))
+        self.Sigma = np.cov(a, rowvar=False)
+
+    def assert_equal_risk(self, w, Sigma, atol=1e-8):
+        rc = w * (Sigma @ w)
+        np.testing.assert_allclose(rc / rc.sum(), np.full(len(w), 1 / len(w)), atol=atol)
+
+    def test_newton_equal_risk_contribution(self):
+        # テストケース1：ニュートン法の解はリスク寄与が均等になる
+        w = risk.cal_risk_parity(self.Sigma)
+        self.assertAlmostEqual(w.sum(), 1.0)
+        self.assertTrue(np.all(w > 0))
+        self.assert_equal_risk(w, self.Sigma)
+
+    def test_newton_matches_slsqp(self):
+        # テストケース2：SLSQPの解と一致する
+        w_newton = risk.cal_risk_parity(self.Sigma)
+        w_slsqp = risk.cal_risk_parity(self.Sigma, solver='slsqp')
+        np.testing.assert_allclose(w_newton, w_slsqp, atol=1e-3)
+
+    def test_warm_start(self):
+        # テストケース3：ウォームスタートしても同じ解になる
+        w = risk.cal_risk_parity(self.Sigma)
+        w_warm = risk.cal_risk_parity(self.Sigma * 1.01, x0=w)
+        np.testing.assert_allclose(w_warm, w, atol=1e-8)
+
+    def test_risk_budget(self):
+        # テストケース4：リスクバジェットを指定
+        budget = np.array([0.3, 0.3, 0.1, 0.1, 0.1, 0.1])
+        w = risk.cal_risk_parity(self.Sigma, budget=budget)
+        rc = w * (self.Sigma @ w)
+        np.testing.assert_allclose(rc / rc.sum(), budget, atol=1e-8)
+
+    def test_invalid_input(self):
+        with self.assertRaises(ValueError):
+            risk.cal_risk_parity(np.full((3, 3), np.nan))
+        with self.assertRaises(ValueError):
+            risk.cal_risk_parity(self.Sigma, solver='cvxpy')
+
+    def test_strategy_solvers_agree(self):
+        # テストケース5：RiskParityStrategyScipyでsolverを切り替えても同じ重みになる
+        rng = np.random.default_rng(5)
+        dates = pd.bdate_range('2020-01-01', periods=90)
+        prices = np.exp(np.cumsum(rng.normal(0, 0.01, (len(dates), 3)), axis=0))
+        prices_df = pd.DataFrame(prices, index=dates, columns=['A', 'B', 'C'])
+        newton = risk.RiskParityStrategyScipy(prices_df).calculate_weight()
+        slsqp = risk.RiskParityStrategyScipy(prices_df, solver='slsqp').calculate_weight()
+        np.testing.assert_allclose(newton.values, slsqp.values, atol=1e-3)
+
+class TestRiskParityBatch(unittest.TestCase):
+    def test_batch_matches_single(self):
+        # テストケース1：まとめて解いた結果が1日ずつ解いた結果と一致する
+        rng = np.random.default_rng(6)
+        rtn = rng.normal(size=(120, 5)) * rng.random(5)
+        Sigmas = np.stack([np.cov(rtn[t:t + 60], rowvar=False) for t in range(60)])
+        Sigmas[10] = np.nan  # 解けない日付
+
+        weights, converged = risk.cal_risk_parity_batch(Sigmas)
+        self.assertEqual(weights.shape, (60, 5))
+        self.assertFalse(converged[10])
+        self.assertTrue(np.isnan(weights[10]).all())
+        for t in np.flatnonzero(converged):
+            np.testing.assert_allclose(weights[t], risk.cal_risk_parity(Sigmas[t]), atol=1e-10)
+        self.assertEqual(converged.sum(), 59)
+
+    def test_strategy_batch_solver(self):
+        # テストケース2：RiskParityStrategyScipyのsolver='batch'
+        rng = np.random.default_rng(7)
+        dates = pd.bdate_range('2020-01-01', periods=100)
+        prices = np.exp(np.cumsum(rng.normal(0, 0.01, (len(dates), 3)), axis=0))
+        prices_df = pd.DataFrame(prices, index=dates, columns=['A', 'B', 'C'])
+        expected = risk.RiskParityStrategyScipy(prices_df).calculate_weight()
+        actual = risk.RiskParityStrategyScipy(prices_df, solver='batch', batch_size=16).calculate_weight()
+        pd.testing.assert_frame_equal(actual, expected, check_freq=False, atol=1e-10)
+
+    def test_failures_recorded(self):
+        # テストケース3：解けない日付は標準出力に出さず、failuresに記録される
+        rng = np.random.default_rng(7)
+        dates = pd.bdate_range('2020-01-01', periods=100)
+        prices = np.exp(np.cumsum(rng.normal(0, 0.01, (len(dates), 3)), axis=0))
+        prices[:70, 2] = 1.0  # 分散が0の窓は解けない
+        prices_df = pd.DataFrame(prices, index=dates, columns=['A', 'B', 'C'])
+        for solver in ('batch', 'newton'):
+            strategy = risk.RiskParityStrategyScipy(prices_df, solver=solver, batch_size=16)
+            stdout = io.StringIO()
+            with contextlib.redirect_stdout(stdout), np.errstate(all='ignore'):
+                weight = strategy.calculate_weight()
+            self.assertEqual(stdout.getvalue(), '')
+            self.assertEqual(list(strategy.failures), list(dates[61:71]))
+            self.assertTrue(weight.loc[dates[61:71]].isna().all().all())
+
+class TestRiskfolioParallel(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        idx = pd.bdate_range('2020-01-01', periods=80)
+        self.price = pd.DataFrame(np.exp(np.cumsum(rng.normal(0, 0.01, (80, 4)), axis=0)),
+                                  index=idx, columns=list('abcd'))
+
+    def test_process_pool_matches_serial(self):
+        # テストケース1：プロセスプールで計算しても直列と同じ重みになり、ワーカーでのキャッシュの参照回数も数える
+        serial = risk.RiskParityStrategy(self.price, lookback=60)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = OptimizationCache(os.path.join(tmpdir, 'cache.sqlite'))
+            parallel = risk.RiskParityStrategy(self.price, lookback=60, n_jobs=2, chunk_size=3, cache=cache)
+            pd.testing.assert_frame_equal(serial.calculate_weight(), parallel.calculate_weight())
+            self.assertEqual(parallel.failures, {})
+            n_dates = len(self.price) - 1 - 60
+            self.assertEqual(cache.stats()['hits'] + cache.stats()['misses'], n_dates)
+            self.assertEqual(cache.misses, n_dates)
+
+            parallel.calculate_weight()
+            self.assertEqual((cache.hits, cache.misses), (n_dates, n_dates))
+            cache.close()
+
+    def test_custom_executor(self):
+        # テストケース2：内部の属性を持たないExecutorでも、n_jobsからチャンクを決めて計算できる
+        class InlineExecutor(Executor):
+            def __init__(self):
+                self.submitted = 0
+
+            def submit(self, fn, *args, **kwargs):
+                self.submitted += 1
+                future = Future()
+                future.set_result(fn(*args, **kwargs))
+                return future
+
+        serial = risk.RiskParityStrategy(self.price, lookback=60)
+        executor = InlineExecutor()
+        parallel = risk.RiskParityStrategy(self.price, lookback=60, n_jobs=2, executor=executor)
+        pd.testing.assert_frame_equal(serial.calculate_weight(), parallel.calculate_weight())
+        self.assertEqual(executor.submitted, 7)  # 19日分を3日ずつ（2ワーカー × 4を目安）のチャンクに分ける
+
+    def test_failures_recorded(self):
+        # テストケース3：最適化に失敗した日付はNaNになり、failuresに記録される
+        strategy = risk.RiskParityStrategy(self.price, lookback=60)
+        strategy._optimize_weights = lambda window_rtn: 1 / 0
+        weight = strategy.calculate_weight()
+        self.assertTrue(weight.isna().all().all())
+        self.assertEqual(len(strategy.failures), len(self.price) - 1 - 60)
+        self.assertTrue(all(e.startswith('ZeroDivisionError') for e in strategy.failures.values()))
+
+class TestRiskfolioRebalance(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        idx = pd.bdate_range('2020-01-01', periods=130)
+        self.price = pd.DataFrame(np.exp(np.cumsum(rng.normal(0, 0.01, (130, 3)), axis=0)),
+                                  index=idx, columns=list('abc'))
+
+    def test_monthly_matches_daily(self):
+        # テストケース1：リバランス日のみ最適化した重みは、毎日最適化した重みの該当日と一致する
+        daily = risk.RiskParityStrategy(self.price, lookback=60).calculate_weight()
+        strategy = risk.RiskParityStrategy(self.price, lookback=60, rebalance_freq='M')
+        monthly = strategy.calculate_weight()
+        self.assertTrue(monthly.index.equals(strategy.rebalance_dates))
+        pd.testing.assert_frame_equal(monthly, daily.loc[monthly.index])
+
+    def test_sparse_weight_returns(self):
+        # テストケース2：リバランス日のみの重みでリターンを計算できる
+        strategy = risk.RiskParityStrategy(self.price, lookback=60, rebalance_freq='M')
+        strategy.calculate_weight()
+        strategy.calculate_returns(mode='daily')
+        self.assertTrue(np.isfinite(strategy.port).all())
+        self.assertEqual(strategy.port.index[-1], self.price.index[-1])
+
+    def test_append(self):
+        # テストケース3：追加した日付のうちリバランス日のみ最適化される
+        strategy = risk.RiskParityStrategy(self.price.iloc[:100], lookback=60, rebalance_freq='M')
+        strategy.calculate_weight()
+        strategy.append(self.price.iloc[100:])
+        expected = risk.RiskParityStrategy(self.price, lookback=60, rebalance_freq='M').calculate_weight()
+        pd.testing.assert_frame_equal(strategy.weight, expected)
+
+if __name__ == '__main__':
+    unittest.main()
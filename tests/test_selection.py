@@ -0,0 +1,70 @@
+import unittest
+import numpy as np
+import pandas as pd
+from quantechia.strategy import selection, trend
+
+
+class TestSelection(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.scores = rng.normal(size=(100, 30))
+        self.scores[rng.random(self.scores.shape) < 0.2] = np.nan
+        self.scores[3] = np.nan          # すべてNaNの行
+        self.scores[4, 2:] = np.nan      # 有効な列がk未満の行
+
+    def test_top_k(self):
+        # テストケース1：上位・下位k列がソートによる結果と一致し、NaNは選ばれない
+        for largest in (True, False):
+            rows, cols = selection.top_k(self.scores, 5, largest=largest)
+            for t in range(len(self.scores)):
+                row = pd.Series(self.scores[t]).dropna()
+                expected = (row.nlargest(5) if largest else row.nsmallest(5)).index
+                self.assertEqual(set(cols[rows == t]), set(expected))
+
+    def test_quantile_buckets(self):
+        # テストケース2：pd.qcutと同じバケットになる
+        dense = np.random.default_rng(1).normal(size=(50, 20))
+        for scores in (self.scores, dense):
+            buckets = selection.quantile_buckets(scores, 5)
+            for t in range(len(scores)):
+                row = pd.Series(scores[t]).dropna()
+                if len(row) < 5:
+                    continue
+                np.testing.assert_array_equal(buckets[t, row.index], pd.qcut(row, 5, labels=False).values)
+                self.assertTrue((buckets[t, np.isnan(scores[t])] == -1).all())
+
+    def test_select_weights(self):
+        # テストケース3：各行の重みの合計
+        index = pd.RangeIndex(len(self.scores))
+        columns = pd.RangeIndex(self.scores.shape[1])
+        valid_rows = ~np.isnan(self.scores).all(axis=1)
+
+        for method in ('top', 'bottom', 'quantile'):
+            w = selection.to_weight_frame(*selection.select_weights(self.scores, method, 5), index, columns)
+            sums = w.sum(axis=1).values
+            np.testing.assert_allclose(sums[valid_rows], 1.0)
+            self.assertEqual(sums[3], 0.0)
+
+        w = selection.to_weight_frame(*selection.select_weights(self.scores, 'long_short', 5), index, columns)
+        np.testing.assert_allclose(w.sum(axis=1).values, 0.0, atol=1e-12)
+        np.testing.assert_allclose(w.abs().sum(axis=1).values[valid_rows & (index != 4)], 1.0)
+
+        with self.assertRaises(ValueError):
+            selection.select_weights(self.scores, 'unknown')
+
+    def test_momentum_best_factor(self):
+        # テストケース4：デフォルトはidxmaxによるベストファクター選択と同じ
+        rng = np.random.default_rng(2)
+        rtn = pd.DataFrame(rng.normal(0.001, 0.01, (120, 5)),
+                           index=pd.bdate_range('2020-01-01', periods=120), columns=list('abcde'))
+        strategy = trend.MomentumStrategy(rtn_data=rtn, window=12)
+        score = strategy.get_valid_score(strategy.calculate_momentum_score())
+        expected = pd.get_dummies(score.idxmax(axis=1)).astype(float).reindex(columns=rtn.columns, fill_value=0.0)
+        pd.testing.assert_frame_equal(strategy.calculate_weight(), expected)
+
+        strategy = trend.MomentumStrategy(rtn_data=rtn, window=12, selection='long_short', n_select=2)
+        np.testing.assert_allclose(strategy.calculate_weight().sum(axis=1), 0.0, atol=1e-12)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+import numpy as np
+import pandas as pd
+from quantechia import utils
+from quantechia.analysis import RiskContribution
+from quantechia.sparse import SparseWeight
+from quantechia.strategy import trend
+
+
+class TestSparseWeight(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        dates = pd.bdate_range('2020-01-01', periods=300)
+        columns = [f'A{i}' for i in range(40)]
+        self.prices = pd.DataFrame(np.exp(np.cumsum(rng.normal(0, 0.01, (300, 40)), axis=0)),
+                                   index=dates, columns=columns)
+        # 月末リバランスで5銘柄だけを保有するウェイト（最初の2行は未計算）
+        rebalance = dates[dates.is_month_end]
+        weights = np.zeros((len(rebalance), 40))
+        for t in range(len(rebalance)):
+            weights[t, rng.choice(40, 5, replace=False)] = 0.2
+        weights[:2] = np.nan
+        self.weight = pd.DataFrame(weights, index=rebalance, columns=columns)
+        self.sparse = SparseWeight.from_dense(self.weight)
+
+    def test_round_trip(self):
+        # テストケース1：DataFrameとの相互変換で元に戻る
+        self.assertEqual(self.sparse.nnz, 5 * (len(self.weight) - 2))
+        pd.testing.assert_frame_equal(self.sparse.to_dense(), self.weight)
+        pd.testing.assert_frame_equal(self.sparse.iloc[3:].to_dense(), self.weight.iloc[3:])
+        concat = SparseWeight.concat([self.sparse.iloc[:4], self.weight.iloc[4:]])
+        pd.testing.assert_frame_equal(concat.to_dense(), self.weight)
+
+    def test_from_coo(self):
+        # テストケース2：同じ要素は合計され、0になった要素は保存されない
+        weight = SparseWeight.from_coo([1, 0, 1, 1], [2, 0, 2, 1], [0.5, 1.0, -0.5, 1.0],
+                                       pd.RangeIndex(2), list('abc'))
+        np.testing.assert_array_equal(weight.to_array(), [[1.0, 0, 0], [0, 1.0, 0]])
+        self.assertEqual(weight.nnz, 2)
+
+    def test_returns_and_turnover(self):
+        # テストケース3：リターンと回転率がDataFrameの場合と一致する
+        for mode in (None, 'daily'):
+            for engine in ('pandas', 'numpy'):
+                _, expected = utils.calculate_return(self.prices, self.weight, mode=mode, engine=engine)
+                rtn_by_asset, rtn = utils.calculate_return(self.prices, self.sparse, mode=mode, engine=engine)
+                pd.testing.assert_series_equal(rtn, expected)
+                self.assertTrue(rtn_by_asset.columns.equals(self.sparse.active_columns()))
+
+        np.testing.assert_allclose(self.sparse.diff_abs_sum(), self.weight.diff().abs().sum(axis=1).values)
+        self.assertAlmostEqual(utils.calculate_turnover(self.sparse), utils.calculate_turnover(self.weight))
+
+    def test_risk_contribution(self):
+        # テストケース4：リスク寄与度が日次のDataFrameの場合と一致する
+        rtn = self.prices.pct_change().iloc[1:]
+        daily = self.weight.reindex(rtn.index, method='ffill')
+        dense = RiskContribution(daily, rtn, lookback=20)
+        dense.calculate()
+        sparse = RiskContribution(self.sparse, rtn, lookback=20)
+        sparse.calculate()
+        expected = dense.get_rc_dataframe()
+        result = sparse.get_rc_dataframe()
+        pd.testing.assert_frame_equal(result, expected[result.columns], check_freq=False, check_names=False)
+
+    def test_momentum_sparse(self):
+        # テストケース5：疎な形式のウェイトでもバックテストと追加が同じ結果になる
+        strategy = trend.MomentumStrategy(self.prices.iloc[:200], window=12, n_select=3, sparse=True)
+        strategy.calculate_returns(mode='daily')
+        self.assertIsInstance(strategy.weight, SparseWeight)
+        strategy.append(self.prices.iloc[200:])
+
+        expected = trend.MomentumStrategy(self.prices, window=12, n_select=3)
+        expected.calculate_returns(mode='daily')
+        pd.testing.assert_frame_equal(strategy.weight.to_dense(), expected.weight, check_freq=False)
+        pd.testing.assert_series_equal(strategy.port, expected.port)
+        self.assertLess(strategy.weight.nbytes, expected.weight.to_numpy().nbytes / 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
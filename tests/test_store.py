@@ -0,0 +1,125 @@
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from quantechia.data.data_fetcher import FinancialDataFetcher
+from quantechia.data.store import MarketDataStore
+
+
+class LocalFetcher(FinancialDataFetcher):
+    """データソースの代わりに手元のDataFrameから期間を切り出して返すFetcher"""
+
+    def __init__(self, data, **kwargs):
+        super().__init__(**kwargs)
+        self.data = data
+        self.calls = []
+
+    def _fetch_historical_data(self, source, **kwargs):
+        self.calls.append(kwargs)
+        start = kwargs.get('start')
+        end = kwargs.get('end')
+        end = None if end is None else pd.Timestamp(end) - pd.Timedelta(days=1)  # yfinanceのendは含まない
+        frame = self.data.loc[start:end]
+        return pd.concat({kwargs['tickers']: frame}, axis=1).swaplevel(axis=1)
+
+
+class TestMarketDataStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = MarketDataStore(self.tmpdir.name)
+        idx = pd.bdate_range('2020-01-01', '2020-12-31', name='Date')
+        self.data = pd.DataFrame({'Close': np.linspace(100, 120, len(idx)), 'Volume': np.arange(len(idx)),
+                                  'Note': ['a'] * len(idx)}, index=idx)
+        self.calls = []
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def fetch(self, start, end):
+        self.calls.append((start, end))
+        return self.data.loc[start:end]
+
+    def test_missing_ranges_only(self):
+        # テストケース1：取得済みの期間は取得せず、足りない先頭・末尾の期間だけを取得する
+        first = self.store.get('yahoo', '^N225', self.fetch, '2020-03-01', '2020-06-30')
+        self.assertEqual(len(self.calls), 1)
+        self.store.get('yahoo', '^N225', self.fetch, '2020-04-01', '2020-05-29')
+        self.assertEqual(len(self.calls), 1)
+
+        result = self.store.get('yahoo', '^N225', self.fetch, '2020-01-01', '2020-09-30')
+        self.assertEqual(self.calls[1:], [(pd.Timestamp('2020-01-01'), pd.Timestamp('2020-02-29')),
+                                          (pd.Timestamp('2020-07-01'), pd.Timestamp('2020-09-30'))])
+        expected = self.data.loc['2020-01-01':'2020-09-30'].astype({'Volume': float})
+        pd.testing.assert_frame_equal(result, expected, check_freq=False, check_index_type=False)
+        pd.testing.assert_frame_equal(first, expected.loc['2020-03-01':'2020-06-30'], check_freq=False,
+                                      check_index_type=False)
+        self.assertEqual(self.store.coverage('yahoo', '^N225'), (pd.Timestamp('2020-01-01'), pd.Timestamp('2020-09-30')))
+        self.assertEqual(self.store.tickers('yahoo'), ['^N225'])
+
+    def test_memory_map_and_offline(self):
+        # テストケース2：数値の列はメモリマップで読み込まれ、オフラインでは取得しない
+        self.store.write('yahoo', 'AAPL', self.data[['Close']])
+        values = self.store.read('yahoo', 'AAPL', '2020-02-01', '2020-03-01', mmap=True).to_numpy()
+        base = values
+        while base is not None and not isinstance(base, np.memmap):
+            base = base.base
+        self.assertIsInstance(base, np.memmap)
+        self.assertEqual(len(values), len(self.data.loc['2020-02-01':'2020-03-01']))
+
+        offline = self.store.get('yahoo', 'AAPL', self.fetch, '2020-11-01', '2021-03-31', offline=True)
+        self.assertEqual(offline.index[-1], self.data.index[-1])
+        self.assertEqual(self.calls, [])
+        with self.assertRaises(ValueError):
+            self.store.get('yahoo', 'MSFT', self.fetch, offline=True)
+
+    def test_fetcher(self):
+        # テストケース3：FinancialDataFetcherがティッカーごとにストアを経由する
+        fetcher = LocalFetcher(self.data[['Close', 'Volume']], store=self.tmpdir.name)
+        single = fetcher.get_historical_data('yahoo', tickers='AAPL', start='2020-03-02', end='2020-06-30',
+                                             progress=False)
+        self.assertEqual(list(single.columns), ['Close', 'Volume'])
+        self.assertEqual(single.index[-1], pd.Timestamp('2020-06-30'))
+        self.assertEqual(fetcher.calls[0]['end'], '2020-07-01')
+
+        both = fetcher.get_historical_data('yahoo', tickers=['AAPL', 'MSFT'], start='2020-03-02', end='2020-06-30')
+        self.assertEqual(len(fetcher.calls), 2)
+        self.assertEqual(both['Close'].columns.tolist(), ['AAPL', 'MSFT'])
+
+        offline = LocalFetcher(self.data, store=self.tmpdir.name, offline=True)
+        pd.testing.assert_frame_equal(offline.get_historical_data('yahoo', tickers='AAPL', start='2020-03-02',
+                                                                  end='2020-06-30'), single)
+        self.assertEqual(offline.calls, [])
+
+    def test_default_start(self):
+        # テストケース4：開始日を指定せずに取得した場合は実際の最初の日付を記録し、より前の期間は後から取得する
+        def fetch(start, end):
+            self.calls.append((start, end))
+            return self.data.loc[start or '2020-03-02':end]  # APIの既定の期間は2020-03-02から
+
+        first = self.store.get('yahoo', 'AAPL', fetch, end='2020-06-30')
+        self.assertEqual(first.index[0], pd.Timestamp('2020-03-02'))
+        self.assertEqual(self.store.coverage('yahoo', 'AAPL')[0], pd.Timestamp('2020-03-02'))
+
+        result = self.store.get('yahoo', 'AAPL', fetch, '2020-01-01', '2020-06-30')
+        self.assertEqual(self.calls[1], (pd.Timestamp('2020-01-01'), pd.Timestamp('2020-03-01')))
+        self.assertEqual(result.index[0], pd.Timestamp('2020-01-01'))
+        self.assertEqual(len(result), len(self.data.loc['2020-01-01':'2020-06-30']))
+
+    def test_writable_result(self):
+        # テストケース5：get()の結果は書き込み可能なコピーで、保存されたデータは変わらない
+        result = self.store.get('yahoo', 'AAPL', self.fetch, '2020-03-02', '2020-06-30')
+        result.iloc[0, 0] = -1.0
+        result['Close'] *= 2
+        cached = self.store.get('yahoo', 'AAPL', self.fetch, '2020-03-02', '2020-06-30')
+        self.assertEqual(cached['Close'].iloc[0], self.data.loc['2020-03-02', 'Close'])
+        self.assertEqual(len(self.calls), 1)
+
+        fetcher = LocalFetcher(self.data[['Close', 'Volume']], store=self.tmpdir.name)
+        prices = fetcher.get_historical_data('yahoo', tickers=['AAPL', 'MSFT'], start='2020-03-02', end='2020-06-30')
+        prices.iloc[0, 0] = 0.0
+        single = fetcher.get_historical_data('yahoo', tickers='MSFT', start='2020-03-02', end='2020-06-30')
+        single.loc[single.index[0], 'Close'] = 0.0
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+import numpy as np
+import pandas as pd
+from quantechia.strategy import basestrategy, sweep
+
+class TestParameterSweep(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        dates = pd.bdate_range('2020-01-01', periods=150)
+        prices = np.exp(np.cumsum(rng.normal(0, 0.01, (len(dates), 3)), axis=0)) * 100
+        self.prices_df = pd.DataFrame(prices, index=dates, columns=['A', 'B', 'C'])
+        self.param_grid = {'lookback': [20, 40], 'rebalance_freq': ['M', 5]}
+
+    def test_expand_param_grid(self):
+        # テストケース1：グリッドの展開
+        combinations = sweep.expand_param_grid(self.param_grid)
+        self.assertEqual(len(combinations), 4)
+        self.assertEqual(combinations[0], {'lookback': 20, 'rebalance_freq': 'M'})
+
+    def test_parallel_matches_serial(self):
+        # テストケース2：並列実行と直列実行の結果が一致する
+        serial = sweep.parameter_sweep(basestrategy.RebalanceStrategy, self.param_grid, self.prices_df, n_jobs=1)
+        parallel = sweep.parameter_sweep(basestrategy.RebalanceStrategy, self.param_grid, self.prices_df, n_jobs=2)
+        pd.testing.assert_frame_equal(parallel, serial)
+        self.assertEqual(len(serial), 4)
+        self.assertTrue(serial['error'].isna().all())
+
+    def test_failure_is_recorded(self):
+        # テストケース3：失敗した組み合わせはerror列に記録される
+        result = sweep.parameter_sweep(basestrategy.RebalanceStrategy, {'rebalance_freq': [1.5]}, self.prices_df, n_jobs=1)
+        self.assertIn('ValueError', result.loc[0, 'error'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import gzip
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from requests.adapters import HTTPAdapter
+from quantechia.data import fred, transport
+from quantechia.data.transport import HttpClient
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def log_message(self, *args):
+        pass
+
+    def send_json(self, status, data, compress=False):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        if compress:
+            body = gzip.compress(body)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        url = urlsplit(self.path)
+        with server.lock:
+            server.requests.append((url.path, self.client_address[1], self.headers.get('Accept-Encoding')))
+            count = sum(path == url.path for path, _, _ in server.requests)
+        if url.path == '/flaky' and count <= 2:
+            self.send_json(503, {'error': 'unavailable'})
+        elif url.path == '/limited' and count == 1:
+            self.send_response(429)
+            self.send_header('Retry-After', '0')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        elif url.path == '/fred/series/observations':
+            query = parse_qs(url.query)
+            self.send_json(200, {'observations': [{'date': '2020-01-01', 'value': query['series_id'][0]}]},
+                           compress=True)
+        else:
+            self.send_json(200, {'path': url.path, 'count': count})
+
+
+class LocalAdapter(HTTPAdapter):
+    """すべてのリクエストを手元のスタブサーバーに送るアダプター"""
+
+    def __init__(self, base_url, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url
+
+    def send(self, request, **kwargs):
+        url = urlsplit(request.url)
+        request.url = f"{self.base_url}{url.path}?{url.query}"
+        return super().send(request, **kwargs)
+
+
+class TestTransport(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        cls.server.lock = threading.Lock()
+        cls.server.requests = []
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.requests.clear()
+
+    def test_retry_and_keep_alive(self):
+        # テストケース1：503・429は再試行し、同じ接続を使い回す
+        client = HttpClient(backoff=0.001)
+        response = client.get(f"{self.base_url}/flaky")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 3)
+        self.assertEqual(client.get(f"{self.base_url}/limited").status_code, 200)
+        self.assertEqual(len({port for _, port, _ in self.server.requests}), 1)
+        self.assertIn('gzip', self.server.requests[0][2])
+
+        no_retry = HttpClient(retries=0)
+        self.server.requests.clear()
+        self.assertEqual(no_retry.get(f"{self.base_url}/flaky").status_code, 503)
+
+    def test_shared_client_with_transport(self):
+        # テストケース2：差し替えたトランスポート経由でデータソースが共有クライアントを使う
+        previous = transport.set_client(HttpClient(transport=LocalAdapter(self.base_url)))
+        try:
+            client = transport.get_client()
+            self.assertIs(transport.get_client(), client)
+            data = fred.FREDData('key').fetch_series_observations('GDP')
+        finally:
+            transport.set_client(previous)
+        self.assertEqual(data.to_dict('records'), [{'date': '2020-01-01', 'value': 'GDP'}])
+        self.assertEqual(self.server.requests[0][0], '/fred/series/observations')
+
+
+if __name__ == '__main__':
+    unittest.main()
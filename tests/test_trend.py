@@ -0,0 +1,99 @@
+import unittest
+import numpy as np
+import pandas as pd
+from quantechia.strategy import trend
+
+
+class TestRollingScores(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        idx = pd.bdate_range('2020-01-01', periods=300)
+        self.rtn = pd.DataFrame(rng.normal(0.0005, 0.01, (300, 6)), index=idx, columns=list('abcdef'))
+        self.rtn.iloc[5:9, 1] = np.nan      # 途中の欠損
+        self.rtn.iloc[:40, 2] = np.nan      # 上場前の欠損
+        self.rtn.iloc[100:140, 3] = 0.0     # 一定値の期間
+        self.rtn.iloc[200, 4] = -1.0        # -100%のリターン
+
+    def test_compound_return_parity(self):
+        # テストケース1：rolling().apply(np.prod)と同じ値とNaNの位置になる
+        for window in (1, 12, 60):
+            expected = (1 + self.rtn).rolling(window=window).apply(np.prod, raw=True) - 1
+            result = trend.rolling_compound_return(self.rtn, window)
+            pd.testing.assert_frame_equal(result, expected, rtol=1e-10, atol=1e-13)
+
+    def test_mean_std_parity(self):
+        # テストケース2：rolling().mean()、rolling().std()と同じ値とNaNの位置になる
+        for window in (3, 12, 60):
+            mean, std = trend.rolling_mean_std(self.rtn, window, max(10, window))
+            pd.testing.assert_frame_equal(mean, self.rtn.rolling(window=window).mean(), rtol=1e-8, atol=1e-13)
+            pd.testing.assert_frame_equal(std, self.rtn.rolling(window=max(10, window)).std(), rtol=1e-8, atol=1e-13)
+        # 一定値の窓の標準偏差は0
+        _, std = trend.rolling_mean_std(self.rtn, 12, 12)
+        self.assertTrue((std.iloc[111:140, 3] == 0).all())
+
+    def test_window_longer_than_data(self):
+        # テストケース3：データより長い期間ではすべてNaN
+        mean, std = trend.rolling_mean_std(self.rtn.iloc[:5], 12, 12)
+        self.assertTrue(mean.isna().all().all() and std.isna().all().all())
+
+    def test_strategy_scores(self):
+        # テストケース4：戦略のスコアがpandasの計算と一致する
+        strategy = trend.MomentumStrategyRR(rtn_data=self.rtn, window=12)
+        expected = self.rtn.rolling(window=12).mean() / self.rtn.rolling(window=12).std()
+        pd.testing.assert_frame_equal(strategy.calculate_momentum_score(), expected, rtol=1e-6)
+
+        strategy = trend.MomentumStrategy(rtn_data=self.rtn, window=12)
+        strategy.calculate_weight()
+
+
+class TestLongShortBonus(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        idx = pd.bdate_range('2020-01-01', periods=200)
+        self.rtn = pd.DataFrame(rng.normal(0.0005, 0.01, (200, 5)), index=idx, columns=list('abcde'))
+        self.rtn.iloc[:30, 0] = np.nan
+        self.rtn.iloc[50, :] = np.nan
+        self.rtn.iloc[60, 1:3] = 0.05  # 同値
+
+    def test_bonus_matches_loop(self):
+        # テストケース1：idxmaxとループで作ったボーナスと一致する
+        strategy = trend.MomentumStrategyLongShort(rtn_data=self.rtn, window=12, alpha=0.5)
+        rolling_mean = self.rtn.rolling(window=12).mean()
+        rolling_std = self.rtn.rolling(window=12).std()
+        rr_score = (rolling_mean / (rolling_std + 1e-8)).clip(0, 1.5)
+        bonus = pd.DataFrame(0, index=rr_score.index, columns=rr_score.columns)
+        for date, factor in self.rtn.shift(1).dropna(how='all').idxmax(axis=1).items():
+            bonus.at[date, factor] = 1
+        pd.testing.assert_frame_equal(strategy.calculate_momentum_score(), rr_score + 0.5 * bonus, rtol=1e-6)
+
+    def test_top_k_mask(self):
+        # テストケース2：上位k列が選ばれ、NaNは選ばれない
+        values = np.array([[0.1, np.nan, 0.3, 0.2],
+                           [np.nan, np.nan, np.nan, np.nan],
+                           [0.5, 0.5, 0.1, np.nan]])
+        mask = trend.top_k_mask(values, 2)
+        np.testing.assert_array_equal(mask, [[False, False, True, True],
+                                             [False, False, False, False],
+                                             [True, True, False, False]])
+        np.testing.assert_array_equal(trend.top_k_mask(values, 1).sum(axis=1), [1, 0, 1])
+
+
+
+class TestDtype(unittest.TestCase):
+    def test_float32(self):
+        # テストケース1：dtypeを指定するとトレンド・モメンタム戦略の重みもfloat32になる
+        rng = np.random.default_rng(2)
+        idx = pd.bdate_range('2020-01-01', periods=120)
+        prices = pd.DataFrame(np.exp(np.cumsum(rng.normal(0, 0.01, (120, 4)), axis=0)), index=idx, columns=list('abcd'))
+        strategies = [trend.TrendFollowingStrategy(prices, window=10, dtype='float32'),
+                      trend.MomentumStrategy(prices, window=10, dtype='float32'),
+                      trend.MomentumStrategyRR(prices, window=10, dtype='float32'),
+                      trend.MomentumStrategyLongShort(prices, window=10, dtype='float32')]
+        for strategy in strategies:
+            strategy.calculate_returns()
+            self.assertEqual(strategy.dtype, 'float32')
+            self.assertTrue((strategy.price_data.dtypes == np.float32).all())
+            self.assertTrue((strategy.weight.dtypes == np.float32).all(), type(strategy).__name__)
+
+if __name__ == '__main__':
+    unittest.main()
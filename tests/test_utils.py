@@ -1,4 +1,5 @@
 import unittest
+import numpy as np
 import pandas as pd
 from quantechia import utils
 
@@ -24,6 +25,58 @@ class TestUtils(unittest.TestCase):
         actual_returns, _ = utils.calculate_returns(prices_df, weight_data)  # weight_dataを渡す
         self.assertTrue(actual_returns.empty)
 
-   
+class TestNumpyEngine(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        dates = pd.bdate_range('2020-01-01', periods=250)
+        prices = np.exp(np.cumsum(rng.normal(0, 0.01, (len(dates), 5)), axis=0)) * 100
+        self.prices_df = pd.DataFrame(prices, index=dates, columns=list('EDCBA'))
+        self.prices_df.iloc[30:33, 1] = np.nan  # 欠損値の扱いも比較する
+
+        rebalance_dates = dates[dates.is_month_end]
+        weights = rng.random((len(rebalance_dates), 5))
+        weights /= weights.sum(axis=1, keepdims=True)
+        self.weight_data = pd.DataFrame(weights, index=rebalance_dates, columns=self.prices_df.columns)
+        self.weight_data.iloc[0] = np.nan  # lookback期間を想定
+
+    def assert_parity(self, price_data, weight_data, **kwargs):
+        expected, expected_total = utils.calculate_return(price_data, weight_data, **kwargs)
+        actual, actual_total = utils.calculate_return(price_data, weight_data, engine='numpy', **kwargs)
+        pd.testing.assert_frame_equal(actual, expected, check_freq=False)
+        pd.testing.assert_series_equal(actual_total, expected_total, check_freq=False, check_names=False)
+
+    def test_rebalance_parity(self):
+        # テストケース1：リバランス日間リターン
+        for shift_num in (0, 1, 2):
+            for cost in (True, False):
+                self.assert_parity(self.prices_df, self.weight_data, shift_num=shift_num, cost=cost)
+
+    def test_rebalance_parity_calendar_dates(self):
+        # テストケース2：営業日ではない月末日でのリバランス
+        calendar_dates = pd.date_range('2020-01-31', periods=10, freq='ME')
+        weight_data = pd.DataFrame(0.2, index=calendar_dates, columns=self.prices_df.columns)
+        self.assert_parity(self.prices_df, weight_data)
+
+    def test_daily_parity(self):
+        # テストケース3：日次リターン
+        for shift_num in (1, 2):
+            for cost in (True, False):
+                self.assert_parity(self.prices_df, self.weight_data, mode='daily', shift_num=shift_num, cost=cost)
+
+    def test_daily_parity_every_day(self):
+        # テストケース4：毎日リバランス
+        weight_data = pd.DataFrame(0.2, index=self.prices_df.index, columns=self.prices_df.columns)
+        self.assert_parity(self.prices_df, weight_data, mode='daily')
+
+    def test_column_mismatch(self):
+        # テストケース5：ウェイトの列が価格の一部しかない場合
+        weight_data = self.weight_data[['C', 'A']]
+        self.assert_parity(self.prices_df, weight_data)
+
+    def test_invalid_engine(self):
+        with self.assertRaises(ValueError):
+            utils.calculate_return(self.prices_df, self.weight_data, engine='cython')
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import numpy as np
+import pandas as pd
+from quantechia.strategy import basestrategy, walkforward
+
+
+class TestWalkForward(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        dates = pd.bdate_range('2020-01-01', periods=300)
+        prices = np.exp(np.cumsum(rng.normal(0, 0.01, (len(dates), 3)), axis=0)) * 100
+        self.prices_df = pd.DataFrame(prices, index=dates, columns=['A', 'B', 'C'])
+        self.param_grid = {'lookback': [20, 40], 'rebalance_freq': ['ME', 5]}
+        self.return_kwargs = {'mode': 'daily'}
+
+    def test_splits(self):
+        # テストケース1：学習期間と検証期間の作成
+        idx = self.prices_df.index
+        splits = walkforward.walk_forward_splits(idx, 100, 50)
+        self.assertEqual(len(splits), 4)
+        self.assertTrue(splits[0][0].equals(idx[:100]))
+        self.assertTrue(splits[0][1].equals(idx[100:150]))
+        self.assertTrue(splits[-1][1].equals(idx[250:300]))
+
+        expanding = walkforward.walk_forward_splits(idx, 100, 80, step=50, expanding=True)
+        self.assertEqual([len(train) for train, _ in expanding], [100, 150, 200, 250])
+        self.assertEqual(len(expanding[-1][1]), 50)
+
+    def test_selection_and_stitching(self):
+        # テストケース2：学習期間で最良のパラメータが選ばれ、検証期間のリターンがつながる
+        result = walkforward.walk_forward(basestrategy.RebalanceStrategy, self.prices_df, 100, 50,
+                                          param_grid=self.param_grid, n_jobs=1, return_kwargs=self.return_kwargs)
+        folds = result['folds']
+        self.assertEqual(len(folds), 4)
+        self.assertTrue(folds['error'].isna().all())
+
+        first = folds.iloc[0]
+        candidates = []
+        for params in [{'lookback': 20, 'rebalance_freq': 'ME'}, {'lookback': 20, 'rebalance_freq': 5},
+                       {'lookback': 40, 'rebalance_freq': 'ME'}, {'lookback': 40, 'rebalance_freq': 5}]:
+            strategy = basestrategy.RebalanceStrategy(self.prices_df, **params)
+            rtn = strategy.calculate_returns(**self.return_kwargs)
+            candidates.append(rtn.loc[first['train_start']:first['train_end']])
+        sharpe = [walkforward.metrics.sharpe(rtn) for rtn in candidates]
+        self.assertAlmostEqual(first['train_sharpe_ratio'], max(sharpe))
+
+        self.assertEqual(len(result['returns']), 200)
+        self.assertTrue(result['returns'].index.is_monotonic_increasing)
+        self.assertAlmostEqual(result['metrics']['sharpe_ratio'], walkforward.metrics.sharpe(result['returns']))
+
+    def test_refit_and_parallel(self):
+        # テストケース3：組ごとに計算し直した場合・並列実行の場合と結果が一致する
+        reused = walkforward.walk_forward(basestrategy.RebalanceStrategy, self.prices_df, 100, 50,
+                                          param_grid=self.param_grid, n_jobs=1, return_kwargs=self.return_kwargs)
+        refit = walkforward.walk_forward(basestrategy.RebalanceStrategy, self.prices_df, 100, 50,
+                                         param_grid=self.param_grid, n_jobs=2, refit=True,
+                                         return_kwargs=self.return_kwargs)
+        pd.testing.assert_frame_equal(refit['folds'], reused['folds'])
+        pd.testing.assert_series_equal(refit['returns'], reused['returns'])
+
+    def test_failure_is_recorded(self):
+        # テストケース4：すべてのパラメータが失敗した組はerror列に記録される
+        result = walkforward.walk_forward(basestrategy.RebalanceStrategy, self.prices_df, 100, 50,
+                                          param_grid={'rebalance_freq': [1.5]}, n_jobs=1)
+        self.assertTrue(result['folds']['error'].str.contains('ValueError').all())
+        self.assertTrue(result['returns'].empty)
+
+
+if __name__ == '__main__':
+    unittest.main()